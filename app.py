@@ -1,6 +1,5 @@
 import asyncio
 import os
-import sys
 import logging
 import json
 from typing import List
@@ -14,13 +13,20 @@ import uuid
 from datetime import datetime
 from pydantic import BaseModel
 
-# Add mediachain to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'mediachain'))
+import mediachain_path  # noqa: F401 (makes mediachain's 'core' importable)
 
 from mediachain.examples.moviepy_engine.reddit_stories.generate_reddit_story import RedditStoryGenerator
 from script_parser import parse_dialogue_script, validate_two_speakers
 from instagram_manager import InstagramManager
-from elevenlabs_utils import get_available_voices, generate_dialogue_audio, concatenate_audio_segments
+from publish_queue import InstagramPublishQueue
+from elevenlabs_utils import get_available_voices, generate_dialogue_audio, assemble_dialogue_audio
+from job_queue import RenderJobQueue
+from script_renderer import render_script_video
+from background_library import pick_background
+from preview_store import get_preview_store
+from core.utils.provider_clients import get_provider_clients
+from mediachain.examples.moviepy_engine.src.video_metadata import get_video_index
+from mediachain.examples.moviepy_engine.src.render_profiles import RENDER_PROFILES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +41,8 @@ app = FastAPI(
 
 # Initialize Instagram Manager
 instagram_manager = InstagramManager()
+# Uploads run on their own scheduler thread, so they never block the API or the renders
+publish_queue = InstagramPublishQueue(instagram_manager)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -52,8 +60,11 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
 # Configuration
-AVATAR_SIZE = 700  # Fixed height in pixels for speaker avatars
 DEFAULT_VIDEOS_DIR = Path("default_videos")  # Directory containing default background videos
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0")) or None  # Render worker processes (default: half the cores)
+RENDER_SEGMENTS = int(os.getenv("RENDER_SEGMENTS", "0")) or None  # Parallel segments per render (default: cores per worker)
+CAPTION_SOURCE = os.getenv("CAPTION_SOURCE", "alignment")  # Script-mode caption timing: "alignment" (ElevenLabs) or "whisper"
+SCRIPT_RENDERER = os.getenv("SCRIPT_RENDERER", "moviepy")  # Script-mode compositor: "moviepy" or "ffmpeg" (filtergraph)
 
 # Mount static files (for serving the frontend)
 app.mount("/static", StaticFiles(directory="static", html=True), name="static")
@@ -68,233 +79,46 @@ processing_status = {}
 # Store extension session data (dialogue + images)
 extension_sessions = {}
 
+# Worker pool for script-mode renders (progress is mirrored into processing_status)
+render_queue = RenderJobQueue(processing_status, max_workers=RENDER_WORKERS)
 
-def add_dialogue_images_to_video(
-    video_clip,
-    dialogue_images_map: dict,
-    audio_segments: list
-) -> list:
-    """
-    Add user-uploaded images to video at dialogue timing.
-    Images positioned at top third, similar to DALL-E.
-    
-    Args:
-        video_clip: The video clip to add images to
-        dialogue_images_map: Dictionary mapping dialogue index to image path
-        audio_segments: List of audio segment dicts with timing info
-        
-    Returns:
-        List of image clips to overlay
-    """
-    from moviepy.editor import ImageClip, AudioFileClip
-    
-    if not dialogue_images_map:
-        return []
-    
-    logger.info(f"[IMAGE_OVERLAY] Adding {len(dialogue_images_map)} dialogue images to video")
-    
-    image_clips = []
-    
-    # Calculate cumulative timing for each dialogue
-    cumulative_time = 0.0
-    dialogue_timings = []
-    previous_speaker = None
-    
-    for idx, segment in enumerate(audio_segments):
-        start_time = cumulative_time
-        
-        # Add 1s gap if speaker changed
-        if idx > 0 and segment['speaker'] != previous_speaker:
-            cumulative_time += 1.0
-            start_time = cumulative_time
-        
-        # Get audio duration
-        audio_path = segment['audio_path']
-        if audio_path and os.path.exists(audio_path):
-            audio_clip = AudioFileClip(audio_path)
-            duration = audio_clip.duration
-            audio_clip.close()
-        else:
-            # Fallback: estimate duration based on text length (rough estimate)
-            text_length = len(segment.get('text', ''))
-            duration = max(2.0, text_length / 15.0)  # ~15 chars per second speaking rate
-            logger.warning(f"[IMAGE_OVERLAY] Using estimated duration for segment {idx}: {duration:.2f}s")
-        
-        end_time = cumulative_time + duration
-        dialogue_timings.append({
-            'index': idx,
-            'start': start_time,
-            'end': end_time,
-            'duration': duration,
-            'speaker': segment['speaker']
-        })
-        cumulative_time = end_time
-        previous_speaker = segment['speaker']
-    
-    # Add image clips
-    for dialogue_idx, image_path in dialogue_images_map.items():
-        if dialogue_idx >= len(dialogue_timings):
-            logger.warning(f"[IMAGE_OVERLAY] Skipping image for dialogue {dialogue_idx} - index out of range")
-            continue
-        
-        timing = dialogue_timings[dialogue_idx]
-        start_time = timing['start']
-        
-        # Calculate end time: until next image or max 5 seconds
-        end_time = timing['end']
-        
-        # Check if there's a next image
-        next_image_idx = None
-        for idx in range(dialogue_idx + 1, len(dialogue_timings)):
-            if idx in dialogue_images_map:
-                next_image_idx = idx
-                break
-        
-        if next_image_idx:
-            # End at the start of next image
-            end_time = min(end_time, dialogue_timings[next_image_idx]['start'])
-        
-        # Cap at 5 seconds max
-        duration = min(end_time - start_time, 5.0)
-        
-        logger.info(f"[IMAGE_OVERLAY] Dialogue {dialogue_idx}: {start_time:.2f}s - {start_time + duration:.2f}s ({duration:.2f}s)")
-        
-        try:
-            # Create image clip (positioned at top third like DALL-E)
-            image_clip = (ImageClip(image_path)
-                         .set_duration(duration)
-                         .set_position(('center', 70))
-                         .resize(height=video_clip.h / 3)
-                         .set_start(start_time))
-            
-            image_clips.append(image_clip)
-        except Exception as e:
-            logger.error(f"[IMAGE_OVERLAY] Error adding image for dialogue {dialogue_idx}: {e}")
-    
-    logger.info(f"[IMAGE_OVERLAY] ✓ Added {len(image_clips)} image clips")
-    return image_clips
 
+def validate_render_profile(render_profile):
+    """Reject unknown render profile names (None means the RENDER_PROFILE default)"""
+    if render_profile and render_profile not in RENDER_PROFILES:
+        raise HTTPException(status_code=400, detail=f"render_profile must be one of: {', '.join(RENDER_PROFILES)}")
 
-def add_speaker_avatars_to_video(
-    video_clip,
-    speaker_avatars: dict,
-    audio_segments: list,
-    speakers_list: list
-) -> list:
-    """
-    Add speaker avatar images that appear when each speaker is talking.
-    Square avatars positioned at bottom corners.
-    
-    Args:
-        video_clip: The video clip
-        speaker_avatars: Dict mapping speaker name to avatar image path
-        audio_segments: List of audio segment dicts
-        speakers_list: List of speaker names [speaker1, speaker2]
-        
-    Returns:
-        List of avatar clips
-    """
-    from moviepy.editor import ImageClip, AudioFileClip
-    
-    if not speaker_avatars:
-        return []
-    
-    logger.info(f"[AVATAR] Adding speaker avatars to video")
-    
-    avatar_clips = []
-    
-    # Calculate timing for each segment
-    cumulative_time = 0.0
-    previous_speaker = None
-    
-    # Fixed positioning constants
-    # AVATAR_SIZE is defined globally
-    logger.info(f"[AVATAR] Using AVATAR_SIZE: {AVATAR_SIZE}")
-    MARGIN = 20  # Margin from edges
-    BOTTOM_OFFSET = 100  # Distance from bottom
-    
-    for idx, segment in enumerate(audio_segments):
-        speaker = segment['speaker']
-        
-        # Skip if no avatar for this speaker
-        if speaker not in speaker_avatars:
-            cumulative_time_before = cumulative_time
-            
-            # Calculate duration to advance cumulative_time
-            audio_path = segment['audio_path']
-            if audio_path and os.path.exists(audio_path):
-                audio_clip = AudioFileClip(audio_path)
-                duration = audio_clip.duration
-                audio_clip.close()
-            else:
-                text_length = len(segment.get('text', ''))
-                duration = max(2.0, text_length / 15.0)
-            
-            # Add 1s gap if speaker changed
-            if idx > 0 and segment['speaker'] != previous_speaker:
-                cumulative_time += 1.0
-            
-            cumulative_time += duration
-            previous_speaker = speaker
-            continue
-        
-        # Add 1s gap if speaker changed
-        if idx > 0 and segment['speaker'] != previous_speaker:
-            cumulative_time += 1.0
-        
-        start_time = cumulative_time
-        
-        # Get audio duration
-        audio_path = segment['audio_path']
-        if audio_path and os.path.exists(audio_path):
-            audio_clip = AudioFileClip(audio_path)
-            duration = audio_clip.duration
-            audio_clip.close()
-        else:
-            # Fallback estimation
-            text_length = len(segment.get('text', ''))
-            duration = max(2.0, text_length / 15.0)
-        
-        cumulative_time += duration
-        
-        # Determine position based on speaker
-        try:
-            speaker_index = speakers_list.index(speaker)
-        except ValueError:
-            logger.warning(f"[AVATAR] Speaker {speaker} not in speakers list, skipping")
-            previous_speaker = speaker
-            continue
-        
-        if len(speakers_list) == 1:
-            # Single speaker: Center bottom
-            position = ('center', video_clip.h - AVATAR_SIZE - BOTTOM_OFFSET)
-        elif speaker_index == 0:
-            # Speaker 1 (of 2): Bottom left
-            position = (MARGIN, video_clip.h - AVATAR_SIZE - BOTTOM_OFFSET)
-        else:
-            # Speaker 2 (of 2): Bottom right
-            position = (video_clip.w - AVATAR_SIZE - MARGIN, 
-                       video_clip.h - AVATAR_SIZE - BOTTOM_OFFSET)
-        
-        logger.info(f"[AVATAR] {speaker} at {start_time:.2f}s-{start_time+duration:.2f}s, pos={position}")
-        
-        try:
-            # Create square avatar clip (no circular mask, just resize to square)
-            avatar_clip = (ImageClip(speaker_avatars[speaker])
-                          .set_duration(duration)
-                          .resize(height=AVATAR_SIZE)
-                          .set_position(position)
-                          .set_start(start_time))
-            
-            avatar_clips.append(avatar_clip)
-            
-        except Exception as e:
-            logger.error(f"[AVATAR] Error adding avatar for {speaker}: {e}")
-        
-        previous_speaker = speaker
-    
-    logger.info(f"[AVATAR] ✓ Added {len(avatar_clips)} avatar clips")
-    return avatar_clips
+
+@app.on_event("startup")
+async def index_default_videos():
+    """Probe the default backgrounds in the background so renders find their metadata cached"""
+    if DEFAULT_VIDEOS_DIR.exists():
+        get_video_index().index_in_background(str(DEFAULT_VIDEOS_DIR))
+
+
+@app.on_event("startup")
+async def purge_expired_previews():
+    """Drop preview audio that outlived PREVIEW_TTL_HOURS"""
+    get_preview_store().purge_expired()
+
+
+@app.on_event("shutdown")
+async def shutdown_render_queue():
+    """Stop the render worker pool"""
+    render_queue.shutdown()
+
+
+@app.on_event("shutdown")
+async def shutdown_publish_queue():
+    """Stop the Instagram publish scheduler"""
+    publish_queue.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    """Close the pooled provider connections"""
+    await get_provider_clients().aclose()
+    get_provider_clients().close()
 
 
 @app.get("/")
@@ -316,7 +140,8 @@ async def generate_video(
     add_images: bool = Form(True),
     loop_if_short: bool = Form(True),
     font_color: str = Form("white"),
-    shadow_color: str = Form("black")
+    shadow_color: str = Form("black"),
+    render_profile: str = Form(None)
 ):
     """
     Generate a Reddit story video from uploaded video file
@@ -327,6 +152,7 @@ async def generate_video(
         add_images: Whether to add AI-generated images
         font_color: Caption font color
         shadow_color: Caption shadow color
+        render_profile: draft, preview or publish (default: RENDER_PROFILE)
     """
     job_id = str(uuid.uuid4())
     processing_status[job_id] = {"status": "processing", "progress": 0}
@@ -336,6 +162,8 @@ async def generate_video(
     logger.info("="*80)
     
     try:
+        validate_render_profile(render_profile)
+        
         # Validate file
         logger.info(f"[JOB {job_id}] Validating uploaded file: {video.filename}")
         if not video.filename.endswith(('.mp4', '.mov', '.avi', '.mkv')):
@@ -394,7 +222,8 @@ async def generate_video(
             video_topic=topic,
             captions_settings=captions_settings,
             add_images=add_images,
-            loop_if_short=loop_if_short
+            loop_if_short=loop_if_short,
+            render_profile=render_profile
         )
         
         processing_status[job_id]["progress"] = 100
@@ -507,7 +336,8 @@ async def get_elevenlabs_voices():
             raise HTTPException(status_code=500, detail="ELEVENLABS_API_KEY not set in environment")
         
         logger.info("[VOICES] Fetching ElevenLabs voices")
-        voices = get_available_voices(elevenlabs_api_key)
+        # Provider calls are blocking; keep them off the event loop
+        voices = await asyncio.to_thread(get_available_voices, elevenlabs_api_key)
         
         logger.info(f"[VOICES] ✓ Retrieved {len(voices)} voices")
         return JSONResponse({
@@ -581,7 +411,7 @@ async def preview_audio(
         logger.info(f"[PREVIEW {job_id}] Voice mapping: {voice_mapping}")
         
         # Generate audio segments
-        audio_result = generate_dialogue_audio(elevenlabs_api_key, dialogue, voice_mapping)
+        audio_result = await asyncio.to_thread(generate_dialogue_audio, elevenlabs_api_key, dialogue, voice_mapping)
         
         if audio_result["count"] == 0:
             raise HTTPException(status_code=500, detail="Failed to generate audio")
@@ -589,21 +419,20 @@ async def preview_audio(
         # Concatenate segments (with 1s gaps between speaker changes)
         preview_audio_path = f"/tmp/elevenlabs_audio/preview_{job_id}.mp3"
         
-        concatenated_path = concatenate_audio_segments(audio_result["segments"], preview_audio_path)
+        timeline = await asyncio.to_thread(assemble_dialogue_audio, audio_result["segments"], preview_audio_path, audio_result["pcm"])
         
-        if not concatenated_path:
+        if timeline is None:
             raise HTTPException(status_code=500, detail="Failed to concatenate audio")
         
         logger.info(f"[PREVIEW {job_id}] ✓ Preview audio generated")
         
-        # Store audio segments data for reuse (avoid regenerating on video creation)
-        processing_status[f"preview_{job_id}"] = {
-            "audio_path": concatenated_path,
-            "segments": audio_result["segments"],
-            "dialogue": dialogue,
-            "speakers": speakers,
-            "voice_mapping": voice_mapping
-        }
+        # Persist the audio artifacts so any render worker can reuse them (avoid regenerating on video creation)
+        stored = await asyncio.to_thread(
+            get_preview_store().save,
+            job_id, audio_result["segments"], timeline.to_dict(), audio_result["pcm"],
+            dialogue, speakers, voice_mapping
+        )
+        concatenated_path = stored["audio_path"]
         
         # Return FileResponse with custom headers for reuse
         response = FileResponse(
@@ -636,10 +465,15 @@ async def generate_video_script_mode(
     dialogue_images: List[UploadFile] = File(None),
     image_indices: str = Form(None),
     speaker1_avatar: UploadFile = File(None),
-    speaker2_avatar: UploadFile = File(None)
+    speaker2_avatar: UploadFile = File(None),
+    caption_source: str = Form(None),
+    renderer: str = Form(None),
+    render_profile: str = Form(None)
 ):
     """
-    Generate video using custom script with ElevenLabs voices
+    Generate video using custom script with ElevenLabs voices.
+    The render runs in a worker process; poll /api/status/{job_id} for progress
+    and the download_url once the job is completed.
     
     Args:
         script: Dialogue script with speakers
@@ -649,15 +483,107 @@ async def generate_video_script_mode(
         loop_if_short: Auto-loop if video is short
         font_color: Caption text color
         shadow_color: Caption shadow color
-        preview_audio_path: Path to preview audio (if already generated)
+        preview_audio_path: Path to preview audio (kept for older clients; preview_job_id is used)
+        preview_job_id: Preview id from /api/preview-audio, to reuse its audio
         dialogue_images: List of uploaded image files for dialogue
         image_indices: JSON string mapping dialogue index to filename
+        caption_source: "alignment" or "whisper" (default: CAPTION_SOURCE)
+        renderer: "moviepy" or "ffmpeg" (default: SCRIPT_RENDERER)
+        render_profile: draft, preview or publish (default: RENDER_PROFILE)
     """
+    return await queue_script_video(
+        script=script,
+        speaker1_voice=speaker1_voice,
+        speaker2_voice=speaker2_voice,
+        video=video,
+        loop_if_short=loop_if_short,
+        font_color=font_color,
+        shadow_color=shadow_color,
+        preview_audio_path=preview_audio_path,
+        preview_job_id=preview_job_id,
+        dialogue_images=dialogue_images,
+        image_indices=image_indices,
+        speaker1_avatar=speaker1_avatar,
+        speaker2_avatar=speaker2_avatar,
+        caption_source=caption_source,
+        renderer=renderer,
+        render_profile=render_profile
+    )
+
+
+@app.post("/api/preview-video")
+async def preview_video(
+    script: str = Form(...),
+    speaker1_voice: str = Form(...),
+    speaker2_voice: str = Form(...),
+    video: UploadFile = File(None),  # Make video optional
+    loop_if_short: bool = Form(True),
+    font_color: str = Form('white'),
+    shadow_color: str = Form('black'),
+    preview_audio_path: str = Form(None),
+    preview_job_id: str = Form(None),
+    dialogue_images: List[UploadFile] = File(None),
+    image_indices: str = Form(None),
+    speaker1_avatar: UploadFile = File(None),
+    speaker2_avatar: UploadFile = File(None),
+    caption_source: str = Form(None),
+    renderer: str = Form(None)
+):
+    """
+    Render a low-resolution draft (draft profile, e.g. 270x480 at 15fps) of the
+    script-mode video, to check images and avatars before the final render.
+    Takes the same fields as /api/generate-video-script; pass preview_job_id from
+    /api/preview-audio to reuse its audio (and the captions of earlier drafts).
+    Poll /api/status/{job_id} like a full render.
+    """
+    return await queue_script_video(
+        script=script,
+        speaker1_voice=speaker1_voice,
+        speaker2_voice=speaker2_voice,
+        video=video,
+        loop_if_short=loop_if_short,
+        font_color=font_color,
+        shadow_color=shadow_color,
+        preview_audio_path=preview_audio_path,
+        preview_job_id=preview_job_id,
+        dialogue_images=dialogue_images,
+        image_indices=image_indices,
+        speaker1_avatar=speaker1_avatar,
+        speaker2_avatar=speaker2_avatar,
+        caption_source=caption_source,
+        renderer=renderer,
+        render_profile="draft",
+        draft=True
+    )
+
+
+async def queue_script_video(
+    script: str,
+    speaker1_voice: str,
+    speaker2_voice: str,
+    video: UploadFile = None,
+    loop_if_short: bool = True,
+    font_color: str = 'white',
+    shadow_color: str = 'black',
+    preview_audio_path: str = None,
+    preview_job_id: str = None,
+    dialogue_images: List[UploadFile] = None,
+    image_indices: str = None,
+    speaker1_avatar: UploadFile = None,
+    speaker2_avatar: UploadFile = None,
+    caption_source: str = None,
+    renderer: str = None,
+    render_profile: str = None,
+    draft: bool = False
+):
+    """Validate a script-mode request, save its uploads and queue the render (full or draft)"""
     job_id = str(uuid.uuid4())
     processing_status[job_id] = {"status": "processing", "progress": 0}
+    video_path = None
+    background = None
     
     logger.info("="*80)
-    logger.info(f"[JOB {job_id}] New SCRIPT-MODE video generation")
+    logger.info(f"[JOB {job_id}] New SCRIPT-MODE {'draft preview' if draft else 'video generation'}")
     logger.info("="*80)
     
     try:
@@ -677,7 +603,14 @@ async def generate_video_script_mode(
             with video_path.open("wb") as buffer:
                 shutil.copyfileobj(video.file, buffer)
         else:
-            # Use random default video
+            # Prefer a random pre-cropped proxy (see background_library.py), read in place
+            background = pick_background()
+        
+        if background:
+            video_path = Path(background["proxy_path"])
+            logger.info(f"[JOB {job_id}] No video uploaded, using background proxy: {video_path.name}")
+        elif not video_path:
+            # No proxies ingested: use a random default video
             import random
             default_videos = list(DEFAULT_VIDEOS_DIR.glob("*.mp4"))
             
@@ -805,174 +738,64 @@ async def generate_video_script_mode(
         logger.info(f"[JOB {job_id}] Voice mapping: {voice_mapping}")
         
         # Check if we can reuse preview audio
-        audio_result = None
-        if preview_audio_path and os.path.exists(preview_audio_path) and preview_job_id:
-            # Try to retrieve stored preview data
-            preview_key = f"preview_{preview_job_id}"
-            if preview_key in processing_status:
-                logger.info(f"[JOB {job_id}] ♻️  Reusing preview audio AND segments data: {preview_audio_path}")
-                preview_data = processing_status[preview_key]
-                concatenated_audio = preview_data["audio_path"]
-                audio_result = {
-                    "segments": preview_data["segments"],
-                    "count": len(preview_data["segments"])
-                }
-                logger.info(f"[JOB {job_id}] ✓ Retrieved {audio_result['count']} audio segments from preview")
+        preview_id = None
+        if preview_job_id:
+            # Try to retrieve stored preview data (only valid for the same lines and voices)
+            preview_data = get_preview_store().load(preview_job_id)
+            if not preview_data:
+                logger.warning(f"[JOB {job_id}] Preview data not found or expired, will regenerate audio")
+            elif preview_data["dialogue"] != dialogue or preview_data["voice_mapping"] != voice_mapping:
+                logger.warning(f"[JOB {job_id}] Script or voices changed since the preview, will regenerate audio")
             else:
-                logger.warning(f"[JOB {job_id}] Preview data not found, will regenerate audio")
-                concatenated_audio = None
-                preview_audio_path = None
-        
-        if not preview_audio_path or not audio_result:
-            # Generate audio segments with ElevenLabs
-            logger.info(f"[JOB {job_id}] Generating audio with ElevenLabs (no preview available)")
-            audio_result = generate_dialogue_audio(elevenlabs_api_key, dialogue, voice_mapping)
-            
-            if audio_result["count"] == 0:
-                raise HTTPException(status_code=500, detail="Failed to generate audio")
-            
-            # Concatenate audio segments (with 1s gaps between speaker changes)
-            final_audio_path = f"/tmp/elevenlabs_audio/final_{job_id}.mp3"
-            
-            concatenated_audio = concatenate_audio_segments(audio_result["segments"], final_audio_path)
-            
-            if not concatenated_audio:
-                raise HTTPException(status_code=500, detail="Failed to concatenate audio")
-            
-            logger.info(f"[JOB {job_id}] ✓ Audio generated: {concatenated_audio}")
-        
-        # Get OpenAI API key for caption generation (using Whisper STT for accurate timing)
-        openai_api_key = os.getenv('OPENAI_API_KEY')
-        if not openai_api_key:
-            raise HTTPException(status_code=500, detail="OPENAI_API_KEY not set (needed for Whisper captions)")
-        
-        logger.info(f"[JOB {job_id}] Starting video composition with Whisper captions")
+                preview_id = preview_job_id
+                logger.info(f"[JOB {job_id}] ♻️  Will reuse {len(preview_data['segments'])} preview audio segments")
         
-        # Step 1: Generate captions using Whisper STT on the ElevenLabs audio
-        logger.info(f"[JOB {job_id}] Generating captions via Whisper STT")
-        from mediachain.examples.moviepy_engine.src.captions.caption_handler import CaptionHandler
-        caption_handler = CaptionHandler()
+        # Captions are timed from ElevenLabs alignment by default; Whisper is opt-in (and the fallback)
+        caption_source = caption_source or CAPTION_SOURCE
+        if caption_source not in ("alignment", "whisper"):
+            raise HTTPException(status_code=400, detail="caption_source must be 'alignment' or 'whisper'")
         
-        # Caption settings from form parameters
-        logger.info(f"[JOB {job_id}] Caption colors: text={font_color}, shadow={shadow_color}")
-        
-        # Generate subtitles from the concatenated audio (Whisper automatically gets timing)
-        # Using smaller font size (45 instead of 60) and Helvetica with yellow outline
-        subtitles_path, caption_clips = await caption_handler.process(
-            concatenated_audio,
-            captions_color=font_color,
-            shadow_color='yellow',  # Yellow outline (hardcoded in VideoCaptioner)
-            font_size=45,  # Smaller font
-            width=540
-        )
-        logger.info(f"[JOB {job_id}] ✓ Whisper generated {len(caption_clips)} caption clips with timestamps")
-        
-        # Step 2: Load and prepare the background video
-        from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
-        from mediachain.examples.moviepy_engine.src.video_editor import VideoEditor
-        
-        video_editor = VideoEditor()
-        
-        logger.info(f"[JOB {job_id}] Loading background video")
-        background_video = VideoFileClip(str(video_path))
-        background_duration = background_video.duration
-        
-        # Load the audio
-        audio_clip = AudioFileClip(concatenated_audio)
-        audio_duration = audio_clip.duration
-        
-        logger.info(f"[JOB {job_id}] Video: {background_duration:.2f}s, Audio: {audio_duration:.2f}s")
-        
-        # Step 3: Loop video if too short
-        if background_duration < audio_duration:
-            if loop_if_short:
-                logger.info(f"[JOB {job_id}] Video too short, looping to {audio_duration:.2f}s")
-                looped_video_path = video_editor.loop_video_to_duration(str(video_path), audio_duration + 5.0)
-                if looped_video_path:
-                    background_video.close()
-                    background_video = VideoFileClip(looped_video_path)
-                    background_duration = background_video.duration
-                    logger.info(f"[JOB {job_id}] ✓ Video looped to {background_duration:.2f}s")
-                else:
-                    raise HTTPException(status_code=500, detail="Failed to loop video")
-            else:
-                raise HTTPException(status_code=400, detail=f"Video too short: {background_duration:.2f}s < {audio_duration:.2f}s")
-        
-        # Step 4: Crop video to 9:16 aspect ratio
-        logger.info(f"[JOB {job_id}] Cropping to 9:16 aspect ratio")
-        cropped_video = video_editor.crop_video_9_16(background_video)
-        
-        # Step 5: Set the audio
-        logger.info(f"[JOB {job_id}] Syncing ElevenLabs audio with video")
-        video_with_audio = cropped_video.set_audio(audio_clip)
-        
-        # Step 5.5: Add dialogue images if provided
-        image_clips = []
-        if dialogue_images_map:
-            logger.info(f"[JOB {job_id}] Adding dialogue images to video")
-            image_clips = add_dialogue_images_to_video(
-                cropped_video,
-                dialogue_images_map,
-                audio_result["segments"]
-            )
-            logger.info(f"[JOB {job_id}] ✓ Added {len(image_clips)} image overlays")
-        
-        # Step 5.5: Add speaker avatars
-        avatar_clips = []
-        if speaker_avatars:
-            logger.info(f"[JOB {job_id}] Adding speaker avatars")
-            avatar_clips = add_speaker_avatars_to_video(
-                cropped_video,
-                speaker_avatars,
-                audio_result["segments"],
-                speakers
-            )
-            logger.info(f"[JOB {job_id}] ✓ Added {len(avatar_clips)} avatar overlays")
-        
-        # Step 6: Add Whisper-generated captions overlay
-        logger.info(f"[JOB {job_id}] Adding Whisper-timed captions overlay")
-        final_video = CompositeVideoClip([video_with_audio] + image_clips + avatar_clips + caption_clips)
-        
-        # Cut to audio duration
-        final_video = final_video.subclip(0, audio_duration)
-        
-        # Step 7: Render final video
-        output_filename = f"script_mode_{job_id}.mp4"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
-        logger.info(f"[JOB {job_id}] Rendering final video...")
-        final_video.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            fps=30,
-            preset='medium',
-            threads=4
-        )
+        # Whisper captions need OpenAI (checked here so the request fails fast)
+        if caption_source == "whisper" and not os.getenv('OPENAI_API_KEY'):
+            raise HTTPException(status_code=500, detail="OPENAI_API_KEY not set (needed for Whisper captions)")
         
-        # Step 8: Cleanup
-        logger.info(f"[JOB {job_id}] Cleaning up resources")
-        background_video.close()
-        audio_clip.close()
-        cropped_video.close()
-        video_with_audio.close()
-        final_video.close()
-        for clip in caption_clips:
-            clip.close()
+        renderer = renderer or SCRIPT_RENDERER
+        if renderer not in ("moviepy", "ffmpeg"):
+            raise HTTPException(status_code=400, detail="renderer must be 'moviepy' or 'ffmpeg'")
+        validate_render_profile(render_profile)
         
-        # Remove uploaded video
-        video_path.unlink(missing_ok=True)
+        # Hand the heavy pipeline (TTS, Whisper, composition, encoding) to a render worker
+        job = {
+            "video_path": str(video_path),
+            "background": background,
+            "dialogue": dialogue,
+            "speakers": speakers,
+            "voice_mapping": voice_mapping,
+            "dialogue_images_map": dialogue_images_map,
+            "speaker_avatars": speaker_avatars,
+            "loop_if_short": loop_if_short,
+            "font_color": font_color,
+            "shadow_color": shadow_color,
+            "caption_source": caption_source,
+            "renderer": renderer,
+            "render_profile": render_profile,
+            "preview_id": preview_id,
+            "output_prefix": "preview" if draft else "script_mode",
+            # Split the render across the cores left for each render worker (drafts are too short to gain from it)
+            "render_segments": 1 if draft else RENDER_SEGMENTS or render_queue.cores_per_worker,
+            # Segments and their encoder threads share this budget, so concurrent renders don't oversubscribe the CPU
+            "cpu_budget": render_queue.cores_per_worker
+        }
+        render_queue.submit(job_id, render_script_video, job)
         
-        logger.info(f"[JOB {job_id}] ✓✓✓ Script mode video generation completed!")
+        logger.info(f"[JOB {job_id}] ✓ Job queued for rendering")
         
-        result = {
-            "status": "success",
-            "message": "Video generated successfully with ElevenLabs audio and Whisper captions!",
+        return JSONResponse({
+            "status": "queued",
             "job_id": job_id,
-            "download_url": f"/api/download/{output_filename}"
-        }
-        
-        return JSONResponse(result)
+            "message": "Draft preview queued for rendering" if draft else "Video queued for rendering",
+            "status_url": f"/api/status/{job_id}"
+        })
         
     except HTTPException:
         raise
@@ -984,7 +807,8 @@ async def generate_video_script_mode(
         processing_status[job_id]["status"] = "failed"
         processing_status[job_id]["error"] = str(e)
         
-        if video_path and video_path.exists():
+        # Proxies belong to the background library; only per-job copies are removed
+        if video_path and not background and video_path.exists():
             video_path.unlink(missing_ok=True)
         
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -1032,7 +856,10 @@ async def remove_instagram_account(account_id: str):
 
 @app.post("/api/instagram/upload")
 async def upload_to_instagram(data: InstagramUploadRequest):
-    """Upload a generated video to Instagram"""
+    """Queue a generated video for upload to Instagram (poll /api/instagram/uploads/{upload_id})"""
+    if data.account_id not in instagram_manager.accounts:
+        raise HTTPException(status_code=404, detail="Account not found")
+
     try:
         # Find the video file
         # We need to find where the video is stored based on job_id
@@ -1067,12 +894,10 @@ async def upload_to_instagram(data: InstagramUploadRequest):
         video_filename = video_path.name
         video_url = f"{PUBLIC_URL}/outputs/{video_filename}"
         
-        logger.info(f"[INSTAGRAM] Uploading video from URL: {video_url}")
-        
-        result = instagram_manager.upload_video(data.account_id, video_url, data.caption)
-        
-        # Cleanup if requested
-        if data.cleanup:
+        logger.info(f"[INSTAGRAM] Queueing upload of video from URL: {video_url}")
+
+        def cleanup(record):
+            """Delete the job's files once the video is published"""
             logger.info(f"[CLEANUP] Cleaning up files for job {data.job_id}")
             # Delete video
             try:
@@ -1085,19 +910,39 @@ async def upload_to_instagram(data: InstagramUploadRequest):
             shutil.rmtree(f"/tmp/elevenlabs_audio", ignore_errors=True)
             
             # Remove from processing status
-            if data.job_id in processing_status:
-                del processing_status[data.job_id]
+            processing_status.pop(data.job_id, None)
+
+        upload_id = publish_queue.submit(data.account_id, video_url, data.caption,
+                                         on_published=cleanup if data.cleanup else None)
 
-        return JSONResponse({"status": "success", "result": result})
+        return JSONResponse({"status": "queued", "upload_id": upload_id}, status_code=202)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[INSTAGRAM] Error uploading: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/instagram/uploads/{upload_id}")
+async def get_instagram_upload(upload_id: str):
+    """Get the status of a queued Instagram upload"""
+    status = publish_queue.get_status(upload_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return JSONResponse(status)
+
+@app.get("/api/instagram/uploads")
+async def list_instagram_uploads():
+    """Get the uploads in flight or recently finished, newest first"""
+    return JSONResponse(publish_queue.list_uploads())
+
 @app.get("/api/instagram/history")
-async def get_upload_history():
-    """Get upload history"""
-    return JSONResponse(instagram_manager.get_history())
+async def get_upload_history(limit: int = 50, offset: int = 0, account_id: str = None):
+    """Get upload history, newest first (paginated with limit/offset)"""
+    if not 1 <= limit <= 500 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-500 and offset >= 0")
+    history = await asyncio.to_thread(instagram_manager.get_history, limit, offset, account_id)
+    return JSONResponse(history)
 
 
 # ============================================================================
@@ -0,0 +1,169 @@
+"""
+Background Library
+Pre-transcoded 9:16 proxies of the default background videos.
+
+Each default video is cropped and scaled once to the render size/fps (with a keyframe
+every second), so renders can seek straight into a proxy instead of copying and
+cropping the full-resolution source per job.
+
+Usage:
+    python background_library.py ingest [--force]
+"""
+import os
+import json
+import uuid
+import random
+import logging
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import mediachain_path  # noqa: F401 (makes 'core' importable)
+
+from mediachain.examples.moviepy_engine.src.ffmpeg_tools import run_ffmpeg
+from mediachain.examples.moviepy_engine.src.video_metadata import get_video_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VIDEOS_DIR = Path("default_videos")
+PROXY_DIR = Path(os.getenv("BACKGROUND_PROXY_DIR", "default_videos/proxies"))
+PROXY_WIDTH = 1080
+PROXY_HEIGHT = 1920
+PROXY_FPS = 30
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv")
+
+_index_lock = threading.Lock()
+
+
+def index_path() -> Path:
+    return PROXY_DIR / "index.json"
+
+
+def load_index() -> Dict[str, Dict]:
+    """Proxy entries keyed by source file name ({} if nothing was ingested)."""
+    try:
+        with open(index_path(), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_index(index: Dict[str, Dict]) -> None:
+    PROXY_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = PROXY_DIR / f".index.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(temp_path, index_path())
+
+
+def make_proxy(source_path: str, output_path: str) -> str:
+    """
+    Center-crop a video to 9:16, scale it to the proxy size/fps and drop its audio.
+
+    Args:
+        source_path: Source video
+        output_path: Proxy output path (.mp4)
+
+    Returns:
+        output_path
+    """
+    # Same center crop as VideoEditor.crop_video_9_16, also handling sources narrower than 9:16
+    video_filter = (
+        f"crop=w='min(iw\\,ih*9/16)':h='min(ih\\,iw*16/9)',"
+        f"scale={PROXY_WIDTH}:{PROXY_HEIGHT},setsar=1,fps={PROXY_FPS}"
+    )
+    run_ffmpeg([
+        "-y", "-i", source_path, "-an", "-vf", video_filter,
+        "-c:v", "libx264", "-preset", "medium", "-crf", "18", "-pix_fmt", "yuv420p",
+        # Keyframe every second so renders can seek anywhere cheaply
+        "-g", str(PROXY_FPS), "-keyint_min", str(PROXY_FPS), "-sc_threshold", "0",
+        "-movflags", "+faststart", output_path
+    ])
+    return output_path
+
+
+def ingest_backgrounds(source_dir: Path = DEFAULT_VIDEOS_DIR, force: bool = False) -> Dict[str, Dict]:
+    """
+    Build proxies for new or changed videos in source_dir and update the index.
+
+    Args:
+        source_dir: Directory of default background videos
+        force: Rebuild every proxy
+
+    Returns:
+        The updated index
+    """
+    with _index_lock:
+        index = load_index()
+        sources = sorted(p for p in Path(source_dir).iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS)
+
+        for source in sources:
+            stat = source.stat()
+            entry = index.get(source.name)
+            if (not force and entry and entry["source_mtime"] == stat.st_mtime
+                    and entry["source_size"] == stat.st_size and os.path.exists(entry["proxy_path"])):
+                logger.info(f"[BACKGROUNDS] Up to date: {source.name}")
+                continue
+
+            proxy_path = PROXY_DIR / f"{source.stem}_{PROXY_WIDTH}x{PROXY_HEIGHT}.mp4"
+            PROXY_DIR.mkdir(parents=True, exist_ok=True)
+            logger.info(f"[BACKGROUNDS] Transcoding proxy for {source.name}")
+            try:
+                make_proxy(str(source), str(proxy_path))
+                metadata = get_video_index().get(str(proxy_path), keyframes=True)
+                index[source.name] = {
+                    "source_path": str(source),
+                    "source_mtime": stat.st_mtime,
+                    "source_size": stat.st_size,
+                    "proxy_path": str(proxy_path),
+                    "width": PROXY_WIDTH,
+                    "height": PROXY_HEIGHT,
+                    "fps": PROXY_FPS,
+                    "duration": metadata["duration"],
+                    "keyframes": metadata["keyframes"]
+                }
+                save_index(index)
+                logger.info(f"[BACKGROUNDS] ✓ {source.name}: {index[source.name]['duration']:.2f}s")
+            except Exception as e:
+                logger.error(f"[BACKGROUNDS] ✗ Failed to ingest {source.name}: {e}")
+
+        # Forget sources that were removed
+        for name in [name for name in index if not (Path(source_dir) / name).exists()]:
+            logger.info(f"[BACKGROUNDS] Removing stale entry: {name}")
+            Path(index.pop(name)["proxy_path"]).unlink(missing_ok=True)
+        save_index(index)
+        return index
+
+
+def list_backgrounds() -> List[Dict]:
+    """Index entries whose proxy file exists."""
+    return [entry for entry in load_index().values() if os.path.exists(entry["proxy_path"])]
+
+
+def pick_background() -> Optional[Dict]:
+    """Random ingested background proxy, or None if the library is empty."""
+    backgrounds = list_backgrounds()
+    return random.choice(backgrounds) if backgrounds else None
+
+
+def pick_start_time(background: Dict, needed_duration: float) -> float:
+    """Random keyframe to start from that leaves needed_duration of video (0 if none does)."""
+    latest_start = background["duration"] - needed_duration
+    starts = [t for t in background.get("keyframes", []) if t <= latest_start]
+    return random.choice(starts) if starts else 0.0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Manage the background video proxy library")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="Transcode default videos into 9:16 proxies")
+    ingest_parser.add_argument("--source", default=str(DEFAULT_VIDEOS_DIR), help="Directory of default videos")
+    ingest_parser.add_argument("--force", action="store_true", help="Rebuild all proxies")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        result = ingest_backgrounds(Path(args.source), force=args.force)
+        print(f"{len(result)} backgrounds in {index_path()}")
@@ -0,0 +1,98 @@
+"""
+Dialogue Timeline
+Where each dialogue line sits in the assembled audio track.
+Built once by the audio assembly step and shared by image, avatar and caption placement.
+"""
+from typing import List, Dict, Optional
+
+SPEAKER_CHANGE_GAP = 1.0  # Seconds of silence inserted when the speaker changes
+
+
+class DialogueTimeline:
+    """
+    Ordered dialogue segments with their start/end (seconds) in the dialogue track.
+
+    Each segment is a dict: {"index", "speaker", "text", "start", "end"}, where
+    'index' is the line's position in the parsed dialogue. Segments synthesized
+    with alignment also carry 'words': [{"word", "start", "end"}] relative to the segment.
+    """
+
+    def __init__(self, segments: List[Dict], audio_path: str = None, sample_rate: int = None):
+        self.segments = segments
+        self.audio_path = audio_path
+        self.sample_rate = sample_rate
+        self._by_index = {segment["index"]: segment for segment in segments}
+
+    @property
+    def duration(self) -> float:
+        return self.segments[-1]["end"] if self.segments else 0.0
+
+    def segment(self, index: int) -> Optional[Dict]:
+        """Get the segment of a dialogue line (None if it has no audio)."""
+        return self._by_index.get(index)
+
+    def next_segment(self, index: int, indices) -> Optional[Dict]:
+        """First segment after dialogue line `index` whose index is in `indices`."""
+        for segment in self.segments:
+            if segment["index"] > index and segment["index"] in indices:
+                return segment
+        return None
+
+    @property
+    def has_word_timings(self) -> bool:
+        """True if every segment carries word timings."""
+        return bool(self.segments) and all("words" in segment for segment in self.segments)
+
+    def words(self) -> List[Dict]:
+        """All word timings, offset to their position in the dialogue track."""
+        words = []
+        for segment in self.segments:
+            for word in segment.get("words", []):
+                words.append({
+                    "word": word["word"],
+                    "start": segment["start"] + word["start"],
+                    "end": segment["start"] + word["end"]
+                })
+        return words
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form (for preview storage and job payloads)."""
+        return {
+            "segments": self.segments,
+            "audio_path": self.audio_path,
+            "sample_rate": self.sample_rate
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DialogueTimeline":
+        return cls(data["segments"], data.get("audio_path"), data.get("sample_rate"))
+
+    @classmethod
+    def from_durations(cls, audio_segments: List[Dict], durations: List[float], audio_path: str = None) -> "DialogueTimeline":
+        """
+        Lay out segments back to back, applying the speaker-change gap rule.
+
+        Args:
+            audio_segments: Segment dicts with 'speaker', 'index' and 'text'
+            durations: Audio duration of each segment (seconds)
+            audio_path: Assembled dialogue track, if any
+        """
+        segments = []
+        cursor = 0.0
+        previous_speaker = None
+        for segment, duration in zip(audio_segments, durations):
+            if previous_speaker is not None and segment["speaker"] != previous_speaker:
+                cursor += SPEAKER_CHANGE_GAP
+            entry = {
+                "index": segment["index"],
+                "speaker": segment["speaker"],
+                "text": segment.get("text", ""),
+                "start": cursor,
+                "end": cursor + duration
+            }
+            if "words" in segment:
+                entry["words"] = segment["words"]
+            segments.append(entry)
+            cursor += duration
+            previous_speaker = segment["speaker"]
+        return cls(segments, audio_path)
@@ -1,17 +1,19 @@
 """
-OPTIONAL: ElevenLabs Timestamp-based Caption Generation
+ElevenLabs Timestamp-based Caption Generation
 
-This is a reference implementation showing how to use ElevenLabs' 
-convert_with_timestamps API for caption synchronization.
-
-⚠️ NOT CURRENTLY USED - Whisper STT is simpler and more accurate!
-
-This file is provided as a reference for future implementation if needed.
+Uses ElevenLabs' convert_with_timestamps API to get word timings for the
+audio we synthesize, so script-mode captions don't need a Whisper STT pass.
+generate_audio_with_timestamps and character_to_word_timestamps are used by
+elevenlabs_utils; the dialogue/SRT helpers are kept as a standalone example.
 """
 
+import os
 import logging
 from typing import List, Dict, Tuple
-from elevenlabs import ElevenLabs
+
+import mediachain_path  # noqa: F401 (makes 'core' importable)
+
+from core.utils.provider_clients import get_provider_clients
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +21,8 @@ logger = logging.getLogger(__name__)
 def generate_audio_with_timestamps(
     api_key: str, 
     text: str, 
-    voice_id: str
+    voice_id: str,
+    model_id: str = None
 ) -> Dict:
     """
     Generate audio with character-level timestamps from ElevenLabs.
@@ -28,16 +31,19 @@ def generate_audio_with_timestamps(
         api_key: ElevenLabs API key
         text: Text to convert to speech
         voice_id: Voice ID to use
+        model_id: Optional model ID (ElevenLabs default if not provided)
         
     Returns:
         Dictionary with audio data and alignment info
     """
     try:
-        client = ElevenLabs(api_key=api_key)
+        client = get_provider_clients().elevenlabs(api_key)
         
+        kwargs = {"model_id": model_id} if model_id else {}
         response = client.text_to_speech.convert_with_timestamps(
             voice_id=voice_id,
-            text=text
+            text=text,
+            **kwargs
         )
         
         return {
@@ -4,11 +4,38 @@ Functions for interacting with ElevenLabs API
 """
 import os
 import logging
-from elevenlabs import ElevenLabs
+import threading
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 
+import mediachain_path  # noqa: F401 (makes 'core' importable)
+
+from core.audio.text_to_speech.utils.tts_cache import get_tts_cache
+from core.utils.provider_clients import get_provider_clients
+from dialogue_timeline import DialogueTimeline
+from elevenlabs_timestamps_util import generate_audio_with_timestamps, character_to_word_timestamps
+
 logger = logging.getLogger(__name__)
 
+ELEVENLABS_MODEL = "eleven_monolingual_v1"
+AUDIO_SAMPLE_RATE = 44100  # Sample rate of decoded PCM buffers and of the dialogue track
+
+# Max in-flight TTS requests per API key (ElevenLabs limits concurrency per account tier)
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "4"))
+
+_key_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_key_semaphores_lock = threading.Lock()
+
+
+def _get_key_semaphore(api_key: str) -> threading.BoundedSemaphore:
+    """Get the process-wide semaphore that bounds concurrent requests for an API key."""
+    with _key_semaphores_lock:
+        if api_key not in _key_semaphores:
+            _key_semaphores[api_key] = threading.BoundedSemaphore(ELEVENLABS_MAX_CONCURRENCY)
+        return _key_semaphores[api_key]
+
 
 def get_available_voices(api_key: str) -> List[Dict]:
     """
@@ -21,7 +48,7 @@ def get_available_voices(api_key: str) -> List[Dict]:
         List of voice dictionaries with 'voice_id' and 'name'
     """
     try:
-        client = ElevenLabs(api_key=api_key)
+        client = get_provider_clients().elevenlabs(api_key)
         voices_response = client.voices.get_all()
         
         voices = []
@@ -41,15 +68,17 @@ def get_available_voices(api_key: str) -> List[Dict]:
         return []
 
 
-def generate_audio_elevenlabs(api_key: str, text: str, voice_id: str, output_path: str = None) -> str:
+def generate_audio_elevenlabs(api_key: str, text: str, voice_id: str, output_path: str = None, use_cache: bool = True) -> str:
     """
     Generate audio using ElevenLabs TTS.
+    Identical (text, voice, model) requests are served from the disk TTS cache.
     
     Args:
         api_key: ElevenLabs API key
         text: Text to convert to speech
         voice_id: Voice ID to use
         output_path: Optional output path (auto-generated if not provided)
+        use_cache: Look up / store the audio in the TTS cache
         
     Returns:
         Path to generated audio file
@@ -58,7 +87,18 @@ def generate_audio_elevenlabs(api_key: str, text: str, voice_id: str, output_pat
         import uuid
         from pathlib import Path
         
-        client = ElevenLabs(api_key=api_key)
+        if not output_path:
+            temp_dir = Path("/tmp/elevenlabs_audio")
+            temp_dir.mkdir(exist_ok=True)
+            output_path = str(temp_dir / f"audio_{uuid.uuid4()}.mp3")
+        
+        cache = get_tts_cache()
+        cache_key = cache.make_key("elevenlabs", text, voice_id, ELEVENLABS_MODEL)
+        if use_cache and cache.get(cache_key, output_path):
+            logger.info(f"[ELEVENLABS] ♻️  Cached audio for voice {voice_id}: {output_path}")
+            return output_path
+        
+        client = get_provider_clients().elevenlabs(api_key)
         
         # Generate audio
         logger.info(f"[ELEVENLABS] Generating audio with voice {voice_id}")
@@ -67,20 +107,17 @@ def generate_audio_elevenlabs(api_key: str, text: str, voice_id: str, output_pat
         audio_generator = client.generate(
             text=text,
             voice=voice_id,
-            model="eleven_monolingual_v1"
+            model=ELEVENLABS_MODEL
         )
         
-        # Save audio
-        if not output_path:
-            temp_dir = Path("/tmp/elevenlabs_audio")
-            temp_dir.mkdir(exist_ok=True)
-            output_path = str(temp_dir / f"audio_{uuid.uuid4()}.mp3")
-        
         # Write audio to file
         with open(output_path, 'wb') as f:
             for chunk in audio_generator:
                 f.write(chunk)
         
+        if use_cache:
+            cache.put(cache_key, output_path)
+        
         logger.info(f"[ELEVENLABS] ✓ Audio generated: {output_path}")
         return output_path
         
@@ -89,98 +126,160 @@ def generate_audio_elevenlabs(api_key: str, text: str, voice_id: str, output_pat
         return None
 
 
-def normalize_audio_volumes(audio_segments: List[Dict]) -> List[Dict]:
+def generate_audio_elevenlabs_with_words(api_key: str, text: str, voice_id: str, output_path: str = None, use_cache: bool = True) -> Dict:
     """
-    Normalize all audio segments to have the same volume as the loudest segment.
+    Generate audio using ElevenLabs TTS together with word timings from its character alignment.
+    Word timings are cached next to the audio, so cached segments keep their captions.
     
     Args:
-        audio_segments: List of dicts with 'audio_path' keys
+        api_key: ElevenLabs API key
+        text: Text to convert to speech
+        voice_id: Voice ID to use
+        output_path: Optional output path (auto-generated if not provided)
+        use_cache: Look up / store the audio in the TTS cache
         
     Returns:
-        Updated audio_segments with normalized audio paths
+        {"audio_path": str, "words": [{"word", "start", "end"}, ...]} with times
+        relative to the start of the audio, or None on failure
     """
     try:
-        from moviepy.editor import AudioFileClip
-        import numpy as np
         import uuid
+        import base64
         from pathlib import Path
         
+        if not output_path:
+            temp_dir = Path("/tmp/elevenlabs_audio")
+            temp_dir.mkdir(exist_ok=True)
+            output_path = str(temp_dir / f"audio_{uuid.uuid4()}.mp3")
+        
+        cache = get_tts_cache()
+        cache_key = cache.make_key("elevenlabs", text, voice_id, ELEVENLABS_MODEL)
+        if use_cache:
+            # Entries written by generate_audio_elevenlabs have no word timings; regenerate those
+            metadata = cache.get_metadata(cache_key)
+            if metadata and "words" in metadata and cache.get(cache_key, output_path):
+                logger.info(f"[ELEVENLABS] ♻️  Cached audio and word timings for voice {voice_id}: {output_path}")
+                return {"audio_path": output_path, "words": metadata["words"]}
+        
+        logger.info(f"[ELEVENLABS] Generating audio with timestamps, voice {voice_id}")
+        logger.info(f"[ELEVENLABS] Text length: {len(text)} characters")
+        
+        result = generate_audio_with_timestamps(api_key, text, voice_id, model_id=ELEVENLABS_MODEL)
+        if not result or not result.get("audio_base64") or not result.get("alignment"):
+            logger.error(f"[ELEVENLABS] ✗ No audio/alignment returned for voice {voice_id}")
+            return None
+        
+        with open(output_path, 'wb') as f:
+            f.write(base64.b64decode(result["audio_base64"]))
+        
+        alignment = result["alignment"]
+        words = character_to_word_timestamps(
+            alignment["characters"],
+            alignment["character_start_times_seconds"],
+            alignment["character_end_times_seconds"],
+            text
+        )
+        
+        if use_cache:
+            cache.put(cache_key, output_path, metadata={"words": words})
+        
+        logger.info(f"[ELEVENLABS] ✓ Audio generated with {len(words)} word timings: {output_path}")
+        return {"audio_path": output_path, "words": words}
+        
+    except Exception as e:
+        logger.error(f"[ELEVENLABS] ✗ Error generating audio with timestamps: {e}", exc_info=True)
+        return None
+
+
+def decode_audio_pcm(audio_path: str, sample_rate: int = AUDIO_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file into a stereo float32 PCM buffer with a single ffmpeg pass.
+    
+    Args:
+        audio_path: Path to the audio file
+        sample_rate: Output sample rate
+        
+    Returns:
+        Writable array of shape (n_samples, 2) with values in [-1, 1]
+    """
+    from moviepy.config import get_setting
+    
+    result = subprocess.run(
+        [get_setting("FFMPEG_BINARY"), "-v", "error", "-i", audio_path,
+         "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "2", "-ar", str(sample_rate), "-"],
+        capture_output=True,
+        check=True
+    )
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, 2).copy()
+
+
+def normalize_audio_volumes(audio_segments: List[Dict], sample_rate: int = AUDIO_SAMPLE_RATE) -> List[np.ndarray]:
+    """
+    Normalize all audio segments to have the same volume as the loudest segment.
+    Each segment is decoded once and the gain is applied in place on its PCM buffer,
+    so no intermediate (re-encoded) audio files are written.
+    
+    Args:
+        audio_segments: List of dicts with 'audio_path' keys
+        sample_rate: Sample rate of the decoded buffers
+        
+    Returns:
+        Normalized PCM buffers aligned with audio_segments (None if decoding failed).
+        Each segment dict gets its 'volume_multiplier'.
+    """
+    try:
         logger.info(f"[NORMALIZE] Analyzing volumes of {len(audio_segments)} segments")
         
-        # Step 1: Find the maximum volume across all segments
-        max_volume = 0.0
+        # Step 1: Decode every segment once and find the maximum volume
+        buffers = []
         segment_volumes = []
         
         for segment in audio_segments:
-            audio_path = segment["audio_path"]
-            clip = AudioFileClip(audio_path)
-            
-            # Get the audio array and calculate max amplitude
-            audio_array = clip.to_soundarray()
-            volume = np.abs(audio_array).max()
+            pcm = decode_audio_pcm(segment["audio_path"], sample_rate)
+            volume = float(np.abs(pcm).max()) if len(pcm) else 0.0
+            buffers.append(pcm)
             segment_volumes.append(volume)
             
-            if volume > max_volume:
-                max_volume = volume
-            
-            clip.close()
-            
             logger.info(f"[NORMALIZE] Segment {segment['index']}: volume={volume:.4f}")
         
+        max_volume = max(segment_volumes, default=0.0)
         logger.info(f"[NORMALIZE] Maximum volume found: {max_volume:.4f}")
         
-        # Step 2: Normalize each segment to match the max volume
-        temp_dir = Path("/tmp/elevenlabs_audio")
-        normalized_segments = []
-        
+        # Step 2: Scale each quieter segment up to the max volume
         for idx, segment in enumerate(audio_segments):
-            audio_path = segment["audio_path"]
             current_volume = segment_volumes[idx]
             
-            # Calculate volume multiplier
             if current_volume > 0 and current_volume < max_volume:
                 volume_multiplier = max_volume / current_volume
                 logger.info(f"[NORMALIZE] Segment {idx}: boosting by {volume_multiplier:.2f}x")
-                
-                # Load audio and adjust volume
-                clip = AudioFileClip(audio_path)
-                normalized_clip = clip.volumex(volume_multiplier)
-                
-                # Save normalized audio
-                normalized_path = str(temp_dir / f"normalized_{idx}_{uuid.uuid4()}.mp3")
-                normalized_clip.write_audiofile(normalized_path, codec='mp3', logger=None)
-                
-                clip.close()
-                normalized_clip.close()
-                
-                # Update segment with normalized path
-                segment["audio_path"] = normalized_path
-                segment["original_path"] = audio_path
+                buffers[idx] *= volume_multiplier
                 segment["volume_multiplier"] = volume_multiplier
             else:
                 logger.info(f"[NORMALIZE] Segment {idx}: already at max volume, skipping")
                 segment["volume_multiplier"] = 1.0
-            
-            normalized_segments.append(segment)
         
         logger.info(f"[NORMALIZE] ✓ All segments normalized to consistent volume")
-        return normalized_segments
+        return buffers
         
     except Exception as e:
         logger.error(f"[NORMALIZE] ✗ Error normalizing volumes: {e}", exc_info=True)
-        # Return original segments if normalization fails
-        return audio_segments
+        # Concatenation falls back to the original files
+        return None
 
 
-def generate_dialogue_audio(api_key: str, dialogue: List[Dict], voice_mapping: Dict[str, str]) -> Dict:
+def generate_dialogue_audio(api_key: str, dialogue: List[Dict], voice_mapping: Dict[str, str], concurrent: bool = True, word_timings: bool = True) -> Dict:
     """
     Generate audio for each dialogue segment.
-    Audio volumes are automatically normalized to be consistent.
+    Audio volumes are automatically normalized to be consistent; the normalized
+    PCM buffers are returned under 'pcm' so concatenation doesn't decode again.
     
     Args:
         api_key: ElevenLabs API key
         dialogue: List of {"speaker": "Name", "text": "..."}
         voice_mapping: {"Speaker1": "voice_id_1", "Speaker2": "voice_id_2"}
+        concurrent: Synthesize segments in parallel (bounded by ELEVENLABS_MAX_CONCURRENCY per API key)
+        word_timings: Request character alignment and store each segment's 'words'
+            (segment-relative word timings, used for captions instead of Whisper)
         
     Returns:
         Dictionary with audio paths and metadata
@@ -192,39 +291,71 @@ def generate_dialogue_audio(api_key: str, dialogue: List[Dict], voice_mapping: D
         temp_dir = Path("/tmp/elevenlabs_audio")
         temp_dir.mkdir(exist_ok=True)
         
-        audio_segments = []
-        
+        # Build the synthesis requests, keeping each segment's dialogue index
+        tasks = []
         for idx, segment in enumerate(dialogue):
             speaker = segment["speaker"]
-            text = segment["text"]
             voice_id = voice_mapping.get(speaker)
             
             if not voice_id:
                 logger.error(f"[ELEVENLABS] No voice mapped for speaker: {speaker}")
                 continue
             
-            logger.info(f"[ELEVENLABS] Generating segment {idx+1}/{len(dialogue)} - {speaker}")
-            
-            output_path = str(temp_dir / f"segment_{idx}_{uuid.uuid4()}.mp3")
-            audio_path = generate_audio_elevenlabs(api_key, text, voice_id, output_path)
-            
-            if audio_path:
-                audio_segments.append({
-                    "speaker": speaker,
-                    "text": text,
-                    "audio_path": audio_path,
-                    "index": idx
-                })
+            tasks.append({
+                "index": idx,
+                "speaker": speaker,
+                "text": segment["text"],
+                "voice_id": voice_id,
+                "output_path": str(temp_dir / f"segment_{idx}_{uuid.uuid4()}.mp3")
+            })
+        
+        semaphore = _get_key_semaphore(api_key)
+        
+        def synthesize(task: Dict) -> Dict:
+            logger.info(f"[ELEVENLABS] Generating segment {task['index']+1}/{len(dialogue)} - {task['speaker']}")
+            with semaphore:
+                if word_timings:
+                    result = generate_audio_elevenlabs_with_words(api_key, task["text"], task["voice_id"], task["output_path"])
+                    if result:
+                        return result
+                    logger.warning(f"[ELEVENLABS] Segment {task['index']}: no alignment, generating without word timings")
+                audio_path = generate_audio_elevenlabs(api_key, task["text"], task["voice_id"], task["output_path"])
+                return {"audio_path": audio_path} if audio_path else None
+        
+        if concurrent and len(tasks) > 1:
+            logger.info(f"[ELEVENLABS] Synthesizing {len(tasks)} segments concurrently (max {ELEVENLABS_MAX_CONCURRENCY} per key)")
+            with ThreadPoolExecutor(max_workers=min(ELEVENLABS_MAX_CONCURRENCY, len(tasks))) as executor:
+                # map() yields results in submission order, so segment order is preserved
+                results = list(executor.map(synthesize, tasks))
+        else:
+            results = [synthesize(task) for task in tasks]
+        
+        audio_segments = []
+        for task, result in zip(tasks, results):
+            if result:
+                audio_segment = {
+                    "speaker": task["speaker"],
+                    "text": task["text"],
+                    "audio_path": result["audio_path"],
+                    "index": task["index"]
+                }
+                if "words" in result:
+                    audio_segment["words"] = result["words"]
+                audio_segments.append(audio_segment)
         
         logger.info(f"[ELEVENLABS] ✓ Generated {len(audio_segments)} audio segments")
+        logger.info(f"[ELEVENLABS] TTS cache: {get_tts_cache().stats()}")
         
         # Normalize audio volumes to match the loudest segment
+        pcm_buffers = None
         if len(audio_segments) > 0:
-            audio_segments = normalize_audio_volumes(audio_segments)
+            pcm_buffers = normalize_audio_volumes(audio_segments)
         
         return {
             "segments": audio_segments,
-            "count": len(audio_segments)
+            "count": len(audio_segments),
+            "pcm": pcm_buffers,  # Normalized buffers for concatenate_audio_segments
+            "sample_rate": AUDIO_SAMPLE_RATE
         }
         
     except Exception as e:
@@ -232,62 +363,101 @@ def generate_dialogue_audio(api_key: str, dialogue: List[Dict], voice_mapping: D
         return {"segments": [], "count": 0}
 
 
-def concatenate_audio_segments(audio_segments: List[dict], output_path: str) -> str:
+def encode_audio_pcm(pcm: np.ndarray, output_path: str, sample_rate: int = AUDIO_SAMPLE_RATE) -> str:
     """
-    Concatenate multiple audio files into one using MoviePy.
-    Adds 1-second gap when speaker changes.
+    Encode a stereo float32 PCM buffer to an audio file (codec picked from the extension) in one ffmpeg pass.
     
     Args:
-        audio_segments: List of segment dicts with 'audio_path' and 'speaker' keys
-        output_path: Output path for concatenated audio
+        pcm: Array of shape (n_samples, 2)
+        output_path: Output audio path
+        sample_rate: Sample rate of the buffer
         
     Returns:
-        Path to concatenated audio file
+        Path to the written file
+    """
+    from moviepy.config import get_setting
+    
+    subprocess.run(
+        [get_setting("FFMPEG_BINARY"), "-v", "error", "-y",
+         "-f", "f32le", "-ac", "2", "-ar", str(sample_rate), "-i", "-",
+         output_path],
+        input=np.ascontiguousarray(pcm, dtype=np.float32).tobytes(),
+        check=True
+    )
+    return output_path
+
+
+def assemble_dialogue_audio(audio_segments: List[dict], output_path: str, pcm_buffers: List[np.ndarray] = None, sample_rate: int = AUDIO_SAMPLE_RATE) -> DialogueTimeline:
+    """
+    Assemble the dialogue track into one preallocated buffer and write it once.
+    Silence is inserted between speakers following the DialogueTimeline gap rule.
+    
+    Args:
+        audio_segments: List of segment dicts with 'audio_path', 'speaker' and 'index' keys
+        output_path: Output path for the assembled audio
+        pcm_buffers: Already decoded (normalized) buffers aligned with audio_segments
+        sample_rate: Sample rate of the buffers and of the output
+        
+    Returns:
+        DialogueTimeline of the written track (segments also carry sample-accurate
+        'start_sample'/'end_sample'), or None on failure
     """
     try:
-        from moviepy.editor import AudioFileClip, concatenate_audioclips, AudioClip
-        import numpy as np
+        if pcm_buffers is None:
+            pcm_buffers = [decode_audio_pcm(segment["audio_path"], sample_rate) for segment in audio_segments]
         
-        logger.info(f"[ELEVENLABS] Concatenating {len(audio_segments)} audio segments with speaker transitions")
+        timeline = DialogueTimeline.from_durations(
+            audio_segments,
+            [len(pcm) / sample_rate for pcm in pcm_buffers],
+            audio_path=output_path
+        )
+        timeline.sample_rate = sample_rate
         
-        # Load all audio clips and add gaps between speaker changes
-        audio_clips = []
-        previous_speaker = None
+        # Convert the timeline back to whole-sample offsets (rounding absorbs float error)
+        for segment, pcm in zip(timeline.segments, pcm_buffers):
+            segment["start_sample"] = int(round(segment["start"] * sample_rate))
+            segment["end_sample"] = segment["start_sample"] + len(pcm)
         
-        for i, segment in enumerate(audio_segments):
-            path = segment["audio_path"]
-            speaker = segment["speaker"]
-            
-            # Add 1-second silence when speaker changes (but not at the very start)
-            if previous_speaker is not None and speaker != previous_speaker:
-                logger.info(f"[ELEVENLABS] Adding 1s gap: {previous_speaker} → {speaker}")
-                
-                # Create 1-second silent audio clip
-                def make_frame(t):
-                    return np.array([0, 0])  # Stereo silence
-                
-                silence = AudioClip(make_frame, duration=1.0, fps=44100)
-                audio_clips.append(silence)
-            
-            # Load the actual audio segment
-            logger.info(f"[ELEVENLABS] Loading segment {i+1}/{len(audio_segments)}: {speaker}")
-            clip = AudioFileClip(path)
-            audio_clips.append(clip)
-            
-            previous_speaker = speaker
+        # Gaps are simply the zeros left between the copied segments
+        total_samples = timeline.segments[-1]["end_sample"] if timeline.segments else 0
+        track = np.zeros((total_samples, 2), dtype=np.float32)
+        for segment, pcm in zip(timeline.segments, pcm_buffers):
+            track[segment["start_sample"]:segment["end_sample"]] = pcm
+        
+        logger.info(f"[ELEVENLABS] Writing assembled audio ({total_samples / sample_rate:.2f}s) to: {output_path}")
+        encode_audio_pcm(track, output_path, sample_rate)
         
-        # Concatenate all clips (audio + silence gaps)
-        logger.info(f"[ELEVENLABS] Combining {len(audio_clips)} audio clips (including gaps)")
-        combined = concatenate_audioclips(audio_clips)
+        return timeline
+        
+    except Exception as e:
+        logger.error(f"[ELEVENLABS] ✗ Error assembling dialogue audio: {e}", exc_info=True)
+        return None
+
+
+def concatenate_audio_segments(audio_segments: List[dict], output_path: str, pcm_buffers: List[np.ndarray] = None) -> str:
+    """
+    Concatenate multiple audio segments into one file.
+    Adds 1-second gap when speaker changes, and stores each segment's
+    'start'/'end' (seconds in the concatenated track) on its dict.
+    
+    Args:
+        audio_segments: List of segment dicts with 'audio_path' and 'speaker' keys
+        output_path: Output path for concatenated audio
+        pcm_buffers: Already decoded (normalized) buffers aligned with audio_segments
+        
+    Returns:
+        Path to concatenated audio file
+    """
+    try:
+        logger.info(f"[ELEVENLABS] Concatenating {len(audio_segments)} audio segments with speaker transitions")
         
-        # Write to output file
-        logger.info(f"[ELEVENLABS] Writing concatenated audio to: {output_path}")
-        combined.write_audiofile(output_path, codec='mp3', logger=None)
+        timeline = assemble_dialogue_audio(audio_segments, output_path, pcm_buffers)
+        if not timeline:
+            return None
         
-        # Clean up
-        for clip in audio_clips:
-            clip.close()
-        combined.close()
+        for segment, timing in zip(audio_segments, timeline.segments):
+            segment["start"] = timing["start"]
+            segment["end"] = timing["end"]
         
         logger.info(f"[ELEVENLABS] ✓ Audio concatenated: {output_path}")
         return output_path
@@ -0,0 +1,187 @@
+"""
+FFmpeg Script Renderer
+Renders a script-mode render spec (see script_renderer.render_script_video) with a
+single ffmpeg filtergraph instead of MoviePy.
+
+The background, dialogue images, speaker avatars and the caption track are all inputs
+of one ffmpeg process, composited with crop/scale/overlay filters whose visibility is
+set with enable='between(t,start,end)'. Captions are joined into a single timed image
+sequence (concat input with per-image durations) and overlaid once. Frames never pass through Python, so this is
+much faster than MoviePy's frame-by-frame compositing. Timings and positions come from
+the same plan functions the MoviePy path uses, so both renderers produce the same video.
+"""
+import os
+import shutil
+import logging
+import tempfile
+from typing import Dict, List
+
+from PIL import Image
+
+from dialogue_timeline import DialogueTimeline
+from script_renderer import plan_dialogue_images, plan_speaker_avatars, plan_frame, scaled_caption_style, IMAGE_TOP
+from mediachain.examples.moviepy_engine.src.ffmpeg_tools import run_ffmpeg
+from mediachain.examples.moviepy_engine.src.render_profiles import encoder_params
+
+logger = logging.getLogger(__name__)
+
+CAPTION_POSITION = 0.4  # Captions: top at 40% of the height, same as VideoCaptioner
+
+
+def _between(start: float, end: float) -> str:
+    return f"enable='between(t,{start:.3f},{end:.3f})'"
+
+
+def write_caption_track(caption_images: List, work_dir: str) -> str:
+    """
+    Write caption images as one timed image sequence for ffmpeg's concat demuxer.
+
+    Every caption is pasted on a transparent canvas of the same size (horizontally
+    centered, top aligned) and gaps between captions are a blank canvas, so the whole
+    track is a single input overlaid once.
+
+    Args:
+        caption_images: [(start, end, rgba)], in time order
+        work_dir: Directory for the PNGs and the concat list
+
+    Returns:
+        Path of the concat list
+    """
+    canvas_size = (max(rgba.shape[1] for _, _, rgba in caption_images),
+                   max(rgba.shape[0] for _, _, rgba in caption_images))
+    blank_path = os.path.join(work_dir, "caption_blank.png")
+    Image.new("RGBA", canvas_size).save(blank_path)
+
+    entries = []
+    cursor = 0.0
+    for i, (start, end, rgba) in enumerate(caption_images):
+        start = max(start, cursor)
+        if end <= start:
+            continue
+        if start > cursor:
+            entries.append((blank_path, start - cursor))
+        canvas = Image.new("RGBA", canvas_size)
+        caption = Image.fromarray(rgba).convert("RGBA")
+        canvas.paste(caption, ((canvas_size[0] - caption.width) // 2, 0))
+        caption_path = os.path.join(work_dir, f"caption_{i:04d}.png")
+        canvas.save(caption_path)
+        entries.append((caption_path, end - start))
+        cursor = end
+    # Blank after the last caption; listed twice because the concat demuxer drops the last duration
+    entries.append((blank_path, 1.0))
+
+    # Millisecond timestamps (the image demuxer's default 25 fps would round caption times to 40ms)
+    list_path = os.path.join(work_dir, "captions.txt")
+    with open(list_path, "w") as f:
+        for path, duration in entries:
+            f.write(f"file '{path}'\noption framerate 1000\nduration {duration:.3f}\n")
+        f.write(f"file '{blank_path}'\noption framerate 1000\n")
+    return list_path
+
+
+def build_filtergraph(spec: Dict, caption_images: List, work_dir: str) -> tuple:
+    """
+    Compile a render spec into ffmpeg input arguments and a filter_complex graph.
+
+    Args:
+        spec: Script-mode render spec
+        caption_images: [(start, end, rgba)] from VideoCaptioner.generate_caption_images
+        work_dir: Directory for the caption track
+
+    Returns:
+        (input_args, filtergraph, video_label, audio_input_index)
+    """
+    frame = plan_frame(spec)
+    width, height = frame["size"]
+    scale = frame["scale"]
+    fps = spec["profile"]["fps"]
+    timeline = DialogueTimeline.from_dict(spec["timeline"])
+
+    # Input 0: background (seeked, and looped if it is too short); input 1: audio
+    background_args = []
+    if spec["loop_to"]:
+        background_args += ["-stream_loop", "-1"]
+    if spec["background_start"]:
+        background_args += ["-ss", f"{spec['background_start']:.3f}"]
+    input_args = background_args + ["-i", spec["video_path"], "-i", spec["audio_path"]]
+    next_input = 2
+
+    filters = []
+    crop = ""
+    if spec["crop"]:
+        crop_width, crop_height = frame["crop_size"]
+        crop = f",crop={crop_width}:{crop_height}:(iw-{crop_width})/2:(ih-{crop_height})/2"
+    # Scaled to the output size straight away, so every overlay is composited at that size
+    filters.append(f"[0:v]setpts=PTS-STARTPTS,fps={fps}{crop},scale={width}:{height},setsar=1[base]")
+    label = "base"
+
+    def overlay(image_filter, x, y, start, end):
+        nonlocal label, next_input
+        source = f"[{next_input}:v]"
+        if image_filter:
+            filters.append(f"{source}{image_filter}[img{next_input}]")
+            source = f"[img{next_input}]"
+        output = f"v{next_input}"
+        filters.append(f"[{label}]{source}overlay=x={x}:y={y}:{_between(start, end)}[{output}]")
+        label = output
+        next_input += 1
+
+    # Dialogue images: top, a third of the height
+    for window in plan_dialogue_images(spec["dialogue_images_map"], timeline):
+        input_args += ["-i", window["path"]]
+        overlay(f"scale=-1:{int(height / 3)}", "(main_w-overlay_w)/2", round(IMAGE_TOP * scale),
+                window["start"], window["start"] + window["duration"])
+
+    # Speaker avatars: bottom corners (or bottom center for one speaker)
+    for placement in plan_speaker_avatars(spec["speaker_avatars"], timeline, spec["speakers"], width, height, scale):
+        x, y = placement["position"]
+        input_args += ["-i", placement["path"]]
+        overlay(f"scale=-1:{placement['size']}", "(main_w-overlay_w)/2" if x == 'center' else int(x), int(y),
+                placement["start"], placement["start"] + placement["duration"])
+
+    # Captions: one track of pre-rendered RGBA images, centered at 40% of the height
+    if caption_images:
+        input_args += ["-f", "concat", "-safe", "0", "-i", write_caption_track(caption_images, work_dir)]
+        overlay("format=rgba", "(main_w-overlay_w)/2", int(CAPTION_POSITION * height), 0, spec["duration"])
+
+    return input_args, ";".join(filters), label, 1
+
+
+def render_script_spec_ffmpeg(spec: Dict, output_path: str) -> str:
+    """
+    Render a script-mode render spec with one ffmpeg filtergraph, encoded with the spec's render profile.
+
+    Args:
+        spec: Script-mode render spec (same as build_script_composite)
+        output_path: Final .mp4 path
+
+    Returns:
+        output_path (raises on failure, so callers can fall back to MoviePy)
+    """
+    from mediachain.examples.moviepy_engine.src.captions.video_captioner import VideoCaptioner
+
+    profile = spec["profile"]
+    work_dir = tempfile.mkdtemp(prefix="ffmpeg_render_")
+    try:
+        caption_images = []
+        if spec["subtitles_path"]:
+            # Rasterized at the output size (smaller font for drafts)
+            caption_style = scaled_caption_style(spec["caption_style"], plan_frame(spec)["scale"])
+            caption_images = VideoCaptioner().generate_caption_images(spec["subtitles_path"], **caption_style)
+
+        input_args, filtergraph, video_label, audio_input = build_filtergraph(spec, caption_images, work_dir)
+        logger.info(f"[FFMPEG_RENDER] Compositing {input_args.count('-i')} inputs in one filtergraph")
+
+        run_ffmpeg(["-y"] + input_args + [
+            "-filter_complex", filtergraph,
+            "-map", f"[{video_label}]", "-map", f"{audio_input}:a:0",
+            "-t", f"{spec['duration']:.3f}", "-r", str(profile["fps"]),
+            "-c:v", "libx264", "-preset", profile["preset"], "-threads", str(profile["threads"])
+        ] + encoder_params(profile) + [
+            "-c:a", "aac", "-b:a", profile["audio_bitrate"], "-movflags", "+faststart",
+            output_path
+        ])
+        logger.info(f"[FFMPEG_RENDER] ✓ Rendered {output_path}")
+        return output_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
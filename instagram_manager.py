@@ -1,25 +1,37 @@
 import json
 import os
+import asyncio
 import logging
-import requests
 from pathlib import Path
 from datetime import datetime
 
+import mediachain_path  # noqa: F401 (makes 'core' importable)
+
+from core.utils.provider_clients import get_provider_clients
+from upload_history import UploadHistory
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GRAPH_API_URL = "https://graph.facebook.com/v18.0"
+INSTAGRAM_POLL_INITIAL = float(os.getenv("INSTAGRAM_POLL_INITIAL", "2"))  # Seconds before the first processing check
+INSTAGRAM_POLL_MAX = float(os.getenv("INSTAGRAM_POLL_MAX", "30"))  # Backoff cap between checks
+INSTAGRAM_PROCESSING_TIMEOUT = float(os.getenv("INSTAGRAM_PROCESSING_TIMEOUT", "600"))  # Give up on processing after this long
+
 class InstagramManager:
     def __init__(self, data_dir="data"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.accounts_file = self.data_dir / "instagram_accounts.json"
-        self.history_file = self.data_dir / "upload_history.json"
+        # Append-only; the old upload_history.json is imported on first start
+        self.history = UploadHistory(self.data_dir / "upload_history.sqlite3",
+                                     legacy_json_path=self.data_dir / "upload_history.json")
         
         self._load_data()
 
     def _load_data(self):
-        """Load accounts and history from JSON files"""
+        """Load accounts from JSON file"""
         if self.accounts_file.exists():
             try:
                 with open(self.accounts_file, 'r') as f:
@@ -30,26 +42,11 @@ class InstagramManager:
         else:
             self.accounts = {}
 
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    self.history = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading history: {e}")
-                self.history = []
-        else:
-            self.history = []
-
     def _save_accounts(self):
         """Save accounts to JSON file"""
         with open(self.accounts_file, 'w') as f:
             json.dump(self.accounts, f, indent=2)
 
-    def _save_history(self):
-        """Save history to JSON file"""
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
-
     def add_account(self, access_token, account_id, username):
         """Add or update an Instagram account"""
         self.accounts[account_id] = {
@@ -76,13 +73,14 @@ class InstagramManager:
             return True
         return False
 
-    def upload_video(self, account_id, video_url, caption=""):
+    async def publish_video(self, account_id, video_url, caption="", on_status=None):
         """
         Upload video to Instagram (Reels) using Graph API
         Args:
             account_id: Instagram Business Account ID
             video_url: Publicly accessible URL of the video (required by Graph API)
             caption: Video caption
+            on_status: Optional callback(status, message) called as the upload progresses
         """
         if account_id not in self.accounts:
             raise ValueError("Account not found")
@@ -93,9 +91,15 @@ class InstagramManager:
         logger.info(f"Starting upload to account {account['username']} ({account_id})")
         logger.info(f"Video URL: {video_url}")
 
+        def report(status, message):
+            logger.info(f"[{account['username']}] {message}")
+            if on_status:
+                on_status(status, message)
+
         try:
             # Step 1: Create Media Container
-            url = f"https://graph.facebook.com/v18.0/{account_id}/media"
+            report("creating", "Creating media container")
+            url = f"{GRAPH_API_URL}/{account_id}/media"
             payload = {
                 "media_type": "REELS",
                 "video_url": video_url,
@@ -103,7 +107,8 @@ class InstagramManager:
                 "access_token": access_token
             }
             
-            response = requests.post(url, json=payload)
+            http = get_provider_clients().async_http()
+            response = await http.post(url, json=payload)
             data = response.json()
             
             if "id" not in data:
@@ -114,42 +119,18 @@ class InstagramManager:
             logger.info(f"Media container created: {creation_id}")
 
             # Step 2: Check Status (Wait for processing)
-            import time
-            status_url = f"https://graph.facebook.com/v18.0/{creation_id}"
-            params = {
-                "fields": "status_code",
-                "access_token": access_token
-            }
-            
-            max_retries = 20
-            for i in range(max_retries):
-                logger.info(f"Checking status (attempt {i+1}/{max_retries})...")
-                status_res = requests.get(status_url, params=params)
-                status_data = status_res.json()
-                
-                status_code = status_data.get("status_code")
-                logger.info(f"Status: {status_code}")
-                
-                if status_code == "FINISHED":
-                    break
-                elif status_code == "ERROR":
-                    raise Exception("Video processing failed on Instagram side")
-                elif status_code == "IN_PROGRESS":
-                    time.sleep(5) # Wait 5 seconds before next check
-                else:
-                    # EXPIRED or unknown
-                    if i == max_retries - 1:
-                        raise Exception("Timeout waiting for video processing")
-                    time.sleep(5)
+            report("processing", "Instagram is processing the video")
+            await self._wait_for_container(http, creation_id, access_token)
 
             # Step 3: Publish Media
-            publish_url = f"https://graph.facebook.com/v18.0/{account_id}/media_publish"
+            report("publishing", "Publishing")
+            publish_url = f"{GRAPH_API_URL}/{account_id}/media_publish"
             publish_payload = {
                 "creation_id": creation_id,
                 "access_token": access_token
             }
             
-            publish_res = requests.post(publish_url, json=publish_payload)
+            publish_res = await http.post(publish_url, json=publish_payload)
             publish_data = publish_res.json()
             
             if "id" not in publish_data:
@@ -161,8 +142,8 @@ class InstagramManager:
             
             # Fetch permalink
             try:
-                media_url = f"https://graph.facebook.com/v18.0/{media_id}"
-                media_res = requests.get(media_url, params={"fields": "permalink", "access_token": access_token})
+                media_url = f"{GRAPH_API_URL}/{media_id}"
+                media_res = await http.get(media_url, params={"fields": "permalink", "access_token": access_token})
                 if "permalink" in media_res.json():
                     permalink = media_res.json()["permalink"]
             except:
@@ -181,8 +162,8 @@ class InstagramManager:
                 "timestamp": datetime.now().isoformat(),
                 "status": "success"
             }
-            self.history.append(record)
-            self._save_history()
+            # SQLite write, kept off the publish queue's event loop
+            await asyncio.to_thread(self.history.append, record)
             
             return record
 
@@ -200,10 +181,42 @@ class InstagramManager:
                 "status": "failed",
                 "error": str(e)
             }
-            self.history.append(record)
-            self._save_history()
+            # SQLite write, kept off the publish queue's event loop
+            await asyncio.to_thread(self.history.append, record)
             raise e
 
-    def get_history(self):
-        """Get upload history"""
-        return sorted(self.history, key=lambda x: x["timestamp"], reverse=True)
+    async def _wait_for_container(self, http, creation_id, access_token):
+        """Poll a media container until Instagram has processed it, backing off exponentially"""
+        status_url = f"{GRAPH_API_URL}/{creation_id}"
+        params = {
+            "fields": "status_code",
+            "access_token": access_token
+        }
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + INSTAGRAM_PROCESSING_TIMEOUT
+        delay = INSTAGRAM_POLL_INITIAL
+        attempt = 0
+
+        while True:
+            attempt += 1
+            status_res = await http.get(status_url, params=params)
+            status_code = status_res.json().get("status_code")
+            logger.info(f"Status: {status_code} (check {attempt})")
+
+            if status_code == "FINISHED":
+                return
+            elif status_code == "ERROR":
+                raise Exception("Video processing failed on Instagram side")
+            elif status_code == "EXPIRED":
+                raise Exception("Media container expired before it was published")
+
+            # IN_PROGRESS or unknown: check again later
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise Exception("Timeout waiting for video processing")
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, INSTAGRAM_POLL_MAX)
+
+    def get_history(self, limit=50, offset=0, account_id=None):
+        """Get upload history, newest first (limit=None for all of it)"""
+        return self.history.page(limit, offset, account_id)
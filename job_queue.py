@@ -0,0 +1,162 @@
+"""
+Render Job Queue
+Runs long video renders in a pool of worker processes so the API stays responsive.
+Workers report progress back to the server's processing_status dict through a queue.
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Progress queue of the current worker process (set by _init_worker)
+_progress_queue = None
+
+
+def default_worker_count() -> int:
+    """Half the available cores, at least one (each render also runs ffmpeg threads)."""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def _init_worker(progress_queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+    logging.basicConfig(level=logging.INFO)
+
+
+def report_progress(job_id: str, progress: int = None, message: str = None, **fields) -> None:
+    """
+    Send a status update for a job from inside a worker process.
+
+    Args:
+        job_id: Job identifier
+        progress: Progress percentage (0-100)
+        message: Human readable status message
+        **fields: Extra fields merged into the job's status entry
+    """
+    update = dict(fields)
+    if progress is not None:
+        update["progress"] = progress
+    if message is not None:
+        update["message"] = message
+
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, update))
+
+
+def _run_job(func: Callable, job_id: str, job: Dict) -> None:
+    """Worker entry point: run one job and report its final state."""
+    report_progress(job_id, 5, "Render started", status="processing")
+    try:
+        result = func(job_id, job, report_progress) or {}
+        report_progress(job_id, 100, "Video generated successfully!", status="completed", **result)
+    except Exception as e:
+        logger.error(f"[JOB {job_id}] ✗ Render failed: {e}", exc_info=True)
+        report_progress(job_id, message=f"Error: {e}", status="failed", error=str(e))
+
+
+class RenderJobQueue:
+    """Process pool for render jobs, mirroring worker progress into a status dict."""
+
+    def __init__(self, status_store: Dict, max_workers: Optional[int] = None):
+        self.status_store = status_store
+        self.max_workers = max_workers or default_worker_count()
+        self._context = multiprocessing.get_context("spawn")
+        self._executor = None
+        self._progress_queue = None
+        self._drain_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def cores_per_worker(self) -> int:
+        """CPU budget of each render worker; work a job fans out (segments, encoder threads) must fit in it."""
+        return max(1, (os.cpu_count() or 1) // self.max_workers)
+
+    def start(self) -> None:
+        """Start the worker pool (idempotent)."""
+        with self._lock:
+            if self._executor is not None:
+                return
+
+            self._progress_queue = self._context.Queue()
+            self._executor = self._new_executor()
+            self._drain_thread = threading.Thread(target=self._drain_progress, daemon=True)
+            self._drain_thread.start()
+
+            logger.info(f"[QUEUE] Started render pool with {self.max_workers} workers")
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue,)
+        )
+
+    def _replace_broken_executor(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Swap a pool whose worker died (OOM kill, native crash) for a fresh one."""
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False)
+                self._executor = self._new_executor()
+                logger.warning("[QUEUE] Render pool was broken by a dead worker, started a new one")
+            return self._executor
+
+    def submit(self, job_id: str, func: Callable, job: Dict) -> None:
+        """
+        Queue a job for a worker process.
+
+        Args:
+            job_id: Job identifier (key in the status store)
+            func: Module-level function func(job_id, job, report) returning a result dict
+            job: Picklable job description
+        """
+        self.start()
+
+        self.status_store[job_id] = {
+            "status": "queued",
+            "progress": 0,
+            "message": "Waiting for a render worker..."
+        }
+
+        executor = self._executor
+        try:
+            future = executor.submit(_run_job, func, job_id, job)
+        except BrokenProcessPool:
+            future = self._replace_broken_executor(executor).submit(_run_job, func, job_id, job)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        logger.info(f"[QUEUE] Job {job_id} queued")
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running jobs to finish."""
+        with self._lock:
+            if self._executor is None:
+                return
+            self._executor.shutdown(wait=True)
+            self._progress_queue.put(None)
+            self._drain_thread.join(timeout=5)
+            self._executor = None
+            logger.info("[QUEUE] Render pool stopped")
+
+    def _on_done(self, job_id: str, future) -> None:
+        # _run_job catches pipeline errors itself; this only fires for a dead worker
+        error = future.exception()
+        if error is not None:
+            logger.error(f"[QUEUE] Job {job_id} worker crashed: {error}")
+            self._apply(job_id, {"status": "failed", "error": str(error)})
+
+    def _drain_progress(self) -> None:
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                break
+            job_id, update = item
+            self._apply(job_id, update)
+
+    def _apply(self, job_id: str, update: Dict) -> None:
+        status = self.status_store.setdefault(job_id, {})
+        status.update(update)
@@ -1,4 +1,4 @@
-from openai import AzureOpenAI
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 import os
 import uuid
 from pathlib import Path
@@ -9,18 +9,18 @@ azure_config_interface = {
     "deployment": str
 }
 
-def generate_azure_openai_text_to_speech(api_key: str, text: str, azure_config: dict, voice: str = "echo") -> str:
+def generate_azure_openai_text_to_speech(api_key: str, text: str, azure_config: dict, voice: str = "echo", clients: ProviderClients = None) -> str:
     # Validate config values exist
     required_keys = ["endpoint", "api_version", "deployment"]
     if not all(key in azure_config for key in required_keys):
         raise ValueError("Missing required Azure configuration keys")
 
-    # Create client with proper parameter names
-    client = AzureOpenAI(
-        azure_endpoint=azure_config["endpoint"], # make sure the endpoint ends with /transcription and not /translation
-        api_key=api_key,
-        api_version=azure_config["api_version"],
-        deployment=azure_config["deployment"]
+    # Shared client (pooled keep-alive connections)
+    client = (clients or get_provider_clients()).azure_openai(
+        api_key,
+        azure_config["endpoint"], # make sure the endpoint ends with /transcription and not /translation
+        azure_config["api_version"],
+        azure_config["deployment"]
     )
 
     # Create tmp directory if it doesn't exist
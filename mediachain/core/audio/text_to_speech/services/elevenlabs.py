@@ -1,8 +1,8 @@
-from elevenlabs import ElevenLabs
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 from pathlib import Path
 import uuid
 
-def generate_elevenlabs_text_to_speech(api_key: str, text: str, voice: str = "Brian", model_id: str = "eleven_multilingual_v2") -> str:
+def generate_elevenlabs_text_to_speech(api_key: str, text: str, voice: str = "Brian", model_id: str = "eleven_multilingual_v2", clients: ProviderClients = None) -> str:
     """
     Generate text-to-speech audio using ElevenLabs API
     
@@ -11,11 +11,12 @@ def generate_elevenlabs_text_to_speech(api_key: str, text: str, voice: str = "Br
         text (str): Text to convert to speech
         voice (str): Name or ID of the voice to use
         model_id (str): ID of the model to use, defaults to eleven_multilingual_v2
+        clients (ProviderClients): Client registry, defaults to the shared one
     
     Returns:
         str: Path to the generated audio file
     """
-    client = ElevenLabs(api_key=api_key)
+    client = (clients or get_provider_clients()).elevenlabs(api_key)
     
     audio = client.generate(
         text=text,
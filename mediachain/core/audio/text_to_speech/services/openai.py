@@ -1,15 +1,13 @@
-from openai import OpenAI
 import uuid
 from pathlib import Path
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 
-def generate_openai_text_to_speech(api_key: str, text: str, voice: str = "echo") -> str:
+def generate_openai_text_to_speech(api_key: str, text: str, voice: str = "echo", clients: ProviderClients = None) -> str:
     if not api_key:
         raise ValueError("Missing OpenAI API key")
 
-    # Create client with proper parameter names
-    client = OpenAI(
-        api_key=api_key
-    )
+    # Shared client (pooled keep-alive connections)
+    client = (clients or get_provider_clients()).openai(api_key)
 
     # Create tmp directory if it doesn't exist
     tmp_dir = Path("tmp")
@@ -1,25 +1,55 @@
 from core.audio.text_to_speech.services.openai import generate_openai_text_to_speech
 from core.audio.text_to_speech.services.azure_openai import generate_azure_openai_text_to_speech
 from core.audio.text_to_speech.services.elevenlabs import generate_elevenlabs_text_to_speech
+from core.audio.text_to_speech.utils.tts_cache import get_tts_cache
+from core.utils.provider_clients import ProviderClients
 from typing import Literal
+from pathlib import Path
+import uuid
 
 # todo: Literal for voice in each service. E.g. elevenlabs voice ["Brian", "Adam", "Rachel"], openai voice ["alloy", "echo", "fable", "nova", "shimmer"]
 
-def generate_text_to_speech(service: Literal["openai", "azure_openai", "elevenlabs"], api_key: str, text: str, voice: str, azure_config: dict = None) -> str:
+# Model used by each service (part of the TTS cache key)
+tts_models = {
+    "openai": "tts-1",
+    "azure_openai": "tts-1",
+    "elevenlabs": "eleven_multilingual_v2"
+}
+
+def generate_text_to_speech(service: Literal["openai", "azure_openai", "elevenlabs"], api_key: str, text: str, voice: str, azure_config: dict = None, use_cache: bool = True, clients: ProviderClients = None) -> str:
+    cache = get_tts_cache()
+    use_cache = use_cache and cache.enabled
+    if use_cache:
+        model = tts_models.get(service)
+        if service == "azure_openai" and azure_config:
+            # The deployment (on its endpoint) decides which model actually speaks
+            model = f"{model}@{azure_config.get('endpoint')}/{azure_config.get('deployment')}"
+        cache_key = cache.make_key(service, text, voice, model)
+        cached_path = cache.get(cache_key, str(Path("tmp") / f"tts_audio_{uuid.uuid4()}.mp3"))
+        if cached_path:
+            return cached_path
+
+    audio_path = _generate_text_to_speech(service, api_key, text, voice, azure_config, clients)
+
+    if use_cache:
+        cache.put(cache_key, audio_path)
+    return audio_path
+
+def _generate_text_to_speech(service: str, api_key: str, text: str, voice: str, azure_config: dict = None, clients: ProviderClients = None) -> str:
     if service == "openai":
         try:
-            return generate_openai_text_to_speech(api_key, text, voice)
+            return generate_openai_text_to_speech(api_key, text, voice, clients=clients)
         except Exception as e:
             raise ValueError(f"Error generating text-to-speech with OpenAI: {e}")
     elif service == "azure_openai":
         try:
-            return generate_azure_openai_text_to_speech(api_key, text, voice, azure_config)
+            return generate_azure_openai_text_to_speech(api_key, text, azure_config, voice, clients=clients)
         except Exception as e:
             raise ValueError(f"Error generating text-to-speech with Azure OpenAI: {e}")
     elif service == "elevenlabs":
         try:
-            return generate_elevenlabs_text_to_speech(api_key, text, voice)
+            return generate_elevenlabs_text_to_speech(api_key, text, voice, clients=clients)
         except Exception as e:
             raise ValueError(f"Error generating text-to-speech with ElevenLabs: {e}")
     else:
-        raise ValueError(f"Invalid text-to-speech service: {service}")
\ No newline at end of file
+        raise ValueError(f"Invalid text-to-speech service: {service}")
@@ -0,0 +1,163 @@
+"""
+Content-addressed disk cache for text-to-speech audio.
+
+Entries are keyed on a hash of (provider, text, voice, model), so the same line spoken
+by the same voice is only synthesized once. The cache directory is the source of truth
+(file mtime is the LRU clock), which lets several worker processes share one cache.
+"""
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "cache/tts")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "500"))  # 0 disables the cache
+
+
+class TTSCache:
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(provider: str, text: str, voice: str, model: str = None) -> str:
+        """Hash the inputs that determine the synthesized audio."""
+        payload = json.dumps([provider, text, voice, model], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp3"
+
+    def _metadata_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str, output_path: str = None) -> Optional[str]:
+        """
+        Look up cached audio.
+
+        Args:
+            key: Cache key from make_key()
+            output_path: Copy the cached audio here (callers may delete their copy freely)
+
+        Returns:
+            Path to the audio (output_path if given), or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entry_path(key)
+        try:
+            os.utime(entry)  # Mark as recently used
+            if output_path:
+                Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(entry, output_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logging.info(f"[TTS_CACHE] Hit {key[:12]} ({self.hits} hits / {self.misses} misses)")
+        return str(output_path or entry)
+
+    def get_metadata(self, key: str) -> Optional[dict]:
+        """Metadata stored alongside an entry (e.g. word timings), or None."""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._metadata_path(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, audio_path: str, metadata: dict = None) -> None:
+        """Store a synthesized audio file, then evict least recently used entries over the size limit."""
+        if not self.enabled or not audio_path or not os.path.exists(audio_path):
+            return
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temp name and rename so concurrent readers never see a partial file
+            if metadata is not None:
+                temp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+                with open(temp_path, "w") as f:
+                    json.dump(metadata, f)
+                os.replace(temp_path, self._metadata_path(key))
+            temp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(audio_path, temp_path)
+            os.replace(temp_path, self._entry_path(key))
+            self._evict()
+        except OSError as e:
+            logging.warning(f"[TTS_CACHE] Could not store {key[:12]}: {e}")
+
+    def _evict(self) -> None:
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            Path(path).with_suffix(".json").unlink(missing_ok=True)
+            total_bytes -= size
+            with self._lock:
+                self.evictions += 1
+            if total_bytes <= self.max_bytes:
+                break
+
+        logging.info(f"[TTS_CACHE] Evicted down to {total_bytes / (1024 * 1024):.1f} MB")
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process plus the current size on disk."""
+        entries = 0
+        total_bytes = 0
+        if self.cache_dir.exists():
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".mp3"):
+                    entries += 1
+                    total_bytes += entry.stat().st_size
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "total_bytes": total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+_tts_cache = None
+
+
+def get_tts_cache() -> TTSCache:
+    """Shared cache instance configured from TTS_CACHE_DIR / TTS_CACHE_MAX_MB."""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSCache()
+    return _tts_cache
@@ -2,21 +2,56 @@ from core.image.generation.services.dalle.dalle_generation import generate_with_
 from core.image.generation.services.leonardo.leonardo_generation import generate_with_leonardo
 from core.image.generation.services.pollinations.pollinations_generation import generate_with_pollinations
 
+from core.image.utils.image_cache import get_image_cache
+from core.utils.provider_clients import ProviderClients
+
 import os
+import uuid
+import asyncio
+from pathlib import Path
 from typing import Literal
 import logging
 
-async def generate_image(service: Literal["dalle", "pollinations", "leonardo"], api_key: str = None, prompt: str = "tobey maguire", width: int = 1024, height: int = 1024) -> str:
+async def generate_image(service: Literal["dalle", "pollinations", "leonardo"], api_key: str = None, prompt: str = "tobey maguire", width: int = 1024, height: int = 1024, use_cache: bool = True, clients: ProviderClients = None, cache_prompt: str = None) -> str:
+    """Generate an image, or reuse the cached one for the same (service, cache_prompt, width, height).
+
+    cache_prompt defaults to prompt; pass the original prompt when prompt is an LLM
+    rewrite of it (those differ on every run, so they would never hit the cache).
+
+    With the cache enabled this returns the path of a local copy of the image
+    (download_image accepts it as is); otherwise the service's URL or path.
+    """
+    cache = get_image_cache()
+    use_cache = use_cache and cache.enabled
+    if use_cache:
+        cache_key = cache.make_key(service, cache_prompt or prompt, width, height)
+        output_path = str(Path("tmp") / f"generated_image_{uuid.uuid4()}.png")
+        # Disk and network work of the cache runs off the event loop
+        cached_path = await asyncio.to_thread(cache.get, cache_key, output_path)
+        if cached_path:
+            return cached_path
+
+    result = await _generate_image(service, api_key, prompt, width, height, clients)
+
+    if use_cache and result and str(result).startswith(("http://", "https://")):
+        try:
+            # Store the decoded image at the requested size, so the next render makes no network call
+            return await asyncio.to_thread(cache.fetch, cache_key, result, output_path, size=(width, height))
+        except Exception as e:
+            logging.warning(f"Could not cache generated image, returning its URL: {e}")
+    return result
+
+async def _generate_image(service: str, api_key: str, prompt: str, width: int, height: int, clients: ProviderClients = None) -> str:
     logging.info(f"Generating image with service: {service}")
     logging.info(f"Prompt: {prompt}")
     
     try:
         if service == "dalle":
-            result = generate_with_dalle(api_key, prompt, width, height)
+            result = generate_with_dalle(api_key, prompt, width, height, clients=clients)
             logging.info(f"DALLE result: {result}")
             return result
         elif service == "pollinations":
-            result = await generate_with_pollinations(prompt, width, height)
+            result = await generate_with_pollinations(prompt, width, height, clients=clients)
             logging.info(f"Pollinations result: {result}")
             return result
         elif service == "leonardo":
@@ -1,7 +1,6 @@
-import requests
-from openai import OpenAI
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 
-def generate_with_dalle(api_key: str, prompt: str, height: int = 1024, width: int = 1024) -> str:
+def generate_with_dalle(api_key: str, prompt: str, height: int = 1024, width: int = 1024, clients: ProviderClients = None) -> str:
     """
     Generate an image using DALL·E API.
     Args:
@@ -14,7 +13,7 @@ def generate_with_dalle(api_key: str, prompt: str, height: int = 1024, width: in
     if not api_key:
         raise ValueError("DALL·E API key is required.")
 
-    client = OpenAI(api_key=api_key)
+    client = (clients or get_provider_clients()).openai(api_key)
 
     response = client.images.generate(
         model="dall-e-3",
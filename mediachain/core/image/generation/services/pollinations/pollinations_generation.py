@@ -1,7 +1,7 @@
-import requests
 import logging
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 
-async def generate_with_pollinations(prompt: str, height: int = 1024, width: int = 1024, not_logo: bool = False) -> str:
+async def generate_with_pollinations(prompt: str, height: int = 1024, width: int = 1024, not_logo: bool = False, clients: ProviderClients = None) -> str:
     """
     Generate an image using Pollinations API. (https://pollinations.ai/)
     Args:
@@ -10,6 +10,7 @@ async def generate_with_pollinations(prompt: str, height: int = 1024, width: int
         height (int): Height of the generated image.
         width (int): Width of the generated image.
         not_logo (bool): Whether to hide the Pollinations logo(Add credits in case of set to True).
+        clients (ProviderClients): Client registry, defaults to the shared one
     
     Returns:
         str: URL or path of the generated image.
@@ -26,7 +27,9 @@ async def generate_with_pollinations(prompt: str, height: int = 1024, width: int
             "no_logo": not_logo
         }
 
-        response = requests.post(url, json=payload)
+        # Async pooled client, so generating doesn't block the event loop
+        http = (clients or get_provider_clients()).async_http()
+        response = await http.post(url, json=payload, timeout=120)
         
         if response.status_code == 200:
             return url
@@ -1,22 +1,26 @@
-from openai import OpenAI
-from openai import AzureOpenAI
-from typing import Literal
+from core.utils.provider_clients import ProviderClients, get_provider_clients
+from typing import Literal, List
+import logging
 import json
 
-def enhance_prompt(service: Literal["openai", "azure_openai"], api_key: str, prompt: str, model: str, azure_config: dict = None):
+def _azure_client(clients: ProviderClients, api_key: str, azure_config: dict):
+    clients = clients or get_provider_clients()
+    return clients.azure_openai(api_key, azure_config["azure_endpoint"], azure_config["azure_api_version"], azure_config["azure_deployment"])
+
+def enhance_prompt(service: Literal["openai", "azure_openai"], api_key: str, prompt: str, model: str, azure_config: dict = None, clients: ProviderClients = None):
     if service == "openai":
         try:
-            return enhance_prompt_openai(api_key, prompt, model)
+            return enhance_prompt_openai(api_key, prompt, model, clients)
         except Exception as e:
             raise ValueError(f"Error enhancing prompt with OpenAI: {e}")
     elif service == "azure_openai":
         try:
-            return enhance_prompt_azure(api_key, prompt, azure_config, model)
+            return enhance_prompt_azure(api_key, prompt, azure_config, model, clients)
         except Exception as e:
             raise ValueError(f"Error enhancing prompt with Azure OpenAI: {e}")
 
-def enhance_prompt_azure(api_key: str, prompt: str, azure_config: dict, model: str = "gpt-35-turbo"):
-    client = AzureOpenAI(api_key=api_key, azure_endpoint=azure_config["azure_endpoint"], azure_deployment=azure_config["azure_deployment"], azure_api_version=azure_config["azure_api_version"])
+def enhance_prompt_azure(api_key: str, prompt: str, azure_config: dict, model: str = "gpt-35-turbo", clients: ProviderClients = None):
+    client = _azure_client(clients, api_key, azure_config)
     system_prompt = enhance_system_prompt
     response = client.chat.completions.create(
         model=model,
@@ -26,8 +30,8 @@ def enhance_prompt_azure(api_key: str, prompt: str, azure_config: dict, model: s
     response_json = json.loads(response.choices[0].message.content)
     return response_json["image_prompt"]
 
-def enhance_prompt_openai(api_key: str, prompt: str, model: str = "gpt-3.5-turbo"):
-    client = OpenAI(api_key=api_key)
+def enhance_prompt_openai(api_key: str, prompt: str, model: str = "gpt-3.5-turbo", clients: ProviderClients = None):
+    client = (clients or get_provider_clients()).openai(api_key)
     system_prompt = enhance_system_prompt
     response = client.chat.completions.create(
         model=model,
@@ -37,6 +41,54 @@ def enhance_prompt_openai(api_key: str, prompt: str, model: str = "gpt-3.5-turbo
     response_json = json.loads(response.choices[0].message.content)
     return response_json["image_prompt"]
 
+def enhance_prompts(service: Literal["openai", "azure_openai"], api_key: str, prompts: List[str], model: str, azure_config: dict = None, clients: ProviderClients = None) -> List[str]:
+    """
+    Enhance a list of prompts with a single LLM call.
+
+    The response is validated item by item; any prompt that is missing or invalid in the
+    batch response is enhanced on its own, and kept as is if that fails too.
+
+    Returns:
+        Enhanced prompts, in the same order as prompts
+    """
+    if not prompts:
+        return []
+
+    enhanced = [None] * len(prompts)
+    try:
+        if service == "openai":
+            client = (clients or get_provider_clients()).openai(api_key)
+        elif service == "azure_openai":
+            client = _azure_client(clients, api_key, azure_config)
+        else:
+            raise ValueError(f"Unsupported service: {service}")
+
+        numbered = [{"index": i, "scene": prompt} for i, prompt in enumerate(prompts)]
+        response = client.chat.completions.create(
+            model=model,
+            response_format={"type": "json_object"},
+            messages=[{"role": "system", "content": enhance_batch_system_prompt}, {"role": "user", "content": json.dumps(numbered)}]
+        )
+        items = json.loads(response.choices[0].message.content).get("image_prompts", [])
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            index, image_prompt = item.get("index"), item.get("image_prompt")
+            if isinstance(index, int) and 0 <= index < len(prompts) and isinstance(image_prompt, str) and image_prompt.strip():
+                enhanced[index] = image_prompt.strip()
+    except Exception as e:
+        logging.warning(f"Batch prompt enhancement failed, enhancing prompts one by one: {e}")
+
+    # Per-item fallback
+    for i, prompt in enumerate(prompts):
+        if enhanced[i] is None:
+            try:
+                enhanced[i] = enhance_prompt(service, api_key, prompt, model, azure_config, clients)
+            except Exception as e:
+                logging.warning(f"Error enhancing prompt '{prompt}', using it as is: {e}")
+                enhanced[i] = prompt
+    return enhanced
+
 enhance_system_prompt = """
     
     You are a specialized prompt generation system for video automation, 
@@ -61,4 +113,18 @@ enhance_system_prompt = """
         "image_prompt": "image prompt here"
     }
 
-    """
\ No newline at end of file
+    """
+
+enhance_batch_system_prompt = enhance_system_prompt.split("**Output Format:**")[0] + """
+    You receive a JSON list of scenes, each with an "index" and its "scene" text.
+    Write one image prompt per scene, following the guidelines above.
+
+    **Output Format:**
+    Return the result as a JSON object structured as follows, with one entry per scene:
+    {
+        "image_prompts": [
+            { "index": 0, "image_prompt": "image prompt here" }
+        ]
+    }
+
+    """
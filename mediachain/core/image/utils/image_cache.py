@@ -0,0 +1,237 @@
+"""
+Content-addressed disk cache for generated and downloaded images.
+
+Generated images are keyed on a hash of (service, prompt, width, height) and
+downloads on their URL, so re-rendering the same story makes no image network calls.
+Entries are decoded before they are stored, which rejects truncated or non-image
+downloads, and resized to the requested size (or shrunk into a bounding box) when one is
+given. JPEG sources stay JPEG (photos as PNG are several times larger), the rest is PNG. The cache directory is
+the source of truth (file mtime is the LRU clock), so several processes can share it.
+"""
+import io
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from core.utils.provider_clients import get_provider_clients
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "cache/images")
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "500"))  # 0 disables the cache
+
+ENTRY_SUFFIXES = (".png", ".jpg")
+
+
+class ImageCache:
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(service: str, prompt: str, width: int = None, height: int = None) -> str:
+        """Hash the inputs that determine the image (use service="url" and the URL as prompt for downloads)."""
+        payload = json.dumps([service, prompt, width, height], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Optional[Path]:
+        for suffix in ENTRY_SUFFIXES:
+            entry = self.cache_dir / f"{key}{suffix}"
+            if entry.exists():
+                return entry
+        return None
+
+    def get(self, key: str, output_path: str = None) -> Optional[str]:
+        """
+        Look up a cached image.
+
+        Args:
+            key: Cache key from make_key()
+            output_path: Copy the cached image here, with the entry's suffix (callers may delete their copy freely)
+
+        Returns:
+            Path to the image (the copy if output_path is given), or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entry_path(key)
+        try:
+            if entry is None:
+                raise FileNotFoundError(key)
+            os.utime(entry)  # Mark as recently used
+            if output_path:
+                output_path = Path(output_path).with_suffix(entry.suffix)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(entry, output_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logging.info(f"[IMAGE_CACHE] Hit {key[:12]} ({self.hits} hits / {self.misses} misses)")
+        return str(output_path or entry)
+
+    def put(self, key: str, image_bytes: bytes, size: Tuple[int, int] = None,
+            max_size: Tuple[int, int] = None) -> Optional[str]:
+        """
+        Decode, optionally resize, and store an image, then evict least recently used entries over the size limit.
+
+        Args:
+            key: Cache key from make_key()
+            image_bytes: Encoded image (as downloaded)
+            size: (width, height) to resize to, if the image isn't that size already
+            max_size: (width, height) box to shrink larger images into, keeping the aspect ratio
+
+        Returns:
+            Path of the cache entry, or None if the bytes aren't an image or the cache is disabled
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            image.load()
+        except Exception as e:
+            logging.warning(f"[IMAGE_CACHE] Not storing {key[:12]}, not a valid image: {e}")
+            return None
+
+        is_jpeg = image.format == "JPEG"
+        original_size = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        if size and image.size != tuple(size):
+            image = image.resize(tuple(size), Image.LANCZOS)
+        elif max_size and (image.width > max_size[0] or image.height > max_size[1]):
+            image.thumbnail(tuple(max_size), Image.LANCZOS)
+        is_jpeg = is_jpeg and image.mode == "RGB"
+
+        entry = self.cache_dir / f"{key}{'.jpg' if is_jpeg else '.png'}"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temp name and rename so concurrent readers never see a partial file
+            temp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+            if is_jpeg and image.size == original_size:
+                # Untouched JPEG: keep the downloaded bytes, no re-encode
+                temp_path.write_bytes(image_bytes)
+            elif is_jpeg:
+                image.save(temp_path, format="JPEG", quality=90)
+            else:
+                image.save(temp_path, format="PNG")
+            os.replace(temp_path, entry)
+            self._evict()
+        except OSError as e:
+            logging.warning(f"[IMAGE_CACHE] Could not store {key[:12]}: {e}")
+            return None
+        return str(entry)
+
+    def fetch(self, key: str, url: str, output_path: str, size: Tuple[int, int] = None,
+              max_size: Tuple[int, int] = None, timeout: float = 60) -> str:
+        """
+        Copy a cached image to output_path, downloading and storing it first on a miss.
+
+        Args:
+            key: Cache key from make_key() (include size/max_size in it)
+            url: Where to download the image from on a miss
+            output_path: Where the caller wants its own copy (the suffix follows the stored format)
+            size: (width, height) to store the image at
+            max_size: (width, height) box to shrink larger images into
+            timeout: Download timeout in seconds
+
+        Returns:
+            Path of the copy (raises requests exceptions if the download fails)
+        """
+        cached_path = self.get(key, output_path)
+        if cached_path:
+            return cached_path
+
+        response = get_provider_clients().http().get(url, timeout=timeout)
+        response.raise_for_status()
+
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        entry = self.put(key, response.content, size, max_size)
+        try:
+            if entry:
+                output_path = str(Path(output_path).with_suffix(Path(entry).suffix))
+                shutil.copyfile(entry, output_path)
+                return output_path
+        except FileNotFoundError:
+            pass  # Evicted straight away (cache smaller than the image)
+
+        # Cache disabled (or not decodable): hand over the bytes as downloaded
+        with open(output_path, "wb") as f:
+            f.write(response.content)
+        return output_path
+
+    def _evict(self) -> None:
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(ENTRY_SUFFIXES):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total_bytes -= size
+            with self._lock:
+                self.evictions += 1
+            if total_bytes <= self.max_bytes:
+                break
+
+        logging.info(f"[IMAGE_CACHE] Evicted down to {total_bytes / (1024 * 1024):.1f} MB")
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process plus the current size on disk."""
+        entries = 0
+        total_bytes = 0
+        if self.cache_dir.exists():
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(ENTRY_SUFFIXES):
+                    entries += 1
+                    total_bytes += entry.stat().st_size
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "total_bytes": total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+_image_cache = None
+
+
+def get_image_cache() -> ImageCache:
+    """Shared cache instance configured from IMAGE_CACHE_DIR / IMAGE_CACHE_MAX_MB."""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache()
+    return _image_cache
@@ -1,5 +1,4 @@
-from openai import OpenAI
-from openai import AzureOpenAI
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 from typing import Literal
 import json
 azure_config_interface = {
@@ -8,7 +7,7 @@ azure_config_interface = {
     "azure_api_version": str
 }
 
-def generate_image_timestamps(service: Literal['openai', 'azure_openai'], api_key: str, script: str, model: str, azure_config: dict = None):
+def generate_image_timestamps(service: Literal['openai', 'azure_openai'], api_key: str, script: str, model: str, azure_config: dict = None, clients: ProviderClients = None):
     # Validate all required config fields are present and of correct type
     if azure_config is not None:
         for key, expected_type in azure_config_interface.items():
@@ -19,20 +18,20 @@ def generate_image_timestamps(service: Literal['openai', 'azure_openai'], api_ke
 
     if service == 'openai':
         try:
-            return generate_image_timestamps_openai(api_key, script, model)
+            return generate_image_timestamps_openai(api_key, script, model, clients)
         except Exception as e:
             raise ValueError(f"Error syncing with script using OpenAI: {e}")
     elif service == 'azure_openai':
         try:
-            return generate_image_timestamps_azure(api_key, script, azure_config, model)
+            return generate_image_timestamps_azure(api_key, script, azure_config, model, clients)
         except Exception as e:
             raise ValueError(f"Error syncing with script using Azure OpenAI: {e}")
 
-def generate_image_timestamps_azure(api_key: str, script_with_timestamps: str, azure_config: dict, model: str = "gpt-35-turbo"):
-    client = AzureOpenAI(api_key=api_key, 
-                        azure_endpoint=azure_config["azure_endpoint"], 
-                        azure_deployment=azure_config["azure_deployment"], 
-                        azure_api_version=azure_config["azure_api_version"])
+def generate_image_timestamps_azure(api_key: str, script_with_timestamps: str, azure_config: dict, model: str = "gpt-35-turbo", clients: ProviderClients = None):
+    client = (clients or get_provider_clients()).azure_openai(api_key,
+                                                             azure_config["azure_endpoint"],
+                                                             azure_config["azure_api_version"],
+                                                             azure_config["azure_deployment"])
     system_prompt = images_timestamps_in_stt_system_prompt
     response = client.chat.completions.create(
         model=model,
@@ -42,8 +41,8 @@ def generate_image_timestamps_azure(api_key: str, script_with_timestamps: str, a
     response_json = json.loads(response.choices[0].message.content)
     return response_json["images"]
 
-def generate_image_timestamps_openai(api_key: str, script_with_timestamps: str, model: str = "gpt-3.5-turbo"):
-    client = OpenAI(api_key=api_key)
+def generate_image_timestamps_openai(api_key: str, script_with_timestamps: str, model: str = "gpt-3.5-turbo", clients: ProviderClients = None):
+    client = (clients or get_provider_clients()).openai(api_key)
     system_prompt = images_timestamps_in_stt_system_prompt
     response = client.chat.completions.create(
         model=model,
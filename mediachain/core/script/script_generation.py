@@ -1,5 +1,6 @@
 from core.script.services.openai import generate_openai_script
 from core.script.services.azure_openai import generate_azure_openai_script
+from core.utils.provider_clients import ProviderClients
 from typing import Literal
 
 azure_config_interface = {
@@ -8,7 +9,7 @@ azure_config_interface = {
     "azure_api_version": str
 }
 
-def generate_script(service: Literal["openai", "azure_openai"], api_key: str, prompt: str, model, azure_config: dict = None) -> str:
+def generate_script(service: Literal["openai", "azure_openai"], api_key: str, prompt: str, model, azure_config: dict = None, clients: ProviderClients = None) -> str:
     # Validate all required config fields are present and of correct type
     if service == "azure_openai":
         for key, expected_type in azure_config_interface.items():
@@ -19,11 +20,11 @@ def generate_script(service: Literal["openai", "azure_openai"], api_key: str, pr
 
     if service == "openai":
         try:
-            return generate_openai_script(api_key, prompt, model)
+            return generate_openai_script(api_key, prompt, model, clients=clients)
         except Exception as e:
             raise ValueError(f"Error generating script with OpenAI: {e}")
     elif service == "azure_openai":
         try:
-            return generate_azure_openai_script(api_key, prompt, model, azure_config)
+            return generate_azure_openai_script(api_key, prompt, model, azure_config, clients=clients)
         except Exception as e:
             raise ValueError(f"Error generating script with Azure OpenAI: {e}")
\ No newline at end of file
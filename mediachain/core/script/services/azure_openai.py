@@ -1,4 +1,4 @@
-from openai import AzureOpenAI
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 from core.script.utils.script_utils import load_yaml_file
 import json
 azure_config_interface = {
@@ -7,7 +7,7 @@ azure_config_interface = {
     "azure_api_version": str
 }
 
-def generate_azure_openai_script(api_key: str, prompt: str, model: str = "gpt-35-turbo", azure_config: dict = None) -> str:
+def generate_azure_openai_script(api_key: str, prompt: str, model: str = "gpt-35-turbo", azure_config: dict = None, clients: ProviderClients = None) -> str:
     """
     Generate a script using Azure OpenAI
     """
@@ -19,10 +19,10 @@ def generate_azure_openai_script(api_key: str, prompt: str, model: str = "gpt-35
             raise ValueError(f"{key} must be of type {expected_type.__name__}")
 
     system_prompt = load_yaml_file("script.yaml")["system_prompt"]
-    client = AzureOpenAI(api_key=api_key, 
-                         azure_endpoint=azure_config["azure_endpoint"], 
-                         azure_deployment=azure_config["azure_deployment"], 
-                         azure_api_version=azure_config["azure_api_version"])
+    client = (clients or get_provider_clients()).azure_openai(api_key,
+                                                             azure_config["azure_endpoint"],
+                                                             azure_config["azure_api_version"],
+                                                             azure_config["azure_deployment"])
     response = client.chat.completions.create(
         model=model,
         response_format={"type": "json_object"},
@@ -1,10 +1,10 @@
-from openai import OpenAI
+from core.utils.provider_clients import ProviderClients, get_provider_clients
 from core.script.utils.script_utils import load_yaml_file
 import json
 import sys
 import os
 
-def generate_openai_script(api_key: str, prompt: str, model: str = "gpt-3.5-turbo-0125") -> str:
+def generate_openai_script(api_key: str, prompt: str, model: str = "gpt-3.5-turbo-0125", clients: ProviderClients = None) -> str:
     """
     Generate a script using OpenAI
     """
@@ -13,7 +13,7 @@ def generate_openai_script(api_key: str, prompt: str, model: str = "gpt-3.5-turb
     yaml_path = os.path.join(os.path.dirname(current_dir), "prompts", "script.yaml")
     
     system_prompt = load_yaml_file(yaml_path)["system_prompt"]
-    client = OpenAI(api_key=api_key)
+    client = (clients or get_provider_clients()).openai(api_key)
     response = client.chat.completions.create(
         model=model,
         response_format={"type": "json_object"},
@@ -0,0 +1,138 @@
+"""
+Shared, connection-pooled clients for every outbound provider call.
+
+Provider wrappers used to build a new SDK client (or call bare requests.get/post) per
+call, paying for a TCP + TLS handshake every time. The registry keeps one keep-alive
+pool per transport and hands out clients bound to it:
+
+- http() -> requests.Session, for plain HTTP (image downloads, Pollinations, Graph API)
+- openai() / azure_openai() / elevenlabs() -> SDK clients sharing one pooled httpx.Client
+- async_http() / async_openai() -> async variants for the event loop
+
+SDK clients are cached per credentials. httpx async clients can only be used on the
+event loop that created them, so async clients are cached per running loop.
+"""
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from openai import OpenAI, AzureOpenAI, AsyncOpenAI
+
+PROVIDER_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "20"))  # Keep-alive connections per host
+PROVIDER_TIMEOUT = float(os.getenv("PROVIDER_TIMEOUT", "60"))  # Default timeout (seconds) for plain HTTP calls
+
+
+class ProviderClients:
+    def __init__(self, pool_size: int = PROVIDER_POOL_SIZE, timeout: float = PROVIDER_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._session = None
+        self._httpx = None
+        self._clients: Dict[tuple, object] = {}
+        self._async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.pool_size * 2, max_keepalive_connections=self.pool_size)
+
+    def http(self) -> requests.Session:
+        """Pooled requests session (thread safe for independent requests)."""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _httpx_client(self) -> httpx.Client:
+        # Caller holds self._lock
+        if self._httpx is None:
+            # SDKs set their own per-request timeouts; this is only the fallback
+            self._httpx = httpx.Client(limits=self._limits(), timeout=httpx.Timeout(600, connect=10))
+        return self._httpx
+
+    def _cached(self, key: tuple, factory):
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory(self._httpx_client())
+                self._clients[key] = client
+            return client
+
+    def openai(self, api_key: str) -> OpenAI:
+        return self._cached(("openai", api_key), lambda http_client: OpenAI(api_key=api_key, http_client=http_client))
+
+    def azure_openai(self, api_key: str, azure_endpoint: str, api_version: str, azure_deployment: str = None) -> AzureOpenAI:
+        return self._cached(
+            ("azure_openai", api_key, azure_endpoint, api_version, azure_deployment),
+            lambda http_client: AzureOpenAI(api_key=api_key, azure_endpoint=azure_endpoint, api_version=api_version,
+                                            azure_deployment=azure_deployment, http_client=http_client)
+        )
+
+    def elevenlabs(self, api_key: str):
+        # Imported lazily: only the ElevenLabs paths need the SDK
+        from elevenlabs import ElevenLabs
+        return self._cached(("elevenlabs", api_key), lambda http_client: ElevenLabs(api_key=api_key, httpx_client=http_client))
+
+    def _loop_clients(self) -> dict:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async.get(loop)
+            if clients is None:
+                clients = {}
+                self._async[loop] = clients
+            return clients
+
+    def async_http(self) -> httpx.AsyncClient:
+        """Pooled httpx client for the running event loop."""
+        clients = self._loop_clients()
+        if "http" not in clients:
+            clients["http"] = httpx.AsyncClient(limits=self._limits(), timeout=self.timeout, follow_redirects=True)
+        return clients["http"]
+
+    def async_openai(self, api_key: str) -> AsyncOpenAI:
+        """AsyncOpenAI client for the running event loop, sharing its pooled httpx client."""
+        clients = self._loop_clients()
+        key = ("openai", api_key)
+        if key not in clients:
+            clients[key] = AsyncOpenAI(api_key=api_key, http_client=self.async_http())
+        return clients[key]
+
+    async def aclose(self) -> None:
+        """Close the async clients of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async.pop(loop, {})
+        if "http" in clients:
+            await clients["http"].aclose()
+
+    def close(self) -> None:
+        """Close the sync pools (clients handed out before are closed with them)."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            if self._httpx is not None:
+                self._httpx.close()
+            self._session = None
+            self._httpx = None
+            self._clients.clear()
+        logging.info("[PROVIDER_CLIENTS] Closed connection pools")
+
+
+_provider_clients: Optional[ProviderClients] = None
+
+
+def get_provider_clients() -> ProviderClients:
+    """Shared registry configured from PROVIDER_POOL_SIZE / PROVIDER_TIMEOUT."""
+    global _provider_clients
+    if _provider_clients is None:
+        _provider_clients = ProviderClients()
+    return _provider_clients
@@ -1,6 +1,6 @@
 import cv2
 import base64
-from openai import OpenAI
+from core.utils.provider_clients import get_provider_clients
 import os
 from typing import List, Dict
 
@@ -29,7 +29,7 @@ def summarize_video(api_key: str, video_path: str, frame_interval: int = 60) ->
         video_path: Path to video file
         frame_interval: Number of frames to skip between analyses
     """
-    client = OpenAI(api_key=api_key)
+    client = get_provider_clients().openai(api_key)
 
     # Extract frames
     frames = _extract_frames(video_path)
@@ -62,7 +62,7 @@ def generate_video_narration(api_key: str, video_path: str, frame_interval: int
     Generate a video narration using GPT-4o
     """
 
-    client = OpenAI(api_key=api_key)
+    client = get_provider_clients().openai(api_key)
     frames = _extract_frames(video_path)
     prompt_messages = [
         {
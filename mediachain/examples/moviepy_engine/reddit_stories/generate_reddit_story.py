@@ -12,6 +12,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 
 """ TurboReel-Moviepy imports """
 from ..src.video_editor import VideoEditor
+from ..src.video_metadata import get_video_index
 from ..src.captions.caption_handler import CaptionHandler
 
 """ MediaChain imports """
@@ -83,7 +84,8 @@ class RedditStoryGenerator:
                             video_topic: str = '',
                             captions_settings: dict = {},
                             add_images: bool = True,
-                            loop_if_short: bool = True
+                            loop_if_short: bool = True,
+                            render_profile: str = None
                             ) -> dict:
         """Generate a video based on the provided topic or ready-made script.
 
@@ -94,6 +96,7 @@ class RedditStoryGenerator:
             video_topic (str): The topic of the video if script type is 'based_on_topic'.        
             captions_settings (dict): The settings for the captions. (font, color, etc)
             loop_if_short (bool): Automatically loop video if too short (default: True)
+            render_profile (str): Render profile: draft, preview or publish (default: RENDER_PROFILE)
 
         Returns:
             dict: A dictionary with the status of the video generation and a message.
@@ -132,9 +135,12 @@ class RedditStoryGenerator:
             
             # Get video dimensions and duration
             logging.info("[VIDEO_INPUT] Reading video properties")
-            with VideoFileClip(video_path) as video:
-                video_width, video_height = video.w, video.h
-                background_video_length = video.duration
+            video_metadata = get_video_index().get(video_path)
+            if not video_metadata:
+                logging.error("[VIDEO_INPUT] ✗ Could not read video properties")
+                return {"status": "error", "message": "Could not read the background video."}
+            video_width, video_height = video_metadata["width"], video_metadata["height"]
+            background_video_length = video_metadata["duration"]
             
             logging.info(f"[VIDEO_INPUT] ✓ Video properties:")
             logging.info(f"[VIDEO_INPUT]   - Resolution: {video_width}x{video_height}")
@@ -166,13 +172,6 @@ class RedditStoryGenerator:
             
             logging.info(f"[QUESTION] ✓ Question audio created: {reddit_question_audio_duration:.2f}s")
             
-            # Initialize Background video
-            logging.info("[VIDEO] Loading background video clip")
-            background_video_clip: VideoFileClip = VideoFileClip(video_path)
-            clips_to_close.append(background_video_clip)
-            
-            logging.info(f"[VIDEO] ✓ Background video loaded")
-            
             ## Initialize Story Audio
             logging.info("[AUDIO] Generating story narration audio")
             story_audio_path: str = generate_text_to_speech("openai", self.openai_api_key, script, voice="echo")
@@ -209,17 +208,10 @@ class RedditStoryGenerator:
                         logging.error(f"[TIMING] ✗ {error_msg}")
                         return {"status": "error", "message": error_msg}
                     
-                    # Update video_path to use looped version
+                    # Update video_path to use looped version (only the cut below is opened)
                     video_path = looped_video_path
                     background_video_length = target_duration
                     
-                    # Close and reopen the background video clip with looped version
-                    background_video_clip.close()
-                    clips_to_close.remove(background_video_clip)
-                    
-                    background_video_clip = VideoFileClip(video_path)
-                    clips_to_close.append(background_video_clip)
-                    
                     logging.info(f"[TIMING] ✓ Video looped successfully, new duration: {background_video_length:.2f}s")
                 else:
                     error_msg = (
@@ -332,7 +324,7 @@ class RedditStoryGenerator:
             logging.info(f"[COMPOSITION] ✓ Final composition ready: {combined_clips.duration:.2f}s total")
 
             logging.info(f"[RENDER] Starting final video render (this may take several minutes)")
-            final_video_output_path = self.video_editor.render_final_video(combined_clips)
+            final_video_output_path = self.video_editor.render_final_video(combined_clips, render_profile)
             logging.info(f"[RENDER] ✓ Video rendered successfully")
             
             # Cleanup: Ensure temporary files are removed
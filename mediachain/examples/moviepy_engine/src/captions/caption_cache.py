@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from .text_rasterizer import render_caption
+
+CAPTION_CACHE_SIZE = int(os.getenv("CAPTION_CACHE_SIZE", "1024"))  # Images kept in memory, 0 disables
+CAPTION_CACHE_DIR = os.getenv("CAPTION_CACHE_DIR", "")  # Optional PNG store shared by processes/restarts
+
+
+class CaptionImageCache:
+    """
+    LRU cache of rasterized caption images keyed by (text, font, size, colors, stroke, width).
+
+    Captions repeat a lot ("THE", "AND", speaker names), so each distinct caption is
+    rasterized once per process; with a cache_dir it is also kept as a PNG on disk.
+    Returned arrays are read-only and shared between callers.
+    """
+
+    def __init__(self, max_entries=CAPTION_CACHE_SIZE, cache_dir=CAPTION_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text, font, font_size, color, stroke_color, stroke_width, width):
+        payload = json.dumps([text, font, round(float(font_size), 3), color, stroke_color,
+                              round(float(stroke_width), 3), int(width)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def render(self, text, font=None, font_size=60, color="white", stroke_color="black", stroke_width=0, width=540):
+        """render_caption() through the cache (same arguments and result)."""
+        params = dict(font=font, font_size=font_size, color=color,
+                      stroke_color=stroke_color, stroke_width=stroke_width, width=width)
+        if self.max_entries <= 0:
+            return render_caption(text, **params)
+
+        key = self.make_key(text, **params)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+
+        image = self._load(key)
+        if image is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            image = render_caption(text, **params)
+            with self._lock:
+                self.misses += 1
+            self._save(key, image)
+
+        image.setflags(write=False)
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with Image.open(os.path.join(self.cache_dir, f"{key}.png")) as png:
+                return np.array(png.convert("RGBA"))
+        except (FileNotFoundError, OSError):
+            return None
+
+    def _save(self, key, image):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temp name and rename so other processes never read a partial file
+            temp_path = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}.png")
+            Image.fromarray(image).save(temp_path)
+            os.replace(temp_path, os.path.join(self.cache_dir, f"{key}.png"))
+        except Exception as e:
+            logging.warning(f"[CAPTION_CACHE] Could not store caption image: {e}")
+
+    def stats(self):
+        """Hit/miss counters of this process."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries
+        }
+
+
+_caption_cache = None
+
+
+def get_caption_cache():
+    """Shared cache instance configured from CAPTION_CACHE_SIZE / CAPTION_CACHE_DIR."""
+    global _caption_cache
+    if _caption_cache is None:
+        _caption_cache = CaptionImageCache()
+    return _caption_cache
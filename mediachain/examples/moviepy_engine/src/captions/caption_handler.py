@@ -28,4 +28,4 @@ class CaptionHandler:
             font_size=font_size,
             width=width
         )
-        return subtitles_file, caption_clips
\ No newline at end of file
+        return subtitles_file, caption_clips
@@ -8,29 +8,47 @@ from .utils import convert_seconds_to_srt_time
 
 class SubtitleGenerator:
     def __init__(self):
-        self.openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self._openai = None
         self.convert_seconds_to_srt_time = convert_seconds_to_srt_time
         self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+    @property
+    def openai(self):
+        # Created on first use so word-timing captions work without an OpenAI key
+        if self._openai is None:
+            self._openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._openai
+
     async def generate_subtitles(self, audio_file: str):
         try:
             subtitles = await self.speech_to_text(audio_file)
-            srt_file = pysrt.SubRipFile()
-
-            for index, (start, end, text) in enumerate(subtitles):
-                srt_file.append(pysrt.SubRipItem(index=index + 1, start=start, end=end, text=text))
-            
-            unique_id = uuid.uuid4()
-            output_dir = os.path.join(self.base_dir, 'assets')
-            output_file = os.path.join(output_dir, f'subtitles_{unique_id}.srt')
-            srt_file.save(output_file)
-            
-            logging.info("Subtitles generated and saved successfully.")
-            return output_file  # Return the path to the saved SRT file
+            return self.save_subtitles(subtitles)
         except Exception as e:
             logging.error(f"Error generating subtitles: {e}")
             return None
 
+    def generate_subtitles_from_words(self, words):
+        """Build and save subtitles from known word timings ([{"word", "start", "end"}], seconds)."""
+        try:
+            return self.save_subtitles(self.words_to_subtitles(words))
+        except Exception as e:
+            logging.error(f"Error generating subtitles from word timings: {e}")
+            return None
+
+    def save_subtitles(self, subtitles):
+        srt_file = pysrt.SubRipFile()
+
+        for index, (start, end, text) in enumerate(subtitles):
+            srt_file.append(pysrt.SubRipItem(index=index + 1, start=start, end=end, text=text))
+        
+        unique_id = uuid.uuid4()
+        output_dir = os.path.join(self.base_dir, 'assets')
+        output_file = os.path.join(output_dir, f'subtitles_{unique_id}.srt')
+        srt_file.save(output_file)
+        
+        logging.info("Subtitles generated and saved successfully.")
+        return output_file  # Return the path to the saved SRT file
+
     async def speech_to_text(self, audio_file: str):
         try:
             audio_file = open(audio_file, "rb")  # Open the audio file
@@ -40,45 +58,53 @@ class SubtitleGenerator:
                 response_format="verbose_json",
                 timestamp_granularities=["word"]
             )
-            subtitles = []
-            current_words = []
-            subtitle_start_time = None
+            subtitles = self.words_to_subtitles(
+                [{"word": w.word, "start": w.start, "end": w.end} for w in transcript.words]
+            )
 
-            for i, word_info in enumerate(transcript.words):
-                word_start_time = self.convert_seconds_to_srt_time(word_info.start)
-                word_end_time = self.convert_seconds_to_srt_time(word_info.end)
+            logging.info(f"Speech-to-text transcription completed.")
+            return subtitles
+        except Exception as e:
+            logging.error(f"Error in speech-to-text transcription: {e}")
+            return []
 
-                previous_word_end = self.convert_seconds_to_srt_time(transcript.words[i - 1].end)
+    def words_to_subtitles(self, words):
+        """Group word timings ([{"word", "start", "end"}], seconds) into (start, end, text) subtitle entries."""
+        subtitles = []
+        current_words = []
+        subtitle_start_time = None
 
-                if subtitle_start_time is None:
-                    subtitle_start_time = word_start_time
+        for i, word_info in enumerate(words):
+            word_start_time = self.convert_seconds_to_srt_time(word_info["start"])
+            word_end_time = self.convert_seconds_to_srt_time(word_info["end"])
 
-                current_words.append(word_info.word.strip())
+            previous_word_end = self.convert_seconds_to_srt_time(words[i - 1]["end"])
 
-                #check if current subtitle is long enough or if the next word is too long
-                if len(current_words) >= 2 or (i > 0 and word_start_time.ordinal - previous_word_end.ordinal >= 600):
-                    #formatted_text = " ".join(current_words[:1]) + "\n" + " ".join(current_words[1:])
-                    formatted_text = " ".join(current_words)
-                    subtitles.append((subtitle_start_time, word_end_time, formatted_text))
-                    current_words = []
-                    subtitle_start_time = None
+            if subtitle_start_time is None:
+                subtitle_start_time = word_start_time
 
-            # Handle any remaining word
-            if current_words:
-                # Old multi-line approach (commented out)
-                # formatted_text = " ".join(current_words[:1])
-                # if len(current_words) > 1:
-                #     formatted_text += "\n" + " ".join(current_words[1:])
-                
-                # New single-line approach
+            current_words.append(word_info["word"].strip())
+
+            #check if current subtitle is long enough or if the next word is too long
+            if len(current_words) >= 2 or (i > 0 and word_start_time.ordinal - previous_word_end.ordinal >= 600):
+                #formatted_text = " ".join(current_words[:1]) + "\n" + " ".join(current_words[1:])
                 formatted_text = " ".join(current_words)
                 subtitles.append((subtitle_start_time, word_end_time, formatted_text))
+                current_words = []
+                subtitle_start_time = None
+
+        # Handle any remaining word
+        if current_words:
+            # Old multi-line approach (commented out)
+            # formatted_text = " ".join(current_words[:1])
+            # if len(current_words) > 1:
+            #     formatted_text += "\n" + " ".join(current_words[1:])
+            
+            # New single-line approach
+            formatted_text = " ".join(current_words)
+            subtitles.append((subtitle_start_time, word_end_time, formatted_text))
 
-            logging.info(f"Speech-to-text transcription completed.")
-            return subtitles
-        except Exception as e:
-            logging.error(f"Error in speech-to-text transcription: {e}")
-            return []
+        return subtitles
 
     async def generate_subtitles_for_translation(self, audio_file):
         try:
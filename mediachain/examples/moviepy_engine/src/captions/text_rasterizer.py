@@ -0,0 +1,97 @@
+import logging
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# ImageMagick font names used by the captioner, mapped to TrueType files Pillow can find
+FONT_ALIASES = {
+    "Arial-Bold": ["Arial Bold.ttf", "Arial_Bold.ttf", "arialbd.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf"],
+    "Helvetica": ["Helvetica.ttc", "Arial.ttf", "arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"],
+}
+FALLBACK_FONT = os.path.join(FONTS_DIR, "LEMONMILK-Bold.otf")  # Bundled bold sans
+
+_font_cache = {}
+
+
+def load_font(font, size):
+    """Load a font by file path, bundled font file name or ImageMagick-style name."""
+    size = max(1, int(round(size)))
+    key = (font, size)
+    if key in _font_cache:
+        return _font_cache[key]
+
+    candidates = []
+    if font:
+        candidates.append(font)
+        candidates.append(os.path.join(FONTS_DIR, font))
+        candidates.extend(FONT_ALIASES.get(font, []))
+    candidates.append(FALLBACK_FONT)
+
+    loaded = None
+    for candidate in candidates:
+        try:
+            loaded = ImageFont.truetype(candidate, size)
+            break
+        except OSError:
+            continue
+
+    if loaded is None:
+        logging.warning(f"Font {font} not found. Using Pillow's default font.")
+        loaded = ImageFont.load_default(size=size)
+
+    _font_cache[key] = loaded
+    return loaded
+
+
+def wrap_text(text, font, max_width, stroke_width=0):
+    """Greedy word wrap to max_width pixels (a word longer than the width gets its own line)."""
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}" if current else word
+            if current and font.getlength(candidate) + 2 * stroke_width > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return lines
+
+
+def render_caption(text, font=None, font_size=60, color="white", stroke_color="black", stroke_width=0, width=540):
+    """
+    Rasterize centered, wrapped, stroked caption text (what TextClip(method='caption') draws).
+
+    Args:
+        text: Caption text (newlines force line breaks)
+        font: Font file path, bundled font name or ImageMagick font name
+        font_size: Font size in pixels
+        color: Fill color (any PIL color string)
+        stroke_color: Outline color
+        stroke_width: Outline width in pixels
+        width: Image width; the height fits the wrapped text
+
+    Returns:
+        RGBA uint8 array of shape (height, width, 4)
+    """
+    pil_font = load_font(font, font_size)
+    stroke = int(round(stroke_width))
+    width = int(width)
+
+    lines = wrap_text(text, pil_font, width, stroke)
+    ascent, descent = pil_font.getmetrics()
+    line_height = ascent + descent
+    height = line_height * len(lines) + 2 * stroke
+
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        x = (width - pil_font.getlength(line)) / 2
+        y = stroke + i * line_height
+        draw.text((x, y), line, font=pil_font, fill=color, stroke_width=stroke, stroke_fill=stroke_color)
+
+    return np.array(image)
@@ -1,12 +1,18 @@
-from moviepy.editor import TextClip, CompositeVideoClip
+from moviepy.editor import TextClip, CompositeVideoClip, ImageClip
 from moviepy.config import get_setting, change_settings
 import pysrt
 import logging
 import os
 
+from .caption_cache import get_caption_cache
+
+# "pillow" rasterizes captions in-process; "imagemagick" uses TextClip (needs ImageMagick installed)
+CAPTION_RENDERER = os.getenv("CAPTION_RENDERER", "pillow")
+
 class VideoCaptioner:
-    def __init__(self):
+    def __init__(self, renderer=CAPTION_RENDERER):
         self.default_font = self.get_font_path("Dacherry.ttf")
+        self.renderer = renderer
 
     def get_font_path(self, font_name):
         # Look for the font in the 'fonts' directory within the project
@@ -19,6 +25,26 @@ class VideoCaptioner:
             logging.warning(f"Font file {font_name} not found. Using default system font.")
             return None
 
+    @staticmethod
+    def _caption_font(font):
+        if not font or font == 'Helvetica':
+            return 'Arial-Bold'
+        return font
+
+    def caption_image(self, txt, fontsize, font, width):
+        """RGBA array of one caption, same layout as the TextClip in create_shadow_text."""
+        # Drawn with FreeType (no ImageMagick process per caption) and cached,
+        # since the same short phrases come back across captions and renders
+        return get_caption_cache().render(
+            txt,
+            font=self._caption_font(font),
+            font_size=fontsize*1.625,
+            color='yellow',
+            stroke_color='black',
+            stroke_width=fontsize / 25,
+            width=width*1.65
+        )
+
     def create_shadow_text(self, txt, fontsize, font, color, shadow_color, shadow_offset, blur_color, width):
         """ # Create the blurred shadow
         blur_size = int(fontsize * 1.08)  # 10% larger than the main text
@@ -37,10 +63,7 @@ class VideoCaptioner:
         # User requested non-italic, better typography. 'Arial-Bold' is a safe bet for clear captions.
         # If font is passed as 'Helvetica', we override it to 'Arial-Bold' for better look, 
         # or just use what's passed if it's a specific path.
-        if not font or font == 'Helvetica':
-            use_font = 'Arial-Bold' 
-        else:
-            use_font = font
+        use_font = self._caption_font(font)
             
         # User requested: "yellow inside and small black border"
         text_color = 'yellow'
@@ -50,6 +73,9 @@ class VideoCaptioner:
         # Debug logging
         # logging.info(f"Creating TextClip: txt='{txt}', font='{use_font}', color='{text_color}'")
         
+        if self.renderer == "pillow":
+            return ImageClip(self.caption_image(txt, fontsize, font, width), transparent=True)
+        
         text_clip = TextClip(
             txt, 
             fontsize=fontsize*1.625, 
@@ -65,22 +91,8 @@ class VideoCaptioner:
         #return CompositeVideoClip([blur_clip, shadow_clip, text_clip])
         return CompositeVideoClip([text_clip])
 
-    """ Call this function to generate the captions to video """
-    def generate_captions_to_video(self, 
-                                   subtitles_path,
-                                   font=None, 
-                                   captions_color='#BA4A00', 
-                                   shadow_color='white',
-                                   font_size=60,
-                                   width=540
-                                   ):
-        font = self.get_font_path(font) if font else self.default_font
-        
-        # Fallback if default font is also None
-        if not font:
-            font = 'Helvetica'
-            
-        # Check ImageMagick binary
+    def configure_imagemagick(self):
+        # Check ImageMagick binary (only needed by the TextClip renderer)
         try:
             im_binary = get_setting("IMAGEMAGICK_BINARY")
             logging.info(f"IMAGEMAGICK_BINARY: {im_binary}")
@@ -102,33 +114,69 @@ class VideoCaptioner:
         except Exception as e:
             logging.warning(f"Could not configure IMAGEMAGICK_BINARY: {e}")
 
-        try:
-            subtitles = subtitles_path
-            subtitle_clips = []
-            shadow_offset = font_size / 10
+    def _resolve_font(self, font):
+        font = self.get_font_path(font) if font else self.default_font
+        
+        # Fallback if default font is also None
+        if not font:
+            font = 'Helvetica'
+        return font
+
+    def read_subtitles(self, subtitles):
+        """(start_seconds, end_seconds, TEXT) for an SRT path or a list of (start, end, text) tuples."""
+        logging.info(f"Received subtitles: {type(subtitles)}")  # Debug log
+
+        if isinstance(subtitles, str):
+            # If subtitles is a string (file path), read the SRT file
+            subtitles = pysrt.open(subtitles)
+        elif isinstance(subtitles, list):
+            # If subtitles is a list, assume it's a list of tuples (start, end, text)
+            subtitles = [pysrt.SubRipItem(index=i, start=s, end=e, text=t) for i, (s, e, t) in enumerate(subtitles, 1)]
 
-            logging.info(f"Received subtitles: {type(subtitles)}")  # Debug log
+        if not isinstance(subtitles, (pysrt.SubRipFile, list)):
+            raise ValueError(f"Unsupported subtitles format: {type(subtitles)}")
 
-            if isinstance(subtitles, str):
-                # If subtitles is a string (file path), read the SRT file
-                subtitles = pysrt.open(subtitles)
-            elif isinstance(subtitles, list):
-                # If subtitles is a list, assume it's a list of tuples (start, end, text)
-                subtitles = [pysrt.SubRipItem(index=i, start=s, end=e, text=t) for i, (s, e, t) in enumerate(subtitles, 1)]
+        entries = []
+        for subtitle in subtitles:
+            if isinstance(subtitle, pysrt.SubRipItem):
+                start_time, end_time, text = subtitle.start, subtitle.end, subtitle.text.upper()
+            elif isinstance(subtitle, tuple) and len(subtitle) == 3:
+                start_time, end_time, text = subtitle
+                text = text.upper()
+            else:
+                logging.warning(f"Skipping invalid subtitle format: {subtitle}")
+                continue
 
-            if not isinstance(subtitles, (pysrt.SubRipFile, list)):
-                raise ValueError(f"Unsupported subtitles format: {type(subtitles)}")
+            start_seconds = start_time.ordinal / 1000 if hasattr(start_time, 'ordinal') else start_time
+            end_seconds = end_time.ordinal / 1000 if hasattr(end_time, 'ordinal') else end_time
+            entries.append((start_seconds, end_seconds, text))
+        return entries
+
+    def generate_caption_images(self, subtitles_path, font=None, font_size=60, width=540, **style):
+        """Caption images without clips: [(start_seconds, end_seconds, rgba)] (for renderers other than MoviePy)."""
+        font = self._resolve_font(font)
+        return [(start, end, self.caption_image(text, font_size, font, width))
+                for start, end, text in self.read_subtitles(subtitles_path)]
+
+    """ Call this function to generate the captions to video """
+    def generate_captions_to_video(self, 
+                                   subtitles_path,
+                                   font=None, 
+                                   captions_color='#BA4A00', 
+                                   shadow_color='white',
+                                   font_size=60,
+                                   width=540
+                                   ):
+        font = self._resolve_font(font)
+            
+        if self.renderer == "imagemagick":
+            self.configure_imagemagick()
 
-            for subtitle in subtitles:
-                if isinstance(subtitle, pysrt.SubRipItem):
-                    start_time, end_time, text = subtitle.start, subtitle.end, subtitle.text.upper()
-                elif isinstance(subtitle, tuple) and len(subtitle) == 3:
-                    start_time, end_time, text = subtitle
-                    text = text.upper()
-                else:
-                    logging.warning(f"Skipping invalid subtitle format: {subtitle}")
-                    continue
+        try:
+            subtitle_clips = []
+            shadow_offset = font_size / 10
 
+            for start_seconds, end_seconds, text in self.read_subtitles(subtitles_path):
                 shadow_text = self.create_shadow_text(
                     text, 
                     fontsize=font_size, 
@@ -140,8 +188,6 @@ class VideoCaptioner:
                     width=width
                 )
                 
-                start_seconds = start_time.ordinal / 1000 if hasattr(start_time, 'ordinal') else start_time
-                end_seconds = end_time.ordinal / 1000 if hasattr(end_time, 'ordinal') else end_time
                 duration = end_seconds - start_seconds
                 
                 subtitle_clip = (shadow_text
@@ -151,6 +197,8 @@ class VideoCaptioner:
                 subtitle_clips.append(subtitle_clip)
 
             logging.info(f"Generated {len(subtitle_clips)} subtitle clips")  # Debug log
+            if self.renderer == "pillow":
+                logging.info(f"[CAPTION_CACHE] {get_caption_cache().stats()}")
             return subtitle_clips
         except Exception as e:
             logging.error(f"Error adding captions to video: {e}")
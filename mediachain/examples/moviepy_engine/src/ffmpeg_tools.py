@@ -0,0 +1,120 @@
+import bisect
+import logging
+import re
+import subprocess
+
+from moviepy.config import get_setting
+
+
+def ffmpeg_binary():
+    return get_setting("FFMPEG_BINARY")
+
+
+def run_ffmpeg(args, timeout=None):
+    """Run ffmpeg with the given arguments; raises CalledProcessError (with stderr) on failure."""
+    return subprocess.run(
+        [ffmpeg_binary(), "-hide_banner", "-nostdin"] + list(args),
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=timeout
+    )
+
+
+def _input_info(video_path):
+    # ffmpeg exits non-zero without an output file, but still prints the input info
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-nostdin", "-i", video_path],
+                            capture_output=True, text=True)
+    return result.stderr
+
+
+def _parse_duration(info):
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", info)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_duration(video_path):
+    """Container duration in seconds (parsed from ffmpeg's input banner), or None."""
+    return _parse_duration(_input_info(video_path))
+
+
+def probe_video(video_path):
+    """
+    Duration, display resolution, fps and codec of the first video stream (from ffmpeg's input banner).
+
+    Returns:
+        {"duration", "width", "height", "fps", "codec"}, or None if there is no video stream
+    """
+    info = _input_info(video_path)
+    stream = re.search(r"Stream #\S+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})[, \[].*", info)
+    if not stream:
+        return None
+
+    codec, width, height = stream.group(1), int(stream.group(2)), int(stream.group(3))
+    fps = re.search(r"(\d+(?:\.\d+)?) fps", stream.group(0)) or re.search(r"(\d+(?:\.\d+)?) tbr", stream.group(0))
+    # Phone videos store portrait as landscape + rotation; MoviePy reports the rotated size
+    rotation = re.search(r"rotation of (-?\d+(?:\.\d+)?) degrees", info) or re.search(r"rotate\s*:\s*(-?\d+)", info)
+    if rotation and abs(round(float(rotation.group(1)))) % 180 == 90:
+        width, height = height, width
+
+    return {
+        "duration": _parse_duration(info),
+        "width": width,
+        "height": height,
+        "fps": float(fps.group(1)) if fps else None,
+        "codec": codec
+    }
+
+
+def probe_keyframes(video_path):
+    """
+    Timestamps (seconds) of the video keyframes.
+
+    Only keyframes are decoded (-skip_frame nokey), so this is fast even for long videos.
+    """
+    result = run_ffmpeg([
+        "-skip_frame", "nokey", "-i", video_path,
+        "-map", "0:v:0", "-an", "-vf", "showinfo", "-f", "null", "-"
+    ])
+    times = [float(t) for t in re.findall(r"pts_time:\s*(-?\d+(?:\.\d+)?)", result.stderr)]
+    return sorted(set(times))
+
+
+def keyframe_at_or_before(keyframes, time):
+    """Latest keyframe not after `time` (the first keyframe if none is)."""
+    if not keyframes:
+        return 0.0
+    index = bisect.bisect_right(keyframes, time + 1e-6) - 1
+    return keyframes[max(index, 0)]
+
+
+def stream_copy_cut(video_path, start_time, duration, output_path):
+    """
+    Cut [start_time, start_time + duration) without re-encoding.
+
+    start_time should be a keyframe (see keyframe_at_or_before); with input seeking and
+    stream copy, ffmpeg starts the output at the keyframe at or before it.
+    """
+    logging.info(f"[FFMPEG] Stream copy cut {start_time:.2f}s +{duration:.2f}s -> {output_path}")
+    run_ffmpeg([
+        "-y", "-ss", f"{start_time:.3f}", "-i", video_path,
+        "-t", f"{duration:.3f}", "-map", "0:v:0", "-map", "0:a?",
+        "-c", "copy", "-avoid_negative_ts", "make_zero", "-movflags", "+faststart",
+        output_path
+    ])
+    return output_path
+
+
+def stream_loop_copy(video_path, duration, output_path):
+    """Loop a video to `duration` seconds with -stream_loop, copying the streams (no re-encode)."""
+    logging.info(f"[FFMPEG] Stream copy loop to {duration:.2f}s -> {output_path}")
+    run_ffmpeg([
+        "-y", "-stream_loop", "-1", "-i", video_path,
+        "-t", f"{duration:.3f}", "-map", "0:v:0", "-map", "0:a?",
+        "-c", "copy", "-fflags", "+genpts", "-movflags", "+faststart",
+        output_path
+    ])
+    return output_path
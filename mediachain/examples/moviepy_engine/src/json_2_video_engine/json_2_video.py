@@ -1,8 +1,10 @@
 import json
 import os
+import asyncio
 import logging
 import uuid
 import math
+from concurrent.futures import ThreadPoolExecutor
 
 from moviepy.editor import VideoFileClip, ImageClip, AudioFileClip, TextClip, CompositeVideoClip, CompositeAudioClip, ColorClip, concatenate_audioclips
 
@@ -13,6 +15,32 @@ from .utils.llm_calls import generate_voice
 from .utils.images_generation import search_pexels_images, search_pixabay_images, download_image, generate_image_pollinations
 
 from ..captions.caption_handler import CaptionHandler
+from ..render_profiles import get_render_profile, scale_clip, write_videofile_args
+
+IMAGE_HEDGE_DELAY = float(os.getenv("IMAGE_HEDGE_DELAY", "3"))  # Seconds before a slow image source is hedged with the next one
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))  # Image source requests in flight at once
+
+
+def _fetch_image_from_source(search, query, max_size=None):
+    """Look up an image with one source and download it (runs on a worker thread)."""
+    image_urls = search(query)
+    if not image_urls:
+        return None
+    image_path = download_image(image_urls[0], max_size)
+    if image_path and os.path.getsize(image_path) > 0:
+        return image_path
+    return None
+
+
+def _discard_fetched_image(future):
+    """Delete the image of a hedged request that finished after another source won."""
+    if future.cancelled() or future.exception() or not future.result():
+        return
+    try:
+        os.remove(future.result())
+    except OSError:
+        pass
+
 
 class PyJson2Video:
 
@@ -114,94 +142,152 @@ class PyJson2Video:
     async def parse_images(self):
         resolution = self.data.get('extra_args', {}).get('resolution', {'width': 1920, 'height': 1080})
         max_width, max_height = resolution['width'], resolution['height']
+        images = self.data.get('images', [])
+        if not images:
+            return
 
-        for image in self.data.get('images', []):
-            source_type = image.get('source_type', 'prompt')
+        # Every image is fetched at once; gather keeps the JSON order of the clips
+        executor = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS)
+        try:
+            clips = await asyncio.gather(*(
+                self._load_image(image, executor, max_width, max_height) for image in images
+            ))
+        finally:
+            # Don't wait for hedged requests that lost the race
+            executor.shutdown(wait=False)
+        self.video_clips.extend(clip for clip in clips if clip is not None)
+
+    async def _load_image(self, image, executor, max_width, max_height):
+        source_type = image.get('source_type', 'prompt')
+        loop = asyncio.get_running_loop()
+        # Images are never shown larger than the frame (plus the 10% zoom), so downloads are stored at most that big
+        download_size = (math.ceil(max_width * 1.1), math.ceil(max_height * 1.1))
+        
+        try:
+            # Get image source
+            image_source = None
             
-            try:
-                # Get image source
-                image_source = None
-                image_urls = []
-                
-                if source_type == 'path':
-                    image_source = image['source_content']
-                elif source_type == 'prompt':
-                    query = image['source_content']
-                    # Try different image sources in sequence
-                    image_urls = generate_image_pollinations(query)
-                    if not image_urls:
-                        logger.info("Trying Pexels as fallback...")
-                        image_urls = search_pexels_images(query)
-                    if not image_urls:
-                        logger.info("Trying Pixabay as final fallback...")
-                        image_urls = search_pixabay_images(query)
-                    
-                    if image_urls:
-                        image_source = download_image(image_urls[0])
-                        if image_source:
-                            self.temp_files.append(image_source)  # Track downloaded image
-                    else:
-                        logger.error(f"No images found for prompt: {query}")
-                        continue
-                elif source_type == 'url':
-                    image_source = download_image(image['source_content'])
-                    if image_source:
-                        self.temp_files.append(image_source)  # Track downloaded image
-
-                # Create and process the image clip
-                clip = ImageClip(image_source)
-                
-                # Handle 'full' argument and determine target dimensions
-                if image.get('max_width') == 'full':
-                    target_width = max_width
+            if source_type == 'path':
+                image_source = image['source_content']
+            elif source_type == 'prompt':
+                query = image['source_content']
+                image_source = await self._hedged_image_fetch(query, executor, download_size)
+                if image_source:
+                    self.temp_files.append(image_source)  # Track downloaded image
                 else:
-                    target_width = min(int(image.get('max_width', max_width)), max_width)
+                    logger.error(f"No images found for prompt: {query}")
+                    return None
+            elif source_type == 'url':
+                image_source = await loop.run_in_executor(executor, download_image, image['source_content'], download_size)
+                if image_source:
+                    self.temp_files.append(image_source)  # Track downloaded image
+
+            # Create and process the image clip
+            clip = ImageClip(image_source)
+
+            # Handle 'full' argument and determine target dimensions
+            if image.get('max_width') == 'full':
+                target_width = max_width
+            else:
+                target_width = min(int(image.get('max_width', max_width)), max_width)
 
-                if image.get('max_height') == 'full':
-                    target_height = max_height
-                else:
-                    target_height = min(int(image.get('max_height', max_height)), max_height)
+            if image.get('max_height') == 'full':
+                target_height = max_height
+            else:
+                target_height = min(int(image.get('max_height', max_height)), max_height)
+
+            # Calculate the scaling factor to maintain aspect ratio with 10% zoom
+            width_ratio = (target_width / clip.w) * 1.1  # 10% zoom
+            height_ratio = (target_height / clip.h) * 1.1  # 10% zoom
+            scale_factor = min(width_ratio, height_ratio)
+
+            # Resize the clip with zoom
+            new_width = math.ceil(clip.w * scale_factor)
+            new_height = math.ceil(clip.h * scale_factor)
+            clip = clip.resize(width=new_width, height=new_height)
+
+            # Handle position
+            position = image.get('position', [50, 50]) # Default to center if not specified
+            if isinstance(position, list) and len(position) == 2:
+                # Convert position to relative coordinates
+                rel_x = position[0] / 100 * max_width
+                rel_y = position[1] / 100 * max_height
+
+                # Adjust position to center the image
+                center_x = rel_x - new_width / 2
+                center_y = rel_y - new_height / 2
+
+                clip = clip.set_position((center_x, center_y))
+            else:
+                logger.warning(f"Invalid position for image {image.get('image_path')}: {position}")
+                clip = clip.set_position('center')
 
-                # Calculate the scaling factor to maintain aspect ratio with 10% zoom
-                width_ratio = (target_width / clip.w) * 1.1  # 10% zoom
-                height_ratio = (target_height / clip.h) * 1.1  # 10% zoom
-                scale_factor = min(width_ratio, height_ratio)
+            clip = clip.set_opacity(float(image.get('opacity', 1.0)))
+            if 'rotation' in image:
+                clip = clip.rotate(float(image.get('rotation', 0)))
 
-                # Resize the clip with zoom
-                new_width = math.ceil(clip.w * scale_factor)
-                new_height = math.ceil(clip.h * scale_factor)
-                clip = clip.resize(width=new_width, height=new_height)
-                
-                # Handle position
-                position = image.get('position', [50, 50]) # Default to center if not specified
-                if isinstance(position, list) and len(position) == 2:
-                    # Convert position to relative coordinates
-                    rel_x = position[0] / 100 * max_width
-                    rel_y = position[1] / 100 * max_height
-                    
-                    # Adjust position to center the image
-                    center_x = rel_x - new_width / 2
-                    center_y = rel_y - new_height / 2
-                    
-                    clip = clip.set_position((center_x, center_y))
-                else:
-                    logger.warning(f"Invalid position for image {image.get('image_path')}: {position}")
-                    clip = clip.set_position('center')
+            start_time = self._get_time(image, 'start_time')
+            end_time = self._get_time(image, 'end_time')
 
-                clip = clip.set_opacity(float(image.get('opacity', 1.0)))
-                if 'rotation' in image:
-                    clip = clip.rotate(float(image.get('rotation', 0)))
-                
-                start_time = self._get_time(image, 'start_time')
-                end_time = self._get_time(image, 'end_time')
-                
-                clip = clip.set_start(start_time).set_duration(end_time - start_time)
+            clip = clip.set_start(start_time).set_duration(end_time - start_time)
 
-                self.video_clips.append(clip)
-                logger.info(f"Image {image.get('source_content')} added to video clips, start time: {start_time}, end time: {end_time}")
-            except Exception as e:
-                logger.error(f"Error processing image {image.get('image_id', 'unknown')}: {str(e)}")
-                continue
+            logger.info(f"Image {image.get('source_content')} added to video clips, start time: {start_time}, end time: {end_time}")
+            return clip
+        except Exception as e:
+            logger.error(f"Error processing image {image.get('image_id', 'unknown')}: {str(e)}")
+            return None
+
+    async def _hedged_image_fetch(self, query, executor, max_size=None):
+        """
+        Fetch an image for a prompt from Pollinations, hedged with Pexels and Pixabay.
+
+        The primary source starts right away; each fallback starts after IMAGE_HEDGE_DELAY
+        seconds, or as soon as the sources before it have failed. The first downloaded
+        image wins and the other requests are abandoned (their files are deleted).
+
+        Returns:
+            Path of the downloaded image, or None if no source returned one
+        """
+        sources = [
+            ("Pollinations", generate_image_pollinations),
+            ("Pexels", search_pexels_images),
+            ("Pixabay", search_pixabay_images)
+        ]
+        pending = {}
+        next_source = 0
+
+        def launch():
+            nonlocal next_source
+            name, search = sources[next_source]
+            next_source += 1
+            if next_source > 1:
+                logger.info(f"Trying {name} for '{query}'...")
+            future = executor.submit(_fetch_image_from_source, search, query, max_size)
+            pending[asyncio.wrap_future(future)] = (name, future)
+
+        launch()
+        try:
+            while pending:
+                hedge = IMAGE_HEDGE_DELAY if next_source < len(sources) else None
+                done, _ = await asyncio.wait(pending, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The sources in flight are slow: hedge with the next one
+                    launch()
+                    continue
+                for finished in done:
+                    name, _ = pending.pop(finished)
+                    image_path = None if finished.exception() else finished.result()
+                    if image_path:
+                        logger.info(f"Image for '{query}' from {name}")
+                        return image_path
+                    logger.info(f"{name} returned no image for '{query}': {finished.exception() or 'no results'}")
+                if not pending and next_source < len(sources):
+                    launch()
+            return None
+        finally:
+            for waiter, (name, future) in pending.items():
+                waiter.cancel()
+                future.add_done_callback(_discard_fetched_image)
 
     def parse_audio(self):
         for audio in self.data.get('audio', []):
@@ -400,14 +486,11 @@ class PyJson2Video:
                 final_audio = CompositeAudioClip(self.audio_clips)
                 final_clip = final_clip.set_audio(final_audio)
             
-            # Write the final video file
-            final_clip.write_videofile(
-                self.output_video_path,
-                fps=30,
-                codec='libx264',
-                preset='veryfast',
-                audio_codec='aac'
-            )
+            # Write the final video file with the requested render profile
+            profile = get_render_profile(extra_args.get('render_profile'))
+            logger.info(f"Rendering with the '{profile['name']}' profile")
+            final_clip = scale_clip(final_clip, profile)
+            final_clip.write_videofile(self.output_video_path, **write_videofile_args(profile))
 
             # Close all clips to free up resources
             final_clip.close()
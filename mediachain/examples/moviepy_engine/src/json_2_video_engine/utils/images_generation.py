@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 from openai import OpenAI
 import requests
 
+from core.image.utils.image_cache import get_image_cache
+from core.utils.provider_clients import get_provider_clients
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -12,14 +15,18 @@ openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 pexels_api_key = os.getenv("PEXELS_API_KEY")
 pixabay_api_key = os.getenv("PIXABAY_API_KEY") or ''
 
-def download_image(image_url):
-    response = requests.get(image_url, timeout=15)
+def download_image(image_url, max_size=None):
+    """Download an image (through the image cache), shrunk to fit max_size=(width, height) if given."""
     #save the image to the assets folder
     assets_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'images')
     os.makedirs(assets_dir, exist_ok=True)
-    image_path = os.path.join(assets_dir, f"{uuid.uuid4()}.jpg")
-    with open(image_path, 'wb') as f:
-        f.write(response.content)
+    image_path = os.path.join(assets_dir, f"{uuid.uuid4()}.png")
+    # Pollinations URLs carry prompt, size and seed, so the URL (and the size bound) is the cache key
+    cache = get_image_cache()
+    width, height = max_size or (None, None)
+    # Stock originals can be 6000px+: store them at most at max_size (JPEGs stay JPEG)
+    image_path = cache.fetch(cache.make_key("url", image_url, width, height), image_url, image_path,
+                             max_size=max_size, timeout=15)
     
     logging.info(f"Downloaded image to: {image_path}")
     return image_path
@@ -60,7 +67,7 @@ def generate_image_pollinations(query, width=540, height=960, model=None, seed=N
         generate_url = f"https://image.pollinations.ai/prompt/{encoded_query}"
 
         full_url = requests.Request('GET', generate_url, params=params).prepare().url
-        response = requests.get(full_url, timeout=timeout)
+        response = get_provider_clients().http().get(full_url, timeout=timeout)
         
         if response.status_code == 200:
             # Validate URL before returning
@@ -90,7 +97,7 @@ def search_pexels_images(query):
     }
     
     try:
-        response = requests.get(search_url, headers=headers, params=params)
+        response = get_provider_clients().http().get(search_url, headers=headers, params=params, timeout=15)
         response.raise_for_status()  # Raise an error for bad responses
     except requests.exceptions.HTTPError as e:
         logging.error(f"HTTP error occurred: {e}")  # Log the error
@@ -101,7 +108,7 @@ def search_pexels_images(query):
 
     search_results = response.json()
     image_urls = [photo['src']['original'] for photo in search_results.get('photos', [])]  # Extract image URLs
-    return image_urls[0]
+    return image_urls
 
 def search_pixabay_images(query):
     """Search for images using Pixabay API and return the URLs."""
@@ -115,7 +122,7 @@ def search_pixabay_images(query):
     }
         
     try:
-        response = requests.get(search_url, params=params)
+        response = get_provider_clients().http().get(search_url, params=params, timeout=15)
         response.raise_for_status()  # Raise an error for bad responses
     except requests.exceptions.HTTPError as e:
         logging.error(f"HTTP error occurred: {e}")  # Log the error
@@ -126,5 +133,5 @@ def search_pixabay_images(query):
 
     search_results = response.json()
     image_urls = [hit['largeImageURL'] for hit in search_results.get('hits', [])]  # Extract image URLs
-    return image_urls[0]
+    return image_urls
 
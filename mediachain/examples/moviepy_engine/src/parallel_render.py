@@ -0,0 +1,127 @@
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .ffmpeg_tools import run_ffmpeg
+
+GOP_SECONDS = 2  # Segments start on multiples of this, and every segment starts with a keyframe
+
+
+def segment_bounds(duration, fps, segments, gop_seconds=GOP_SECONDS):
+    """
+    Split [0, duration) into up to `segments` frame ranges whose starts fall on GOP boundaries.
+
+    Returns:
+        List of (first_frame, end_frame) pairs covering every frame
+    """
+    total_frames = max(1, int(round(duration * fps)))
+    gop_frames = max(1, int(round(gop_seconds * fps)))
+    gops = math.ceil(total_frames / gop_frames)
+    segments = max(1, min(segments, gops))
+
+    bounds = [min(round(i * gops / segments) * gop_frames, total_frames) for i in range(segments + 1)]
+    bounds[-1] = total_frames
+    return [(bounds[i], bounds[i + 1]) for i in range(segments) if bounds[i + 1] > bounds[i]]
+
+
+def _render_segment(build_clip, build_arg, first_frame, end_frame, fps, chunk_path, preset, ffmpeg_params, threads):
+    """Worker: rebuild the composite and encode one frame range, video only."""
+    logging.basicConfig(level=logging.INFO)
+    clip, resources = build_clip(build_arg)
+    try:
+        # Stop half a frame early so MoviePy emits exactly end_frame - first_frame frames
+        part = clip.subclip(first_frame / fps, end_frame / fps - 0.5 / fps).without_audio()
+        part.write_videofile(
+            chunk_path,
+            fps=fps,
+            codec='libx264',
+            preset=preset,
+            audio=False,
+            threads=threads,
+            ffmpeg_params=list(ffmpeg_params or []),
+            logger=None
+        )
+        return chunk_path
+    finally:
+        for resource in resources:
+            resource.close()
+
+
+def render_parallel(build_clip, build_arg, output_path, segments, fps=30, preset='medium', ffmpeg_params=None,
+                    audio_codec='aac', audio_bitrate=None, gop_seconds=GOP_SECONDS, cpu_budget=None, on_progress=None):
+    """
+    Render a composite in time segments on separate processes and join them without re-encoding.
+
+    Every worker calls build_clip(build_arg) to get the same composite, encodes its frame range
+    (starting on a GOP boundary, so each chunk starts with a keyframe) and the chunks are joined
+    with the ffmpeg concat demuxer. The audio is encoded once over the whole timeline and muxed
+    in at the end, so it has no seams at segment boundaries.
+
+    Args:
+        build_clip: Module-level function build_clip(build_arg) -> (clip, resources_to_close)
+        build_arg: Picklable argument for build_clip
+        output_path: Final .mp4 path
+        segments: Number of segments (and worker processes), at most cpu_budget
+        fps: Output frame rate
+        preset: x264 preset
+        ffmpeg_params: Extra encoder parameters (e.g. ['-crf', '23'])
+        audio_codec: Audio codec of the final file
+        audio_bitrate: Audio bitrate (e.g. '128k')
+        gop_seconds: GOP length; segment starts are multiples of it
+        cpu_budget: Cores this render may use, shared by the segment processes and their
+            encoder threads (default: all cores; pass the render worker's share when several
+            renders run at once)
+        on_progress: Optional callback(segments_done, segments_total)
+
+    Returns:
+        output_path
+    """
+    cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+    clip, resources = build_clip(build_arg)
+    work_dir = tempfile.mkdtemp(prefix="parallel_render_")
+    try:
+        bounds = segment_bounds(clip.duration, fps, min(segments, cpu_budget), gop_seconds)
+        gop_frames = str(max(1, int(round(gop_seconds * fps))))
+        encoder_params = list(ffmpeg_params or []) + ['-g', gop_frames, '-keyint_min', gop_frames, '-sc_threshold', '0']
+        threads = max(1, cpu_budget // len(bounds))
+        logging.info(f"[PARALLEL_RENDER] Rendering {clip.duration:.2f}s in {len(bounds)} segments ({threads} encoder threads each)")
+
+        chunk_paths = [os.path.join(work_dir, f"segment_{i:03d}.mp4") for i in range(len(bounds))]
+        with ProcessPoolExecutor(max_workers=len(bounds), mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(_render_segment, build_clip, build_arg, first, end, fps, chunk_path,
+                                preset, encoder_params, threads)
+                for (first, end), chunk_path in zip(bounds, chunk_paths)
+            ]
+            # While the segments render, encode the audio once for the whole timeline
+            audio_path = None
+            if clip.audio is not None:
+                audio_path = os.path.join(work_dir, "audio.m4a")
+                clip.audio.write_audiofile(audio_path, fps=44100, codec=audio_codec, bitrate=audio_bitrate, logger=None)
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                logging.info(f"[PARALLEL_RENDER] Segment {done}/{len(bounds)} done")
+                if on_progress:
+                    on_progress(done, len(bounds))
+
+        list_path = os.path.join(work_dir, "segments.txt")
+        with open(list_path, "w") as f:
+            for chunk_path in chunk_paths:
+                f.write(f"file '{chunk_path}'\n")
+
+        args = ["-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            args += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+        args += ["-c", "copy", "-movflags", "+faststart", output_path]
+        run_ffmpeg(args)
+
+        logging.info(f"[PARALLEL_RENDER] ✓ Joined {len(bounds)} segments: {output_path}")
+        return output_path
+    finally:
+        for resource in resources:
+            resource.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,98 @@
+import os
+
+# Encoder settings per use: draft (near-instant previews), preview (quick review) and
+# publish (final upload). max_height downscales taller videos, keeping the aspect ratio.
+RENDER_PROFILES = {
+    "draft": {
+        "preset": "ultrafast",
+        "crf": 32,
+        "max_height": 480,
+        "fps": 15,
+        "threads": 2,
+        "audio_bitrate": "64k",
+        "maxrate": None,
+        "bufsize": None
+    },
+    "preview": {
+        "preset": "veryfast",
+        "crf": 27,
+        "max_height": 960,
+        "fps": 30,
+        "threads": 4,
+        "audio_bitrate": "96k",
+        "maxrate": None,
+        "bufsize": None
+    },
+    "publish": {
+        "preset": "medium",
+        "crf": 21,
+        "max_height": 1920,
+        "fps": 30,
+        "threads": 4,
+        "audio_bitrate": "128k",
+        # Capped so a 90s Reel stays around 90 MB, well within Instagram's upload limits
+        "maxrate": "8M",
+        "bufsize": "16M"
+    }
+}
+
+RENDER_PROFILE = os.getenv("RENDER_PROFILE", "publish")  # Profile used when a request doesn't pick one
+
+
+def get_render_profile(profile=None):
+    """
+    Resolve a render profile.
+
+    Args:
+        profile: Profile name, a profile dict (returned as is) or None for RENDER_PROFILE
+
+    Returns:
+        Profile dict, including its "name"
+
+    Raises:
+        ValueError: Unknown profile name
+    """
+    if isinstance(profile, dict):
+        return profile
+    name = profile or RENDER_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (expected one of: {', '.join(RENDER_PROFILES)})")
+    return dict(RENDER_PROFILES[name], name=name)
+
+
+def output_size(width, height, profile):
+    """Frame size for a profile: downscaled to max_height if taller, rounded down to even numbers."""
+    max_height = profile.get("max_height")
+    if max_height and height > max_height:
+        width = width * max_height / height
+        height = max_height
+    return int(width) // 2 * 2, int(height) // 2 * 2
+
+
+def scale_clip(clip, profile):
+    """Resize a MoviePy clip to the profile's output size (no-op if it already fits)."""
+    size = output_size(clip.w, clip.h, profile)
+    if size == tuple(clip.size):
+        return clip
+    return clip.resize(newsize=size)
+
+
+def encoder_params(profile):
+    """Extra x264 parameters (quality, pixel format and bitrate cap)."""
+    params = ['-crf', str(profile["crf"]), '-pix_fmt', 'yuv420p']
+    if profile.get("maxrate"):
+        params += ['-maxrate', profile["maxrate"], '-bufsize', profile["bufsize"]]
+    return params
+
+
+def write_videofile_args(profile):
+    """Keyword arguments for MoviePy's write_videofile."""
+    return {
+        "codec": 'libx264',
+        "preset": profile["preset"],
+        "fps": profile["fps"],
+        "threads": profile["threads"],
+        "audio_codec": 'aac',
+        "audio_bitrate": profile["audio_bitrate"],
+        "ffmpeg_params": encoder_params(profile)
+    }
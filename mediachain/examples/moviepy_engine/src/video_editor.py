@@ -1,8 +1,7 @@
 import os
+import asyncio
 import logging
-import requests
 from moviepy.editor import VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip, ImageClip
-from openai import OpenAI
 import pysrt
 from yt_dlp import YoutubeDL
 from pathlib import Path
@@ -14,7 +13,13 @@ from dotenv import load_dotenv
 
 # MEDIACHAIN
 from core.image.generation.image_generation import generate_image
-from core.image.utils.enhace_prompt import enhance_prompt
+from core.image.utils.enhace_prompt import enhance_prompts
+from core.image.utils.image_cache import get_image_cache
+from core.utils.provider_clients import get_provider_clients
+
+from .ffmpeg_tools import keyframe_at_or_before, stream_copy_cut, stream_loop_copy
+from .video_metadata import get_video_index
+from .render_profiles import get_render_profile, scale_clip, write_videofile_args
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,34 +28,39 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
 openai_api_key = os.getenv('OPENAI_API_KEY')
+IMAGE_MAX_CONCURRENCY = int(os.getenv("IMAGE_MAX_CONCURRENCY", "4"))  # Images enhanced/generated/downloaded at once
 
 def download_image(image_url):
     try:
-        response = requests.get(image_url)
-        if response.status_code == 200:
-            # Create a unique filename for the image in temp directory
-            unique_id = uuid.uuid4()
-            temp_dir = os.path.join('/tmp', 'moviepy')  # For Unix-like systems
-            os.makedirs(temp_dir, exist_ok=True)
-            image_path = os.path.join(temp_dir, f"image_{unique_id}.png")
-            
-            # Save the image content
-            with open(image_path, 'wb') as f:
-                f.write(response.content)
-            
-            return image_path
-        else:
-            logging.error(f"Failed to download image. Status code: {response.status_code}")
-            return None
+        # generate_image already returns a local copy when the image cache is enabled
+        if os.path.exists(image_url):
+            return image_url
+        
+        # Create a unique filename for the image in temp directory
+        unique_id = uuid.uuid4()
+        temp_dir = os.path.join('/tmp', 'moviepy')  # For Unix-like systems
+        os.makedirs(temp_dir, exist_ok=True)
+        image_path = os.path.join(temp_dir, f"image_{unique_id}.png")
+        
+        # Served from the image cache when this URL was downloaded before
+        cache = get_image_cache()
+        return cache.fetch(cache.make_key("url", image_url), image_url, image_path, timeout=120)
     except Exception as e:
         logging.error(f"Error downloading image: {e}")
         return None
 
 class VideoEditor:
     def __init__(self):
-        self.openai = OpenAI(api_key=openai_api_key)
+        self._openai = None
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
 
+    @property
+    def openai(self):
+        # Created on first use so renders that don't call OpenAI work without a key
+        if self._openai is None:
+            self._openai = get_provider_clients().openai(openai_api_key)
+        return self._openai
+
     def download_video(self, youtube_url, quality="480"):
         try:
             downloads_dir = os.path.join(self.base_dir, '..', 'downloads')
@@ -90,7 +100,20 @@ class VideoEditor:
             logging.error(f"Error downloading video: {e}")
             return None
 
-    def cut_video(self, video_path, start_time, end_time):
+    def cut_video(self, video_path, start_time, end_time, stream_copy=True):
+        """Cut [start_time, end_time] out of a video into assets/.
+        
+        Args:
+            video_path: Path to the video file
+            start_time: Start of the cut in seconds
+            end_time: End of the cut in seconds
+            stream_copy: Copy the streams from the keyframe at or before start_time
+                (no re-encode; the cut keeps its duration but may start slightly earlier).
+                Falls back to a re-encoded cut if that fails.
+            
+        Returns:
+            Path to the cut video file
+        """
         if not os.path.exists(video_path):
             logging.error(f"Video file does not exist, {video_path}")
             return None
@@ -103,6 +126,12 @@ class VideoEditor:
             os.makedirs(assets_dir, exist_ok=True)
             output_path = os.path.join(assets_dir, f"cut_video_{unique_id}.mp4")
             
+            if stream_copy:
+                cut_path = self._stream_copy_cut(video_path, start_time, end_time, output_path)
+                if cut_path:
+                    return cut_path
+                logging.warning(f"[CUT_VIDEO] Stream copy failed, falling back to re-encoding")
+            
             clip = VideoFileClip(video_path)
             clip_duration = clip.duration
             logging.info(f"[CUT_VIDEO] Original video duration: {clip_duration:.2f}s")
@@ -132,6 +161,32 @@ class VideoEditor:
             logging.error(f"[CUT_VIDEO] Error cutting video: {e}", exc_info=True)
             return None
 
+    def _stream_copy_cut(self, video_path, start_time, end_time, output_path):
+        try:
+            metadata = get_video_index().get(video_path, keyframes=True)
+            if metadata is None or metadata["duration"] is None:
+                return None
+            clip_duration = metadata["duration"]
+            
+            duration = min(end_time, clip_duration) - max(start_time, 0)
+            if duration <= 0:
+                logging.error(f"[CUT_VIDEO] Invalid cut times: start ({start_time:.2f}s) >= end ({end_time:.2f}s)")
+                return None
+            
+            # Snap to the keyframe at or before the requested start so the copy starts cleanly;
+            # keeping the duration means the cut still ends within the source
+            keyframe_start = keyframe_at_or_before(metadata["keyframes"], max(start_time, 0))
+            logging.info(f"[CUT_VIDEO] Keyframe-aligned start: {keyframe_start:.2f}s (requested {start_time:.2f}s)")
+            
+            stream_copy_cut(video_path, keyframe_start, duration, output_path)
+            logging.info(f"[CUT_VIDEO] ✓ Video cut (stream copy): {output_path}")
+            return output_path
+        except Exception as e:
+            logging.warning(f"[CUT_VIDEO] Stream copy cut failed: {e}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return None
+
     def load_subtitles(self, subtitles_path):
         try:
             return pysrt.open(subtitles_path)  # Return the loaded SRT file with start and end times
@@ -151,12 +206,32 @@ class VideoEditor:
             logging.error(f"Error adding audio to video: {e}")
             return None
     
-    def loop_video_to_duration(self, video_path: str, target_duration: float) -> str:
+    def loop_clip_to_duration(self, clip: VideoFileClip, target_duration: float) -> VideoFileClip:
+        """Loop a clip to a target duration without writing a file.
+        
+        The looped clip maps time modulo the source duration, so frames are read
+        straight from the source during the final render.
+        
+        Args:
+            clip: Source clip (closing the looped clip closes its reader)
+            target_duration: Desired duration in seconds
+            
+        Returns:
+            Looped clip of exactly target_duration
+        """
+        from moviepy.video.fx.loop import loop
+        
+        logging.info(f"[LOOP_VIDEO] Virtually looping {clip.duration:.2f}s clip to {target_duration:.2f}s")
+        return clip.fx(loop, duration=target_duration)
+    
+    def loop_video_to_duration(self, video_path: str, target_duration: float, stream_copy: bool = True) -> str:
         """Loop a video to meet a target duration.
         
         Args:
             video_path: Path to the video file
             target_duration: Desired duration in seconds
+            stream_copy: Loop with ffmpeg -stream_loop and stream copy (no re-encode);
+                falls back to concatenating and re-encoding if that fails
             
         Returns:
             Path to the looped video file
@@ -165,6 +240,19 @@ class VideoEditor:
             logging.info(f"[LOOP_VIDEO] Starting video loop operation")
             logging.info(f"[LOOP_VIDEO] Target duration: {target_duration:.2f}s")
             
+            unique_id = uuid.uuid4()
+            assets_dir = os.path.join(self.base_dir, '..', 'assets')
+            os.makedirs(assets_dir, exist_ok=True)
+            output_path = os.path.join(assets_dir, f"looped_video_{unique_id}.mp4")
+            
+            if stream_copy:
+                try:
+                    stream_loop_copy(video_path, target_duration, output_path)
+                    logging.info(f"[LOOP_VIDEO] ✓ Video looped (stream copy): {output_path}")
+                    return output_path
+                except Exception as e:
+                    logging.warning(f"[LOOP_VIDEO] Stream copy loop failed, falling back to re-encoding: {e}")
+            
             # Load the original video
             clip = VideoFileClip(video_path)
             original_duration = clip.duration
@@ -184,11 +272,6 @@ class VideoEditor:
             final_clip = looped_clip.subclip(0, target_duration)
             
             # Save the looped video
-            unique_id = uuid.uuid4()
-            assets_dir = os.path.join(self.base_dir, '..', 'assets')
-            os.makedirs(assets_dir, exist_ok=True)
-            output_path = os.path.join(assets_dir, f"looped_video_{unique_id}.mp4")
-            
             logging.info(f"[LOOP_VIDEO] Writing looped video to: {output_path}")
             final_clip.write_videofile(output_path, logger=None)
             
@@ -243,6 +326,27 @@ class VideoEditor:
             logging.error(f"Error adding captions to video: {e}")
             return None
 
+    async def _prepare_image(self, image_object, semaphore):
+        """Generate and download one image from its enhanced prompt.
+        
+        Sets "image_url" and "image_path" on image_object;
+        image_path is None if the image could not be generated.
+        """
+        image_object["image_url"] = None
+        image_object["image_path"] = None
+        async with semaphore:
+            try:
+                # Cached on the raw prompt: the enhanced one is rewritten by the LLM on every run
+                image_object["image_url"] = await generate_image(service="pollinations", prompt=image_object["enhanced_prompt"],
+                                                                 cache_prompt=image_object["prompt"])
+            except Exception as e:
+                logging.error(f"Error generating image at timestamp {image_object['timestamp']}: {e}")
+                return image_object
+            
+            # Blocking download (or cache copy) on a worker thread
+            image_object["image_path"] = await asyncio.to_thread(download_image, image_object["image_url"])
+        return image_object
+
     async def add_images_to_video(self, video_clip, images):
         """This function receives the following object
         **Example JSON Output:**
@@ -257,24 +361,27 @@ class VideoEditor:
             }
 
         """
-        logging.info("Adding images to video", images)
+        logging.info(f"Adding {len(images)} images to video")
         clips = [video_clip]
         video_duration = video_clip.duration
         
-        logging.info("Enhancing prompts")
-        # Enhance prompts and generate images
-        for i, image_object in enumerate(images):
-            prompt = image_object["prompt"]
-            enhanced_prompt = enhance_prompt("openai", openai_api_key, prompt, model="gpt-3.5-turbo-0125")
-            images[i]["enhanced_prompt"] = enhanced_prompt
-
-        logging.info("Generating images")
-        # Generate and download images
-        for i, image_object in enumerate(images):
-            image_url = await generate_image(service="pollinations", prompt=image_object["enhanced_prompt"])
-            images[i]["image_url"] = image_url
-            image_path = download_image(image_object["image_url"])
-            images[i]["image_path"] = image_path
+        if images:
+            loop = asyncio.get_running_loop()
+            
+            logging.info("Enhancing prompts")
+            # One LLM call for all prompts (falls back per prompt if the batch answer is incomplete)
+            enhanced_prompts = await loop.run_in_executor(
+                None, enhance_prompts, "openai", openai_api_key,
+                [image_object["prompt"] for image_object in images], "gpt-3.5-turbo-0125"
+            )
+            for image_object, enhanced_prompt in zip(images, enhanced_prompts):
+                image_object["enhanced_prompt"] = enhanced_prompt
+            
+            logging.info(f"Generating images ({min(IMAGE_MAX_CONCURRENCY, len(images))} at a time)")
+            # Generate and download every image concurrently on this loop; gather keeps the timestamp order
+            semaphore = asyncio.Semaphore(IMAGE_MAX_CONCURRENCY)
+            await asyncio.gather(*(self._prepare_image(image_object, semaphore) for image_object in images))
+        logging.info(f"Generated {sum(1 for image in images if image['image_path'])}/{len(images)} images")
 
         logging.info("Adding images to video")
         # Add images with timestamps
@@ -304,32 +411,24 @@ class VideoEditor:
         
         return CompositeVideoClip(clips)
 
-    def render_final_video(self, final_clip) -> str:
-        """Render the final video with all components added."""
+    def render_final_video(self, final_clip, render_profile=None) -> str:
+        """Render the final video with all components added.
+
+        Args:
+            final_clip: Composited clip to encode
+            render_profile: Render profile name (draft, preview, publish; default RENDER_PROFILE)
+        """
+        profile = get_render_profile(render_profile)
         unique_id = uuid.uuid4()
         result_dir = os.path.abspath(os.path.join(self.base_dir, '../result'))
         os.makedirs(result_dir, exist_ok=True)
         output_path = os.path.join(result_dir, f"final_video_{unique_id}.mp4")
         
-        # Ensure even dimensions
-        width, height = final_clip.w, final_clip.h
-        if width % 2 != 0:
-            width -= 1
-        if height % 2 != 0:
-            height -= 1
+        # Scale to the profile resolution (with even dimensions)
+        final_clip = scale_clip(final_clip, profile)
         
-        final_clip = final_clip.resize(newsize=(width, height))
-        
-        final_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            preset='veryfast',
-            ffmpeg_params=['-crf', '10', '-pix_fmt', 'yuv420p'],
-            audio_codec='aac',
-            audio_bitrate='128k',
-            fps=30
-
-        )
+        logging.info(f"Rendering with the '{profile['name']}' profile")
+        final_clip.write_videofile(output_path, **write_videofile_args(profile))
         
         logging.info("Final video rendered successfully.")
         return output_path
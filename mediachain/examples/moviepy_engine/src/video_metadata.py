@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from .ffmpeg_tools import probe_video, probe_keyframes
+
+VIDEO_INDEX_PATH = os.getenv("VIDEO_INDEX_PATH", "cache/video_index.sqlite3")
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv")
+
+HASH_SAMPLE_BYTES = 4 * 1024 * 1024  # Bytes hashed from the start and the end of each file
+
+
+def content_hash(video_path):
+    """Hash of the file size plus its first and last few MB (cheap, but tells videos apart)."""
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(video_path, "rb") as f:
+        digest.update(f.read(HASH_SAMPLE_BYTES))
+        if size > 2 * HASH_SAMPLE_BYTES:
+            f.seek(-HASH_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+class VideoMetadataIndex:
+    """
+    Persistent (SQLite) index of video metadata: duration, resolution, fps, codec and keyframes.
+
+    Metadata is stored per content hash; file paths map to a hash and are trusted while
+    their mtime and size are unchanged, so a known video is never probed (or hashed) again.
+    The database can be shared by several processes.
+    """
+
+    def __init__(self, db_path=VIDEO_INDEX_PATH):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._ensure_schema()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _ensure_schema(self):
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    content_hash TEXT PRIMARY KEY,
+                    duration REAL, width INTEGER, height INTEGER, fps REAL, codec TEXT,
+                    keyframes TEXT
+                )""")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS paths (
+                    path TEXT PRIMARY KEY,
+                    mtime REAL, size INTEGER, content_hash TEXT
+                )""")
+
+    def get(self, video_path, keyframes=False):
+        """
+        Metadata of a video, probing it only if it is new or changed.
+
+        Args:
+            video_path: Path to the video file
+            keyframes: Also return the keyframe timestamps (probed once, then stored)
+
+        Returns:
+            {"duration", "width", "height", "fps", "codec", "keyframes", "content_hash"}
+            ("keyframes" is None unless requested or already known), or None on failure
+        """
+        try:
+            path = os.path.abspath(video_path)
+            stat = os.stat(path)
+
+            with self._connect() as db:
+                row = db.execute("SELECT mtime, size, content_hash FROM paths WHERE path = ?", (path,)).fetchone()
+                if row and row[0] == stat.st_mtime and row[1] == stat.st_size:
+                    digest = row[2]
+                else:
+                    digest = content_hash(path)
+                    db.execute("INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)",
+                               (path, stat.st_mtime, stat.st_size, digest))
+                metadata = self._load(db, digest)
+
+            if metadata and (metadata["keyframes"] is not None or not keyframes):
+                with self._lock:
+                    self.hits += 1
+                return metadata
+
+            with self._lock:
+                self.misses += 1
+
+            if metadata is None:
+                logging.info(f"[VIDEO_INDEX] Probing {os.path.basename(path)}")
+                metadata = probe_video(path)
+                if metadata is None:
+                    logging.error(f"[VIDEO_INDEX] No video stream in {path}")
+                    return None
+                metadata["keyframes"] = None
+                metadata["content_hash"] = digest
+            if keyframes:
+                metadata["keyframes"] = probe_keyframes(path)
+
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                    digest, metadata["duration"], metadata["width"], metadata["height"],
+                    metadata["fps"], metadata["codec"],
+                    json.dumps(metadata["keyframes"]) if metadata["keyframes"] is not None else None
+                ))
+            return metadata
+        except Exception as e:
+            logging.error(f"[VIDEO_INDEX] Error reading metadata of {video_path}: {e}")
+            return None
+
+    @staticmethod
+    def _load(db, digest):
+        row = db.execute(
+            "SELECT duration, width, height, fps, codec, keyframes FROM videos WHERE content_hash = ?", (digest,)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "duration": row[0],
+            "width": row[1],
+            "height": row[2],
+            "fps": row[3],
+            "codec": row[4],
+            "keyframes": json.loads(row[5]) if row[5] is not None else None,
+            "content_hash": digest
+        }
+
+    def index_directory(self, directory, keyframes=True):
+        """Make sure every video in a directory is indexed. Returns the number of videos."""
+        count = 0
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                if self.get(os.path.join(directory, name), keyframes=keyframes):
+                    count += 1
+        logging.info(f"[VIDEO_INDEX] ✓ {count} videos indexed in {directory} ({self.stats()})")
+        return count
+
+    def index_in_background(self, directory, keyframes=True):
+        """Index a directory on a daemon thread (e.g. the default backgrounds at startup)."""
+        thread = threading.Thread(target=self.index_directory, args=(directory, keyframes), daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Hit/miss counters of this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+_video_index = None
+
+
+def get_video_index():
+    """Shared index instance configured from VIDEO_INDEX_PATH."""
+    global _video_index
+    if _video_index is None:
+        _video_index = VideoMetadataIndex()
+    return _video_index
@@ -0,0 +1,13 @@
+"""
+Mediachain Path
+Puts mediachain/ on sys.path, so its core package is importable as top-level 'core'.
+
+Imported before any 'core' import by app.py and by the modules that also run without
+it (render workers, CLI entry points).
+"""
+import os
+import sys
+
+MEDIACHAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mediachain')
+if MEDIACHAIN_DIR not in sys.path:
+    sys.path.insert(0, MEDIACHAIN_DIR)
@@ -0,0 +1,183 @@
+"""
+Preview Store
+On-disk store of /api/preview-audio artifacts, keyed by preview id.
+
+Each preview keeps its segment audio files, the normalized PCM buffers, the assembled
+dialogue track, the timeline and the voice mapping in its own directory, so any worker
+process (or the server after a restart) can reuse them instead of paying for TTS again.
+Entries expire PREVIEW_TTL_HOURS after they were created.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_STORE_DIR = os.getenv("PREVIEW_STORE_DIR", "cache/previews")
+PREVIEW_TTL_HOURS = float(os.getenv("PREVIEW_TTL_HOURS", "24"))
+
+_PREVIEW_ID = re.compile(r"^[0-9a-fA-F-]{8,64}$")
+
+
+class PreviewStore:
+    def __init__(self, root: str = PREVIEW_STORE_DIR, ttl_seconds: float = PREVIEW_TTL_HOURS * 3600):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+
+    def _entry_dir(self, preview_id: str) -> Path:
+        if not _PREVIEW_ID.match(preview_id or ""):
+            raise ValueError(f"Invalid preview id: {preview_id!r}")
+        return self.root / preview_id
+
+    def save(self, preview_id: str, audio_segments: List[Dict], timeline: Dict, pcm_buffers: List[np.ndarray],
+             dialogue: List[Dict], speakers: List[str], voice_mapping: Dict[str, str]) -> Dict:
+        """
+        Persist a preview. Segment files and the assembled track are moved into the store.
+
+        Args:
+            preview_id: Preview id (returned to the client)
+            audio_segments: Segments from generate_dialogue_audio
+            timeline: DialogueTimeline.to_dict() of the assembled track
+            pcm_buffers: Normalized PCM buffers aligned with audio_segments (may be None)
+            dialogue: Parsed dialogue the audio was generated for
+            speakers: Speaker names
+            voice_mapping: Speaker name -> voice id
+
+        Returns:
+            The stored record (see load)
+        """
+        entry_dir = self._entry_dir(preview_id)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Build the entry under a temp name and rename it, so readers never see a partial preview
+        temp_dir = self.root / f".{preview_id}.{uuid.uuid4().hex}.tmp"
+        temp_dir.mkdir()
+
+        try:
+            segments = []
+            for i, segment in enumerate(audio_segments):
+                name = f"segment_{i:03d}.mp3"
+                shutil.move(segment["audio_path"], temp_dir / name)
+                segments.append(dict(segment, audio_path=name))
+
+            shutil.move(timeline["audio_path"], temp_dir / "audio.mp3")
+            timeline = dict(timeline, audio_path="audio.mp3")
+
+            if pcm_buffers is not None:
+                np.savez(temp_dir / "pcm.npz", *pcm_buffers)
+
+            record = {
+                "preview_id": preview_id,
+                "created_at": time.time(),
+                "segments": segments,
+                "timeline": timeline,
+                "dialogue": dialogue,
+                "speakers": speakers,
+                "voice_mapping": voice_mapping,
+                "has_pcm": pcm_buffers is not None
+            }
+            with open(temp_dir / "preview.json", "w") as f:
+                json.dump(record, f)
+
+            os.replace(temp_dir, entry_dir)
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"[PREVIEW_STORE] ✓ Saved preview {preview_id} ({len(segments)} segments)")
+        self.purge_expired()
+        return self._resolve(record, entry_dir)
+
+    def load(self, preview_id: str) -> Optional[Dict]:
+        """
+        Stored preview with absolute paths, or None if it is unknown or expired.
+
+        Returns:
+            {"preview_id", "created_at", "audio_path", "segments", "timeline",
+             "dialogue", "speakers", "voice_mapping", "has_pcm"}
+        """
+        try:
+            entry_dir = self._entry_dir(preview_id)
+            with open(entry_dir / "preview.json", "r") as f:
+                record = json.load(f)
+        except (ValueError, FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if self._expired(record):
+            logger.info(f"[PREVIEW_STORE] Preview {preview_id} expired")
+            self.delete(preview_id)
+            return None
+        return self._resolve(record, entry_dir)
+
+    def load_pcm(self, preview_id: str) -> Optional[List[np.ndarray]]:
+        """Normalized PCM buffers of a preview (aligned with its segments), or None."""
+        try:
+            with np.load(self._entry_dir(preview_id) / "pcm.npz") as data:
+                return [data[f"arr_{i}"] for i in range(len(data.files))]
+        except (ValueError, FileNotFoundError):
+            return None
+
+    def delete(self, preview_id: str) -> None:
+        try:
+            shutil.rmtree(self._entry_dir(preview_id), ignore_errors=True)
+        except ValueError:
+            pass
+
+    def purge_expired(self) -> int:
+        """Delete expired previews (and leftovers of interrupted saves). Returns how many were removed."""
+        if not self.root.exists():
+            return 0
+
+        removed = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            if entry.name.startswith("."):
+                # Interrupted save
+                expired = time.time() - entry.stat().st_mtime > self.ttl_seconds
+            else:
+                try:
+                    with open(os.path.join(entry.path, "preview.json"), "r") as f:
+                        expired = self._expired(json.load(f))
+                except (FileNotFoundError, json.JSONDecodeError):
+                    expired = True
+            if expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+
+        if removed:
+            logger.info(f"[PREVIEW_STORE] Purged {removed} expired previews")
+        return removed
+
+    def _expired(self, record: Dict) -> bool:
+        return time.time() - record["created_at"] > self.ttl_seconds
+
+    @staticmethod
+    def _resolve(record: Dict, entry_dir: Path) -> Dict:
+        """Turn the entry-relative file names into absolute paths."""
+        entry_dir = entry_dir.resolve()
+        timeline = dict(record["timeline"], audio_path=str(entry_dir / record["timeline"]["audio_path"]))
+        return dict(
+            record,
+            audio_path=timeline["audio_path"],
+            timeline=timeline,
+            segments=[dict(segment, audio_path=str(entry_dir / segment["audio_path"])) for segment in record["segments"]]
+        )
+
+
+_preview_store = None
+
+
+def get_preview_store() -> PreviewStore:
+    """Shared store configured from PREVIEW_STORE_DIR / PREVIEW_TTL_HOURS."""
+    global _preview_store
+    if _preview_store is None:
+        _preview_store = PreviewStore()
+    return _preview_store
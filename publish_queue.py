@@ -0,0 +1,157 @@
+"""
+Instagram Publish Queue
+Publishes videos to Instagram in the background so upload requests return immediately.
+
+Uploads run as tasks on a dedicated event loop thread, separate from the API's event
+loop and from the render workers. Instagram's processing status is polled with async
+timers (exponential backoff) instead of sleeping, so many accounts can publish in
+parallel on that one thread. Each upload's progress is kept in a status dict,
+queryable by upload id; finished uploads are forgotten after INSTAGRAM_UPLOAD_STATUS_TTL
+(the upload history keeps them).
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import mediachain_path  # noqa: F401 (makes 'core' importable)
+from core.utils.provider_clients import get_provider_clients
+
+logger = logging.getLogger(__name__)
+
+INSTAGRAM_MAX_CONCURRENT_UPLOADS = int(os.getenv("INSTAGRAM_MAX_CONCURRENT_UPLOADS", "8"))  # Uploads in flight at once
+INSTAGRAM_UPLOAD_STATUS_TTL = int(os.getenv("INSTAGRAM_UPLOAD_STATUS_TTL", "3600"))  # Seconds a finished upload stays queryable
+
+
+class InstagramPublishQueue:
+    """Background scheduler for InstagramManager.publish_video, one upload at a time per account."""
+
+    def __init__(self, manager, max_concurrent: int = INSTAGRAM_MAX_CONCURRENT_UPLOADS,
+                 status_ttl: int = INSTAGRAM_UPLOAD_STATUS_TTL):
+        self.manager = manager
+        self.max_concurrent = max_concurrent
+        self.status_ttl = status_ttl
+        self.uploads: Dict[str, Dict] = {}  # In submission order
+        self._finished_at: Dict[str, float] = {}  # In completion order (monotonic time)
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._account_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the scheduler thread (idempotent)."""
+        with self._lock:
+            if self._loop is not None:
+                return
+
+            self._loop = asyncio.new_event_loop()
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._thread = threading.Thread(target=self._loop.run_forever, name="instagram-publish", daemon=True)
+            self._thread.start()
+            logger.info(f"[PUBLISH] Started publish queue ({self.max_concurrent} concurrent uploads)")
+
+    def submit(self, account_id: str, video_url: str, caption: str = "",
+               on_published: Optional[Callable[[Dict], None]] = None) -> str:
+        """
+        Queue an upload.
+
+        Args:
+            account_id: Linked Instagram account id
+            video_url: Publicly accessible URL of the video
+            caption: Video caption
+            on_published: Optional callback(record), run in a worker thread after a successful upload
+
+        Returns:
+            Upload id (see get_status)
+        """
+        self.start()
+        self._prune()
+
+        upload_id = str(uuid.uuid4())
+        with self._lock:
+            self.uploads[upload_id] = {
+                "upload_id": upload_id,
+                "account_id": account_id,
+                "video_url": video_url,
+                "status": "queued",
+                "message": "Waiting for an upload slot...",
+                "created_at": datetime.now().isoformat(),
+                "result": None,
+                "error": None
+            }
+
+        asyncio.run_coroutine_threadsafe(self._run(upload_id, account_id, video_url, caption, on_published), self._loop)
+        logger.info(f"[PUBLISH] Upload {upload_id} queued for account {account_id}")
+        return upload_id
+
+    def get_status(self, upload_id: str) -> Optional[Dict]:
+        self._prune()
+        with self._lock:
+            status = self.uploads.get(upload_id)
+            return dict(status) if status else None
+
+    def list_uploads(self) -> List[Dict]:
+        """Uploads in flight or finished within the status TTL, newest first."""
+        self._prune()
+        with self._lock:
+            return [dict(status) for status in reversed(self.uploads.values())]
+
+    def _prune(self) -> None:
+        """Forget uploads that finished more than status_ttl seconds ago."""
+        cutoff = time.monotonic() - self.status_ttl
+        with self._lock:
+            while self._finished_at:
+                upload_id, finished_at = next(iter(self._finished_at.items()))
+                if finished_at > cutoff:
+                    break
+                del self._finished_at[upload_id]
+                self.uploads.pop(upload_id, None)
+
+    def _finish(self, upload_id: str, **fields) -> None:
+        with self._lock:
+            self.uploads[upload_id].update(fields)
+            self._finished_at[upload_id] = time.monotonic()
+
+    def shutdown(self) -> None:
+        """Stop the scheduler thread. Uploads still in flight are abandoned."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(get_provider_clients().aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"[PUBLISH] Could not close HTTP client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        logger.info("[PUBLISH] Publish queue stopped")
+
+    async def _run(self, upload_id: str, account_id: str, video_url: str, caption: str, on_published) -> None:
+        def update(state, message):
+            with self._lock:
+                self.uploads[upload_id].update(status=state, message=message)
+
+        # Graph API rate limits are per account: publish one video at a time per account
+        account_lock = self._account_locks.setdefault(account_id, asyncio.Lock())
+        try:
+            async with account_lock, self._semaphore:
+                record = await self.manager.publish_video(account_id, video_url, caption, on_status=update)
+        except Exception as e:
+            logger.error(f"[PUBLISH] ✗ Upload {upload_id} failed: {e}")
+            self._finish(upload_id, status="failed", message=f"Error: {e}", error=str(e))
+            return
+
+        self._finish(upload_id, status="completed", message="Published to Instagram", result=record)
+        logger.info(f"[PUBLISH] ✓ Upload {upload_id} published: {record['permalink']}")
+
+        if on_published:
+            try:
+                await asyncio.to_thread(on_published, record)
+            except Exception as e:
+                logger.warning(f"[PUBLISH] on_published callback failed for {upload_id}: {e}")
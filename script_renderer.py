@@ -0,0 +1,529 @@
+"""
+Script Mode Renderer
+The script-mode video pipeline (TTS, captions, composition and encoding).
+Runs inside a render worker process, see job_queue.py
+"""
+import os
+import shutil
+import asyncio
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from elevenlabs_utils import generate_dialogue_audio, assemble_dialogue_audio
+from dialogue_timeline import DialogueTimeline
+from background_library import pick_start_time
+from preview_store import get_preview_store
+from mediachain.examples.moviepy_engine.src.render_profiles import get_render_profile, encoder_params, write_videofile_args, scale_clip, output_size
+from mediachain.examples.moviepy_engine.src.video_metadata import get_video_index
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = Path("outputs")
+
+# Configuration
+AVATAR_SIZE = 700  # Fixed height in pixels for speaker avatars (at full resolution)
+IMAGE_TOP = 70  # Top offset in pixels of dialogue images (at full resolution)
+
+
+def plan_frame(spec: Dict) -> Dict:
+    """
+    Size the composite is built at: the (cropped) background scaled to the render profile.
+
+    Drafts are composited at their small output size rather than shrunk at the end, so
+    every overlay size and position is multiplied by "scale".
+
+    Args:
+        spec: Script-mode render spec
+
+    Returns:
+        {"source_size", "crop_size", "size", "scale"}; crop_size is the 9:16 center crop of
+        the source (the source size if no crop), size the even output size
+    """
+    metadata = get_video_index().get(spec["video_path"])
+    if not metadata:
+        raise RuntimeError(f"Could not read the background video: {spec['video_path']}")
+    source_width, source_height = metadata["width"], metadata["height"]
+    crop_width = source_width
+    if spec["crop"]:
+        # Same center crop as VideoEditor.crop_video_9_16
+        crop_width = min(source_width, int(source_height * 9 / 16))
+
+    # output_size rounds down to even numbers (needed for yuv420p)
+    width, height = output_size(crop_width, source_height, spec["profile"])
+    return {
+        "source_size": (source_width, source_height),
+        "crop_size": (crop_width, source_height),
+        "size": (width, height),
+        "scale": height / source_height
+    }
+
+
+def scaled_caption_style(caption_style: Dict, scale: float) -> Dict:
+    """Caption style for a composite built at `scale`, so captions are rasterized at their final size."""
+    return dict(caption_style,
+                font_size=max(1, round(caption_style["font_size"] * scale)),
+                width=max(1, round(caption_style["width"] * scale)))
+
+
+def plan_dialogue_images(dialogue_images_map: dict, timeline: DialogueTimeline) -> List[Dict]:
+    """
+    When each dialogue image is shown: from its line's start until the next image
+    or the end of the line, at most 5 seconds.
+
+    Args:
+        dialogue_images_map: Dictionary mapping dialogue index to image path
+        timeline: Dialogue timeline of the audio track
+
+    Returns:
+        List of {"index", "path", "start", "duration"}
+    """
+    windows = []
+    for dialogue_idx, image_path in (dialogue_images_map or {}).items():
+        timing = timeline.segment(dialogue_idx)
+        if timing is None:
+            logger.warning(f"[IMAGE_OVERLAY] Skipping image for dialogue {dialogue_idx} - no audio segment")
+            continue
+
+        start_time = timing['start']
+
+        # Calculate end time: until next image or max 5 seconds
+        end_time = timing['end']
+
+        # End at the start of next image, if there is one
+        next_timing = timeline.next_segment(dialogue_idx, dialogue_images_map)
+        if next_timing:
+            end_time = min(end_time, next_timing['start'])
+
+        # Cap at 5 seconds max
+        duration = min(end_time - start_time, 5.0)
+
+        logger.info(f"[IMAGE_OVERLAY] Dialogue {dialogue_idx}: {start_time:.2f}s - {start_time + duration:.2f}s ({duration:.2f}s)")
+        windows.append({"index": dialogue_idx, "path": image_path, "start": start_time, "duration": duration})
+    return windows
+
+
+def plan_speaker_avatars(speaker_avatars: dict, timeline: DialogueTimeline, speakers_list: list,
+                         video_width: int, video_height: int, scale: float = 1.0) -> List[Dict]:
+    """
+    When and where each speaker's avatar is shown: while they talk, at the bottom
+    center (one speaker) or bottom left/right corners (two speakers).
+
+    Args:
+        speaker_avatars: Dict mapping speaker name to avatar image path
+        timeline: Dialogue timeline of the audio track
+        speakers_list: List of speaker names [speaker1, speaker2]
+        video_width: Width of the video the avatars are placed on
+        video_height: Height of the video the avatars are placed on
+        scale: Size of the video relative to full resolution (sizes and margins are scaled)
+
+    Returns:
+        List of {"speaker", "path", "start", "duration", "position", "size"}; position is
+        (x, y) in pixels with x possibly 'center', size the avatar height
+    """
+    # Fixed positioning constants (at full resolution)
+    avatar_size = round(AVATAR_SIZE * scale)
+    MARGIN = round(20 * scale)  # Margin from edges
+    BOTTOM_OFFSET = round(100 * scale)  # Distance from bottom
+
+    placements = []
+    for segment in timeline.segments:
+        speaker = segment['speaker']
+
+        # Skip if no avatar for this speaker
+        if speaker not in (speaker_avatars or {}):
+            continue
+
+        start_time = segment['start']
+        duration = segment['end'] - segment['start']
+
+        # Determine position based on speaker
+        try:
+            speaker_index = speakers_list.index(speaker)
+        except ValueError:
+            logger.warning(f"[AVATAR] Speaker {speaker} not in speakers list, skipping")
+            continue
+
+        if len(speakers_list) == 1:
+            # Single speaker: Center bottom
+            position = ('center', video_height - avatar_size - BOTTOM_OFFSET)
+        elif speaker_index == 0:
+            # Speaker 1 (of 2): Bottom left
+            position = (MARGIN, video_height - avatar_size - BOTTOM_OFFSET)
+        else:
+            # Speaker 2 (of 2): Bottom right
+            position = (video_width - avatar_size - MARGIN,
+                       video_height - avatar_size - BOTTOM_OFFSET)
+
+        logger.info(f"[AVATAR] {speaker} at {start_time:.2f}s-{start_time+duration:.2f}s, pos={position}")
+        placements.append({
+            "speaker": speaker,
+            "path": speaker_avatars[speaker],
+            "start": start_time,
+            "duration": duration,
+            "position": position,
+            "size": avatar_size
+        })
+    return placements
+
+
+def add_dialogue_images_to_video(
+    video_clip,
+    dialogue_images_map: dict,
+    timeline: DialogueTimeline,
+    scale: float = 1.0
+) -> list:
+    """
+    Add user-uploaded images to video at dialogue timing.
+    Images positioned at top third, similar to DALL-E.
+
+    Args:
+        video_clip: The video clip to add images to
+        dialogue_images_map: Dictionary mapping dialogue index to image path
+        timeline: Dialogue timeline of the audio track
+        scale: Size of the video relative to full resolution
+
+    Returns:
+        List of image clips to overlay
+    """
+    from moviepy.editor import ImageClip
+
+    if not dialogue_images_map:
+        return []
+
+    logger.info(f"[IMAGE_OVERLAY] Adding {len(dialogue_images_map)} dialogue images to video")
+
+    image_clips = []
+
+    for window in plan_dialogue_images(dialogue_images_map, timeline):
+        try:
+            # Create image clip (positioned at top third like DALL-E)
+            image_clip = (ImageClip(window["path"])
+                         .set_duration(window["duration"])
+                         .set_position(('center', round(IMAGE_TOP * scale)))
+                         .resize(height=video_clip.h / 3)
+                         .set_start(window["start"]))
+
+            image_clips.append(image_clip)
+        except Exception as e:
+            logger.error(f"[IMAGE_OVERLAY] Error adding image for dialogue {window['index']}: {e}")
+
+    logger.info(f"[IMAGE_OVERLAY] ✓ Added {len(image_clips)} image clips")
+    return image_clips
+
+
+def add_speaker_avatars_to_video(
+    video_clip,
+    speaker_avatars: dict,
+    timeline: DialogueTimeline,
+    speakers_list: list,
+    scale: float = 1.0
+) -> list:
+    """
+    Add speaker avatar images that appear when each speaker is talking.
+    Square avatars positioned at bottom corners.
+
+    Args:
+        video_clip: The video clip
+        speaker_avatars: Dict mapping speaker name to avatar image path
+        timeline: Dialogue timeline of the audio track
+        speakers_list: List of speaker names [speaker1, speaker2]
+        scale: Size of the video relative to full resolution
+
+    Returns:
+        List of avatar clips
+    """
+    from moviepy.editor import ImageClip
+
+    if not speaker_avatars:
+        return []
+
+    logger.info(f"[AVATAR] Adding speaker avatars to video")
+    logger.info(f"[AVATAR] Using avatar size: {round(AVATAR_SIZE * scale)}")
+
+    avatar_clips = []
+
+    for placement in plan_speaker_avatars(speaker_avatars, timeline, speakers_list, video_clip.w, video_clip.h, scale):
+        try:
+            # Create square avatar clip (no circular mask, just resize to square)
+            avatar_clip = (ImageClip(placement["path"])
+                          .set_duration(placement["duration"])
+                          .resize(height=placement["size"])
+                          .set_position(placement["position"])
+                          .set_start(placement["start"]))
+
+            avatar_clips.append(avatar_clip)
+
+        except Exception as e:
+            logger.error(f"[AVATAR] Error adding avatar for {placement['speaker']}: {e}")
+
+    logger.info(f"[AVATAR] ✓ Added {len(avatar_clips)} avatar clips")
+    return avatar_clips
+
+
+def build_script_composite(spec: Dict) -> Tuple:
+    """
+    Build the script-mode composite from a render spec (see render_script_video).
+    Deterministic, so render worker processes can each rebuild the same composite.
+
+    Args:
+        spec: Picklable render spec (background plan, audio, timeline, overlays, subtitles)
+
+    Returns:
+        (final_clip, clips_to_close)
+    """
+    from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
+    from mediachain.examples.moviepy_engine.src.video_editor import VideoEditor
+    from mediachain.examples.moviepy_engine.src.captions.video_captioner import VideoCaptioner
+
+    video_editor = VideoEditor()
+    timeline = DialogueTimeline.from_dict(spec["timeline"])
+    frame = plan_frame(spec)
+    scale = frame["scale"]
+
+    # Load and prepare the background video
+    if scale < 1:
+        # Decode straight at the output resolution so every layer is composited at that size
+        source_width, source_height = frame["source_size"]
+        width, height = frame["size"]
+        read_width = round(source_width * scale) if spec["crop"] else width
+        source_video = VideoFileClip(spec["video_path"], target_resolution=(height, read_width))
+    else:
+        source_video = VideoFileClip(spec["video_path"])
+    background_video = source_video
+    if spec["background_start"]:
+        background_video = background_video.subclip(spec["background_start"])
+    if spec["loop_to"]:
+        # Looped in time only; frames are read from the source during the final render
+        background_video = video_editor.loop_clip_to_duration(background_video, spec["loop_to"])
+
+    # Crop video to 9:16 aspect ratio (center crop, exactly the frame width)
+    cropped_video = background_video
+    if spec["crop"] and frame["size"][0] < background_video.w:
+        cropped_video = background_video.crop(x_center=background_video.w / 2, width=frame["size"][0])
+
+    # Set the audio
+    audio_clip = AudioFileClip(spec["audio_path"])
+    video_with_audio = cropped_video.set_audio(audio_clip)
+
+    # Add dialogue images and speaker avatars
+    image_clips = add_dialogue_images_to_video(cropped_video, spec["dialogue_images_map"], timeline, scale)
+    avatar_clips = add_speaker_avatars_to_video(cropped_video, spec["speaker_avatars"], timeline, spec["speakers"], scale)
+
+    # Add captions overlay (rasterized at the composite's size)
+    caption_clips = []
+    if spec["subtitles_path"]:
+        caption_style = scaled_caption_style(spec["caption_style"], scale)
+        caption_clips = VideoCaptioner().generate_captions_to_video(spec["subtitles_path"], **caption_style)
+
+    final_video = CompositeVideoClip([video_with_audio] + image_clips + avatar_clips + caption_clips)
+
+    # Cut to audio duration
+    final_video = final_video.subclip(0, spec["duration"])
+
+    # Already at the render profile's resolution, up to the rounding of the crop
+    final_video = scale_clip(final_video, spec["profile"])
+
+    return final_video, [source_video, audio_clip] + caption_clips
+
+
+def render_script_video(job_id: str, job: Dict, report: Callable) -> Dict:
+    """
+    Run the full script-mode pipeline for one queued job.
+
+    Args:
+        job_id: Job identifier (used for file names and progress reports)
+        job: Picklable job description built by the /api/generate-video-script endpoint
+        report: Progress callback, report(job_id, progress, message, **fields)
+
+    Returns:
+        Dictionary with 'output_path' and 'download_url' of the rendered video
+    """
+    video_path = Path(job["video_path"])
+    background = job.get("background")  # Background library proxy entry (video_path is then shared)
+    dialogue = job["dialogue"]
+    speakers = job["speakers"]
+    voice_mapping = job["voice_mapping"]
+    dialogue_images_map = job.get("dialogue_images_map") or {}
+    speaker_avatars = job.get("speaker_avatars") or {}
+    loop_if_short = job.get("loop_if_short", True)
+    font_color = job.get("font_color", "white")
+    caption_source = job.get("caption_source", "alignment")
+    preview_id = job.get("preview_id")
+    profile = get_render_profile(job.get("render_profile"))
+
+    try:
+        # Check if we can reuse preview audio (the preview store is shared by all workers)
+        timeline = None
+        preview = get_preview_store().load(preview_id) if preview_id else None
+        if preview_id and not preview:
+            logger.warning(f"[JOB {job_id}] Preview {preview_id} expired, regenerating audio")
+        if preview and not os.path.exists(preview["audio_path"]) and preview["has_pcm"]:
+            # Dialogue track lost but the normalized segments are stored: re-assemble without TTS
+            logger.info(f"[JOB {job_id}] Re-assembling preview audio from stored PCM")
+            assemble_dialogue_audio(preview["segments"], preview["audio_path"], get_preview_store().load_pcm(preview_id))
+        if preview and os.path.exists(preview["audio_path"]):
+            logger.info(f"[JOB {job_id}] ♻️  Reusing preview audio AND segments data: {preview['audio_path']}")
+            timeline = DialogueTimeline.from_dict(preview["timeline"])
+            logger.info(f"[JOB {job_id}] ✓ Retrieved {len(timeline.segments)} audio segments from preview")
+            report(job_id, 30, "Reusing preview audio...")
+
+        if timeline is None:
+            # Generate audio segments with ElevenLabs
+            logger.info(f"[JOB {job_id}] Generating audio with ElevenLabs (no preview available)")
+            report(job_id, 10, "Generating voices...")
+            elevenlabs_api_key = os.getenv('ELEVENLABS_API_KEY')
+            audio_result = generate_dialogue_audio(
+                elevenlabs_api_key, dialogue, voice_mapping,
+                word_timings=(caption_source == "alignment")
+            )
+
+            if audio_result["count"] == 0:
+                raise RuntimeError("Failed to generate audio")
+
+            # Concatenate audio segments (with 1s gaps between speaker changes)
+            final_audio_path = f"/tmp/elevenlabs_audio/final_{job_id}.mp3"
+
+            timeline = assemble_dialogue_audio(audio_result["segments"], final_audio_path, audio_result["pcm"])
+
+            if timeline is None:
+                raise RuntimeError("Failed to concatenate audio")
+
+            logger.info(f"[JOB {job_id}] ✓ Audio generated: {timeline.audio_path}")
+            report(job_id, 30, "Audio generated")
+
+        # Step 1: Generate captions, timed from the TTS alignment when available
+        report(job_id, 40, "Generating captions...")
+        from mediachain.examples.moviepy_engine.src.captions.subtitle_generator import SubtitleGenerator
+        subtitle_generator = SubtitleGenerator()
+
+        # Captions of a preview's audio are kept next to it, so drafts and the final render share them
+        reusable_subtitles = None
+        if preview:
+            reusable_subtitles = str(Path(preview["audio_path"]).with_suffix(f".{caption_source}.srt"))
+
+        if reusable_subtitles and os.path.exists(reusable_subtitles):
+            logger.info(f"[JOB {job_id}] ♻️  Reusing preview captions: {reusable_subtitles}")
+            subtitles_path = reusable_subtitles
+        elif caption_source == "alignment" and timeline.has_word_timings:
+            # Word timings come from the ElevenLabs alignment, offset by the timeline (no STT pass)
+            logger.info(f"[JOB {job_id}] Generating captions from ElevenLabs word timings")
+            subtitles_path = subtitle_generator.generate_subtitles_from_words(timeline.words())
+        elif not os.getenv('OPENAI_API_KEY'):
+            # Only alignment captions were requested, so the API didn't require a key for Whisper
+            logger.warning(f"[JOB {job_id}] Word timings missing and OPENAI_API_KEY not set, skipping Whisper captions")
+            subtitles_path = None
+        else:
+            if caption_source == "alignment":
+                logger.warning(f"[JOB {job_id}] Word timings missing, falling back to Whisper STT")
+            # Generate subtitles from the concatenated audio (Whisper automatically gets timing)
+            logger.info(f"[JOB {job_id}] Generating captions via Whisper STT")
+            subtitles_path = asyncio.run(subtitle_generator.generate_subtitles(timeline.audio_path))
+        if subtitles_path:
+            logger.info(f"[JOB {job_id}] ✓ Subtitles ready: {subtitles_path}")
+            if reusable_subtitles and subtitles_path != reusable_subtitles:
+                shutil.copyfile(subtitles_path, reusable_subtitles)
+        else:
+            logger.warning(f"[JOB {job_id}] No subtitles generated, rendering without captions")
+
+        # Step 2: Plan the background video
+        from mediachain.examples.moviepy_engine.src.ffmpeg_tools import probe_duration
+        from mediachain.examples.moviepy_engine.src.video_metadata import get_video_index
+
+        logger.info(f"[JOB {job_id}] Planning background video")
+        report(job_id, 50, "Preparing background video...")
+        video_metadata = get_video_index().get(str(video_path))
+        if not video_metadata:
+            raise RuntimeError("Could not read the background video")
+        background_duration = video_metadata["duration"]
+        audio_duration = probe_duration(timeline.audio_path) or timeline.duration
+
+        logger.info(f"[JOB {job_id}] Video: {background_duration:.2f}s, Audio: {audio_duration:.2f}s")
+
+        background_start = 0.0
+        if background and background_duration > audio_duration:
+            # Proxies have a keyframe every second: start at a random one that leaves enough video
+            background_start = pick_start_time(background, audio_duration)
+            logger.info(f"[JOB {job_id}] Starting background proxy at {background_start:.2f}s")
+            background_duration -= background_start
+
+        # Step 3: Loop video if too short
+        loop_to = None
+        if background_duration < audio_duration:
+            if loop_if_short:
+                loop_to = audio_duration + 5.0
+                logger.info(f"[JOB {job_id}] Video too short, looping to {loop_to:.2f}s")
+            else:
+                raise ValueError(f"Video too short: {background_duration:.2f}s < {audio_duration:.2f}s")
+
+        spec = {
+            "video_path": str(video_path),
+            "background_start": background_start,
+            "loop_to": loop_to,
+            "crop": not background,  # Proxies are already 9:16
+            "audio_path": timeline.audio_path,
+            "duration": audio_duration,
+            "timeline": timeline.to_dict(),
+            "dialogue_images_map": dialogue_images_map,
+            "speaker_avatars": speaker_avatars,
+            "speakers": speakers,
+            "subtitles_path": subtitles_path,
+            "profile": profile,
+            # Using smaller font size (45 instead of 60) and Helvetica with yellow outline
+            "caption_style": {
+                "captions_color": font_color,
+                "shadow_color": 'yellow',  # Yellow outline (hardcoded in VideoCaptioner)
+                "font_size": 45,  # Smaller font
+                "width": 540
+            }
+        }
+
+        # Step 7: Render final video
+        output_filename = f"{job.get('output_prefix', 'script_mode')}_{job_id}.mp4"
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        render_segments = job.get("render_segments") or 1
+        renderer = job.get("renderer", "moviepy")
+
+        logger.info(f"[JOB {job_id}] Rendering final video ('{profile['name']}' profile)...")
+        report(job_id, 60, "Rendering video...")
+        rendered = False
+        if renderer == "ffmpeg":
+            # Same spec compiled to one ffmpeg filtergraph; MoviePy stays the fallback
+            from ffmpeg_script_renderer import render_script_spec_ffmpeg
+            try:
+                render_script_spec_ffmpeg(spec, output_path)
+                rendered = True
+            except Exception as e:
+                stderr = getattr(e, "stderr", None)
+                logger.error(f"[JOB {job_id}] ✗ ffmpeg renderer failed, falling back to MoviePy: {e}"
+                             + (f"\n{stderr[-2000:]}" if stderr else ""))
+
+        if not rendered:
+            if render_segments > 1:
+                from mediachain.examples.moviepy_engine.src.parallel_render import render_parallel
+                render_parallel(build_script_composite, spec, output_path, render_segments, fps=profile["fps"],
+                                preset=profile["preset"], ffmpeg_params=encoder_params(profile),
+                                audio_bitrate=profile["audio_bitrate"], cpu_budget=job.get("cpu_budget"),
+                                on_progress=lambda done, total: report(
+                                    job_id, 60 + int(35 * done / total), f"Rendered segment {done}/{total}..."))
+            else:
+                final_video, resources = build_script_composite(spec)
+                try:
+                    final_video.write_videofile(output_path, **write_videofile_args(profile))
+                finally:
+                    # Step 8: Cleanup
+                    logger.info(f"[JOB {job_id}] Cleaning up resources")
+                    for clip in resources:
+                        clip.close()
+
+        logger.info(f"[JOB {job_id}] ✓✓✓ Script mode video generation completed!")
+
+        return {
+            "output_path": output_path,
+            "download_url": f"/api/download/{output_filename}"
+        }
+
+    finally:
+        # Remove uploaded video (library proxies are kept)
+        if not background:
+            video_path.unlink(missing_ok=True)
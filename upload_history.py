@@ -0,0 +1,106 @@
+"""
+Upload History
+Append-only store of Instagram upload attempts.
+
+Records are appended as rows of a SQLite database (indexed on timestamp and on
+account + timestamp) instead of rewriting one JSON file per upload, so saving is
+constant time, pages come back newest-first straight from the index, and several
+writers (the API and the publish queue thread) can't corrupt each other.
+"""
+import os
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class UploadHistory:
+    def __init__(self, db_path: str, legacy_json_path: str = None):
+        self.db_path = str(db_path)
+        self._ensure_schema()
+        if legacy_json_path:
+            self._import_legacy(Path(legacy_json_path))
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _ensure_schema(self) -> None:
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    account_id TEXT,
+                    record TEXT NOT NULL
+                )""")
+            db.execute("CREATE INDEX IF NOT EXISTS uploads_by_time ON uploads (timestamp, seq)")
+            db.execute("CREATE INDEX IF NOT EXISTS uploads_by_account ON uploads (account_id, timestamp, seq)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def append(self, record: Dict) -> None:
+        """Append an upload record (needs "timestamp" as an ISO string)"""
+        with self._connect() as db:
+            db.execute("INSERT INTO uploads (timestamp, account_id, record) VALUES (?, ?, ?)",
+                       (record["timestamp"], record.get("account_id"), json.dumps(record)))
+
+    def page(self, limit: int = 50, offset: int = 0, account_id: str = None) -> List[Dict]:
+        """
+        Records newest first.
+
+        Args:
+            limit: Page size (None for all records)
+            offset: Records to skip
+            account_id: Only this account's uploads
+
+        Returns:
+            List of upload records
+        """
+        query = "SELECT record FROM uploads"
+        params = []
+        if account_id:
+            query += " WHERE account_id = ?"
+            params.append(account_id)
+        # Walks the index backwards, no sort
+        query += " ORDER BY timestamp DESC, seq DESC LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+
+        with self._connect() as db:
+            return [json.loads(row[0]) for row in db.execute(query, params)]
+
+    def count(self, account_id: str = None) -> int:
+        with self._connect() as db:
+            if account_id:
+                return db.execute("SELECT COUNT(*) FROM uploads WHERE account_id = ?", (account_id,)).fetchone()[0]
+            return db.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def _import_legacy(self, json_path: Path) -> None:
+        """Move records of the old upload_history.json into the database (once)"""
+        if not json_path.exists():
+            return
+
+        with self._connect() as db:
+            imported = db.execute("SELECT value FROM meta WHERE key = 'legacy_json_imported'").fetchone()
+        if not imported:
+            try:
+                with open(json_path, "r") as f:
+                    records = json.load(f)
+            except Exception as e:
+                logger.error(f"[HISTORY] Error reading {json_path}: {e}")
+                return
+
+            # Records and the migration marker commit together, so a crash can't import twice
+            with self._connect() as db:
+                db.executemany("INSERT INTO uploads (timestamp, account_id, record) VALUES (?, ?, ?)", [
+                    (record["timestamp"], record.get("account_id"), json.dumps(record))
+                    for record in sorted(records, key=lambda record: record["timestamp"])
+                ])
+                db.execute("INSERT INTO meta (key, value) VALUES ('legacy_json_imported', ?)", (str(json_path),))
+            logger.info(f"[HISTORY] ✓ Imported {len(records)} records from {json_path}")
+
+        json_path.rename(json_path.with_name(json_path.name + ".migrated"))